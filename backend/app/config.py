@@ -1,4 +1,4 @@
-from typing import List
+from typing import List, Dict, Any
 
 class Settings:
     # API Settings
@@ -11,11 +11,46 @@ class Settings:
     
     # Database Settings
     DATABASE_URL: str = "sqlite:///./data/app.db"
+    DB_POOL_SIZE: int = 5
+    DB_POOL_TIMEOUT: float = 30.0  # Seconds to wait for a free connection
+    DB_POOL_HEALTH_CHECK_INTERVAL: float = 60.0  # Ping connections idle longer than this
+    DB_PRAGMAS: Dict[str, Any] = {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "mmap_size": 268435456,  # 256 MB
+        "cache_size": -65536,  # Negative means KiB, so 64 MB
+        "temp_store": "MEMORY"
+    }
+    
+    # Course catalog
+    COURSE_COUNT_CACHE_TTL: int = 60  # Seconds a cached COUNT(*) stays valid for count=cached
+    COURSE_COUNT_CACHE_MAX_ENTRIES: int = 256  # Distinct filter combinations kept
+    CATALOG_REFRESH_INTERVAL: float = 5.0  # Seconds between checks for course changes
+    COURSE_CHANGES_RETENTION: float = 3600.0  # Seconds course_changes rows are kept for other workers to apply
     
     # Weaviate Settings
     WEAVIATE_URL: str = "http://localhost:8080"
     WEAVIATE_API_KEY: str = ""
     
+    # Vector index ingestion
+    INDEX_CHUNK_SIZE: int = 256  # Courses read, embedded and inserted per batch
+    INDEX_MAX_RETRIES: int = 3  # Retries for objects Weaviate rejected
+    INDEX_RETRY_BACKOFF: float = 0.5  # Seconds before the first retry, doubled each time
+    INDEX_VALIDATION_SAMPLES: int = 20  # Courses queried against a rebuilt index before it goes live
+    INDEX_VALIDATION_TOP_K: int = 5  # A sample passes if its own course is in these results
+    INDEX_VALIDATION_MIN_RECALL: float = 0.9  # Share of samples that must pass
+    
+    # Local vector index, searched when Weaviate is unavailable (or always with VECTOR_STORE="local")
+    VECTOR_STORE: str = "auto"  # "auto" (Weaviate when connected, else local), "weaviate" or "local"
+    LOCAL_INDEX_DIR: str = "./data/vector_index"  # Empty disables the local index
+    
+    VECTOR_EXCLUSION_MAX_FETCH: int = 400  # Cap on objects fetched when exclusions are filtered client-side
+    
+    # Background jobs
+    JOB_WORKERS: int = 1  # Threads running reindex/migration jobs
+    JOB_HEARTBEAT_INTERVAL: float = 10.0  # Seconds between updated_at refreshes of this process's jobs
+    JOB_STALE_AFTER: float = 60.0  # Jobs not refreshed for this long are treated as abandoned
+    
     # Ollama Settings
     OLLAMA_URL: str = "http://localhost:11434"
     OLLAMA_MODEL: str = "llama3.2:1b"
@@ -26,10 +61,27 @@ class Settings:
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     
     # Embedding Model
-    EMBEDDING_MODEL: str = "all-MiniLM-L6-v2"
+    EMBEDDING_MODEL: str = "all-MiniLM-L6-v2"  # Or "onnx:./data/models/all-MiniLM-L6-v2-int8" (export_onnx_model.py)
+    EMBEDDING_ONNX_THREADS: int = 0  # ONNX Runtime intra-op threads; 0 lets it decide
+    EMBEDDING_SHARED_WEIGHTS_DIR: str = ""  # e.g. "./data/models/shared" so all workers map one copy of the PyTorch weights
+    EMBEDDING_LOAD_RETRY_SECONDS: float = 5.0  # First retry after the model fails to load; doubles each time
+    EMBEDDING_LOAD_RETRY_MAX_SECONDS: float = 300.0
+    EMBEDDING_CACHE_SIZE: int = 10000  # In-memory entries
+    EMBEDDING_CACHE_DIR: str = ""  # e.g. "./data/embedding_cache" to persist embeddings on disk
+    EMBEDDING_BATCH_MAX_SIZE: int = 32  # Texts per encode call
+    EMBEDDING_BATCH_MAX_WAIT_MS: float = 5.0  # How long a request waits for others to batch with
     
     # Recommendation Settings
     MAX_RECOMMENDATIONS: int = 10
     MIN_SIMILARITY_SCORE: float = 0.3
+    RECOMMENDATION_CACHE_TTL: float = 300.0  # Seconds
+    RECOMMENDATION_CACHE_MAX_ENTRIES: int = 1024
+    RECOMMENDATION_CACHE_MAX_BYTES: int = 32 * 1024 * 1024  # 32 MB
+    USER_CONTEXT_CACHE_TTL: float = 300.0  # Seconds; writes invalidate contexts immediately
+    USER_CONTEXT_CACHE_MAX_ENTRIES: int = 4096
+    QUERY_PARSE_CACHE_SIZE: int = 2048  # Parsed search queries kept in memory
+    CANDIDATE_THREADS: int = 4  # Thread pool for blocking candidate generation work
+    VECTOR_SOURCE_TIMEOUT: float = 3.0  # Seconds before vector candidates are skipped
+    CONTENT_SOURCE_TIMEOUT: float = 2.0  # Seconds before content-based candidates are skipped
 
 settings = Settings() 
\ No newline at end of file
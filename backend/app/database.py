@@ -1,9 +1,19 @@
+import asyncio
 import sqlite3
 import os
+import queue
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from functools import partial
 from pathlib import Path
-from typing import Optional
+from typing import Optional, Dict, Any, Callable, List, Tuple, Union
 import logging
 
+from .config import settings
+
 logger = logging.getLogger(__name__)
 
 DB_PATH = Path("data/app.db")
@@ -15,9 +25,223 @@ def get_db_connection():
     conn.row_factory = sqlite3.Row  # Enable dict-like access
     return conn
 
+# Statements that may run on a read-only connection
+READ_STATEMENTS = ("SELECT", "EXPLAIN")
+
+def apply_pragmas(conn: sqlite3.Connection, pragmas: Dict[str, Any], read_only: bool = False):
+    """Apply a pragma profile to a connection"""
+    for name, value in pragmas.items():
+        # journal_mode is persisted in the file; only writers should change it
+        if read_only and name == "journal_mode":
+            continue
+        conn.execute(f"PRAGMA {name} = {value}")
+    if read_only:
+        conn.execute("PRAGMA query_only = ON")
+
+class ConnectionPool:
+    """Bounded pool of SQLite connections checked out per thread.
+
+    A thread keeps the same connection for nested checkouts, so helpers that
+    call execute_query inside a `connection()` block share one handle. Idle
+    connections are pinged before reuse and replaced if they went bad.
+    Read-only pools set `query_only` so they can never take the write lock.
+    """
+
+    def __init__(
+        self,
+        db_path: Path,
+        max_size: int = 5,
+        timeout: float = 30.0,
+        health_check_interval: float = 60.0,
+        pragmas: Optional[Dict[str, Any]] = None,
+        read_only: bool = False
+    ):
+        self.db_path = Path(db_path)
+        self.max_size = max_size
+        self.timeout = timeout
+        self.health_check_interval = health_check_interval
+        self.pragmas = pragmas or {}
+        self.read_only = read_only
+        self._idle: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(max_size)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._last_used: Dict[int, float] = {}
+        self._created = 0
+        self._closed = False
+        self._stats = {"checkouts": 0, "connects": 0, "health_failures": 0}
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open a new connection to the pool's database"""
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(self.db_path, timeout=self.timeout, check_same_thread=False)
+        conn.row_factory = sqlite3.Row  # Enable dict-like access
+        apply_pragmas(conn, self.pragmas, read_only=self.read_only)
+        with self._lock:
+            self._created += 1
+            self._stats["connects"] += 1
+        return conn
+
+    def _discard(self, conn: sqlite3.Connection) -> None:
+        """Close a connection and forget about it"""
+        with self._lock:
+            self._created -= 1
+            self._last_used.pop(id(conn), None)
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def _is_healthy(self, conn: sqlite3.Connection) -> bool:
+        """Ping connections that sat idle longer than the health check interval"""
+        last_used = self._last_used.get(id(conn), 0.0)
+        if time.monotonic() - last_used < self.health_check_interval:
+            return True
+        try:
+            conn.execute("SELECT 1").fetchone()
+            return True
+        except sqlite3.Error as e:
+            logger.warning(f"Discarding unhealthy database connection: {e}")
+            with self._lock:
+                self._stats["health_failures"] += 1
+            return False
+
+    def _acquire(self) -> sqlite3.Connection:
+        """Take an idle connection or open a new one, blocking when the pool is exhausted"""
+        if self._closed:
+            raise RuntimeError("Connection pool is closed")
+        if not self._slots.acquire(timeout=self.timeout):
+            raise TimeoutError(f"Timed out waiting {self.timeout}s for a database connection")
+        try:
+            while True:
+                try:
+                    conn = self._idle.get_nowait()
+                except queue.Empty:
+                    return self._connect()
+                if self._is_healthy(conn):
+                    return conn
+                self._discard(conn)
+        except Exception:
+            self._slots.release()
+            raise
+
+    def _release(self, conn: sqlite3.Connection) -> None:
+        """Return a connection to the idle set"""
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+        except sqlite3.Error:
+            self._discard(conn)
+        else:
+            if self._closed:
+                self._discard(conn)
+            else:
+                self._last_used[id(conn)] = time.monotonic()
+                self._idle.put(conn)
+        finally:
+            self._slots.release()
+
+    @contextmanager
+    def connection(self):
+        """Check out a connection for the current thread"""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            # Nested checkout on the same thread reuses the outer connection
+            yield conn
+            return
+
+        conn = self._acquire()
+        with self._lock:
+            self._stats["checkouts"] += 1
+        self._local.conn = conn
+        try:
+            yield conn
+        finally:
+            self._local.conn = None
+            self._release(conn)
+
+    def close_all(self) -> None:
+        """Close idle connections and stop handing out new ones"""
+        self._closed = True
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._discard(conn)
+
+    def reopen(self) -> None:
+        """Hand out connections again after close_all (a new app lifespan in the same process)"""
+        self._closed = False
+
+    def stats(self) -> Dict[str, Any]:
+        """Pool counters for health endpoints and benchmarks"""
+        with self._lock:
+            return {
+                **self._stats,
+                "open": self._created,
+                "idle": self._idle.qsize(),
+                "max_size": self.max_size,
+                "read_only": self.read_only
+            }
+
+# Readers never block on the writer under WAL; a single writer connection
+# serializes writes in-process instead of contending for SQLite's lock.
+read_pool = ConnectionPool(
+    DB_PATH,
+    max_size=settings.DB_POOL_SIZE,
+    timeout=settings.DB_POOL_TIMEOUT,
+    health_check_interval=settings.DB_POOL_HEALTH_CHECK_INTERVAL,
+    pragmas=settings.DB_PRAGMAS,
+    read_only=True
+)
+write_pool = ConnectionPool(
+    DB_PATH,
+    max_size=1,
+    timeout=settings.DB_POOL_TIMEOUT,
+    health_check_interval=settings.DB_POOL_HEALTH_CHECK_INTERVAL,
+    pragmas=settings.DB_PRAGMAS
+)
+
+# Dedicated threads that run SQLite work for async callers. One thread per
+# reader slot plus one for the writer, so every worker can hold a connection.
+# Created on first use and dropped by close_pools, so a later app lifespan
+# in the same process (a reused TestClient, a reload) gets a fresh one.
+_db_executor: Optional[ThreadPoolExecutor] = None
+_db_executor_lock = threading.Lock()
+
+def get_db_executor() -> ThreadPoolExecutor:
+    global _db_executor
+    with _db_executor_lock:
+        if _db_executor is None:
+            _db_executor = ThreadPoolExecutor(max_workers=settings.DB_POOL_SIZE + 1, thread_name_prefix="sqlite")
+        return _db_executor
+
+def close_pools():
+    """Stop the DB threads and close all pooled connections (called on shutdown)"""
+    global _db_executor
+    with _db_executor_lock:
+        executor, _db_executor = _db_executor, None
+    if executor is not None:
+        executor.shutdown(wait=True)
+    read_pool.close_all()
+    write_pool.close_all()
+
+def is_read_query(query: str) -> bool:
+    """Whether a statement can be served by the read-only pool"""
+    words = query.lstrip().split(None, 1)
+    return bool(words) and words[0].upper() in READ_STATEMENTS
+
 def init_db():
-    """Initialize the database with required tables"""
-    conn = get_db_connection()
+    """Initialize the database with required tables and apply pending migrations"""
+    read_pool.reopen()
+    write_pool.reopen()
+    with write_pool.connection() as conn:
+        _create_tables(conn)
+        run_migrations(conn)
+
+def _create_tables(conn: sqlite3.Connection):
+    """Create all tables on the given connection"""
     try:
         # Users table
         conn.execute("""
@@ -89,26 +313,355 @@ def init_db():
         logger.error(f"Error initializing database: {e}")
         conn.rollback()
         raise
-    finally:
-        conn.close()
 
-def execute_query(query: str, params: tuple = (), fetch_one: bool = False):
-    """Execute a query and return results"""
-    conn = get_db_connection()
-    try:
-        cursor = conn.execute(query, params)
-        if fetch_one:
-            result = cursor.fetchone()
-        else:
-            result = cursor.fetchall()
-        conn.commit()
-        return result
-    except Exception as e:
-        logger.error(f"Database query error: {e}")
-        conn.rollback()
-        raise
-    finally:
-        conn.close()
+def _add_excluded_topics_column(conn: sqlite3.Connection):
+    """Older databases were created before excluded_topics existed"""
+    columns = [row[1] for row in conn.execute("PRAGMA table_info(user_preferences)")]
+    if "excluded_topics" not in columns:
+        conn.execute("ALTER TABLE user_preferences ADD COLUMN excluded_topics TEXT DEFAULT '[]'")
+
+# Tables whose rows feed a user's recommendation context
+USER_DATA_TABLES = ["user_feedback", "user_preferences", "course_interactions"]
+
+BUMP_USER_VERSION_SQL = """
+    INSERT INTO user_versions (user_id, version) VALUES ({user}.user_id, 1)
+    ON CONFLICT(user_id) DO UPDATE SET version = version + 1;
+"""
+
+def _add_user_versions(conn: sqlite3.Connection):
+    """Per-user data version, bumped by triggers in the same transaction as every write.
+
+    Caches key on it, so a write made through any worker process makes every
+    other process's cached results for that user stale.
+    """
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS user_versions (
+            user_id INTEGER PRIMARY KEY,
+            version INTEGER NOT NULL DEFAULT 0
+        )
+    """)
+    for table in USER_DATA_TABLES:
+        conn.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS {table}_version_after_insert AFTER INSERT ON {table} BEGIN
+                {BUMP_USER_VERSION_SQL.format(user="new")}
+            END
+        """)
+        conn.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS {table}_version_after_update AFTER UPDATE ON {table} BEGIN
+                {BUMP_USER_VERSION_SQL.format(user="old")}
+            END
+        """)
+        conn.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS {table}_version_after_update_user AFTER UPDATE OF user_id ON {table}
+            WHEN new.user_id IS NOT old.user_id BEGIN
+                {BUMP_USER_VERSION_SQL.format(user="new")}
+            END
+        """)
+        conn.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS {table}_version_after_delete AFTER DELETE ON {table} BEGIN
+                {BUMP_USER_VERSION_SQL.format(user="old")}
+            END
+        """)
+
+# Ordered schema migrations: (version, description, SQL statements or a callable)
+MIGRATIONS: List[Tuple[int, str, Union[List[str], Callable[[sqlite3.Connection], None]]]] = [
+    (1, "Add user_preferences.excluded_topics", _add_excluded_topics_column),
+    (2, "Index hot feedback and interaction predicates", [
+        # WHERE user_id = ? ORDER BY created_at DESC
+        "CREATE INDEX IF NOT EXISTS idx_user_feedback_user_created ON user_feedback(user_id, created_at)",
+        "CREATE INDEX IF NOT EXISTS idx_course_interactions_user_created ON course_interactions(user_id, created_at)",
+        # WHERE user_id = ? AND interaction_type IN (...)
+        "CREATE INDEX IF NOT EXISTS idx_course_interactions_user_type ON course_interactions(user_id, interaction_type)",
+        # WHERE user_id = ? AND rating <= 2
+        "CREATE INDEX IF NOT EXISTS idx_user_feedback_user_rating ON user_feedback(user_id, rating)",
+        # Joins and lookups by course
+        "CREATE INDEX IF NOT EXISTS idx_user_feedback_course ON user_feedback(course_id)",
+        "CREATE INDEX IF NOT EXISTS idx_course_interactions_course ON course_interactions(course_id)",
+    ]),
+    (3, "Full-text index over course title, description and topics", [
+        """
+        CREATE VIRTUAL TABLE IF NOT EXISTS courses_fts USING fts5(
+            title, description, topics,
+            content='courses', content_rowid='rowid',
+            tokenize='porter unicode61', prefix='2 3'
+        )
+        """,
+        # INSERT OR REPLACE removes the old row without firing delete triggers,
+        # so drop any existing entry for the id before the insert lands
+        """
+        CREATE TRIGGER IF NOT EXISTS courses_fts_before_insert BEFORE INSERT ON courses BEGIN
+            INSERT INTO courses_fts(courses_fts, rowid, title, description, topics)
+            SELECT 'delete', rowid, title, description, topics FROM courses WHERE id = new.id;
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS courses_fts_after_insert AFTER INSERT ON courses BEGIN
+            INSERT INTO courses_fts(rowid, title, description, topics)
+            VALUES (new.rowid, new.title, new.description, new.topics);
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS courses_fts_after_delete AFTER DELETE ON courses BEGIN
+            INSERT INTO courses_fts(courses_fts, rowid, title, description, topics)
+            VALUES ('delete', old.rowid, old.title, old.description, old.topics);
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS courses_fts_after_update AFTER UPDATE ON courses BEGIN
+            INSERT INTO courses_fts(courses_fts, rowid, title, description, topics)
+            VALUES ('delete', old.rowid, old.title, old.description, old.topics);
+            INSERT INTO courses_fts(rowid, title, description, topics)
+            VALUES (new.rowid, new.title, new.description, new.topics);
+        END
+        """,
+        "INSERT INTO courses_fts(courses_fts) VALUES ('rebuild')",
+    ]),
+    (4, "Normalize course topics into topics and course_topics", [
+        """
+        CREATE TABLE IF NOT EXISTS topics (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name VARCHAR(100) NOT NULL UNIQUE COLLATE NOCASE
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS course_topics (
+            course_id VARCHAR(50) NOT NULL REFERENCES courses(id),
+            topic_id INTEGER NOT NULL REFERENCES topics(id),
+            position INTEGER NOT NULL,
+            PRIMARY KEY (course_id, topic_id)
+        ) WITHOUT ROWID
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_course_topics_topic ON course_topics(topic_id, course_id)",
+        # courses.topics stays the write format (sample_data.py and imports set it),
+        # so triggers project it into the join tables on every write. An outer
+        # INSERT OR REPLACE overrides conflict clauses inside triggers, so these
+        # statements are written to never conflict instead of relying on OR IGNORE.
+        """
+        CREATE TRIGGER IF NOT EXISTS course_topics_after_insert AFTER INSERT ON courses
+        WHEN json_valid(new.topics) BEGIN
+            DELETE FROM course_topics WHERE course_id = new.id;
+            INSERT INTO topics (name)
+            SELECT trim(value) FROM json_each(new.topics)
+            WHERE trim(value) != '' AND NOT EXISTS (SELECT 1 FROM topics WHERE name = trim(value))
+            GROUP BY trim(value) COLLATE NOCASE;
+            INSERT INTO course_topics (course_id, topic_id, position)
+            SELECT new.id, t.id, MIN(j.key) FROM json_each(new.topics) j
+            JOIN topics t ON t.name = trim(j.value)
+            GROUP BY t.id;
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS course_topics_after_update AFTER UPDATE OF id, topics ON courses BEGIN
+            DELETE FROM course_topics WHERE course_id = old.id;
+            INSERT INTO topics (name)
+            SELECT trim(value) FROM json_each(CASE WHEN json_valid(new.topics) THEN new.topics ELSE '[]' END)
+            WHERE trim(value) != '' AND NOT EXISTS (SELECT 1 FROM topics WHERE name = trim(value))
+            GROUP BY trim(value) COLLATE NOCASE;
+            INSERT INTO course_topics (course_id, topic_id, position)
+            SELECT new.id, t.id, MIN(j.key)
+            FROM json_each(CASE WHEN json_valid(new.topics) THEN new.topics ELSE '[]' END) j
+            JOIN topics t ON t.name = trim(j.value)
+            GROUP BY t.id;
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS course_topics_after_delete AFTER DELETE ON courses BEGIN
+            DELETE FROM course_topics WHERE course_id = old.id;
+        END
+        """,
+        # Backfill from the existing JSON column
+        """
+        INSERT OR IGNORE INTO topics (name)
+        SELECT trim(j.value) FROM courses c, json_each(c.topics) j
+        WHERE json_valid(c.topics) AND trim(j.value) != ''
+        ORDER BY c.rowid, j.key
+        """,
+        """
+        INSERT OR IGNORE INTO course_topics (course_id, topic_id, position)
+        SELECT c.id, t.id, j.key FROM courses c, json_each(c.topics) j
+        JOIN topics t ON t.name = trim(j.value)
+        WHERE json_valid(c.topics)
+        """,
+    ]),
+    (5, "Index courses for keyset pagination by rating", [
+        "CREATE INDEX IF NOT EXISTS idx_courses_rating_id ON courses(rating, id)",
+    ]),
+    (6, "Log course changes for incremental catalog refresh", [
+        """
+        CREATE TABLE IF NOT EXISTS course_changes (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            course_id VARCHAR(50) NOT NULL,
+            changed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS course_changes_after_insert AFTER INSERT ON courses BEGIN
+            INSERT INTO course_changes (course_id) VALUES (new.id);
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS course_changes_after_update AFTER UPDATE ON courses BEGIN
+            INSERT INTO course_changes (course_id) VALUES (old.id);
+            INSERT INTO course_changes (course_id) SELECT new.id WHERE new.id != old.id;
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS course_changes_after_delete AFTER DELETE ON courses BEGIN
+            INSERT INTO course_changes (course_id) VALUES (old.id);
+        END
+        """,
+    ]),
+    (7, "Track background jobs", [
+        """
+        CREATE TABLE IF NOT EXISTS jobs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            kind VARCHAR(50) NOT NULL,
+            status VARCHAR(20) NOT NULL DEFAULT 'queued',
+            progress_done INTEGER DEFAULT 0,
+            progress_total INTEGER,
+            result TEXT,
+            error TEXT,
+            cancel_requested INTEGER DEFAULT 0,
+            created_at REAL NOT NULL,
+            started_at REAL,
+            updated_at REAL,
+            finished_at REAL
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_jobs_kind_status ON jobs(kind, status)",
+    ]),
+    (8, "Record which process owns each job", [
+        "ALTER TABLE jobs ADD COLUMN owner VARCHAR(255)",
+    ]),
+    (9, "Version each user's feedback, preferences and interactions", _add_user_versions),
+]
+
+# Subquery matching courses tagged with a topic (exact, case-insensitive)
+COURSE_HAS_TOPIC_SQL = """
+    {id_column} IN (
+        SELECT ct.course_id FROM course_topics ct
+        JOIN topics t ON t.id = ct.topic_id
+        WHERE t.name = ?
+    )
+"""
+
+def course_has_topic_condition(id_column: str = "id") -> str:
+    """SQL condition (one `?` parameter) for courses tagged with a topic"""
+    return COURSE_HAS_TOPIC_SQL.format(id_column=id_column).strip()
+
+def get_course_topics(course_ids: List[str]) -> Dict[str, List[str]]:
+    """Load topics for many courses in one indexed query per chunk, in tag order"""
+    topics: Dict[str, List[str]] = {course_id: [] for course_id in course_ids}
+    ids = list(topics)
+    # Stay well below SQLite's host-parameter limit
+    for start in range(0, len(ids), 900):
+        chunk = ids[start:start + 900]
+        placeholders = ",".join("?" * len(chunk))
+        rows = execute_query(f"""
+            SELECT ct.course_id, t.name FROM course_topics ct
+            JOIN topics t ON t.id = ct.topic_id
+            WHERE ct.course_id IN ({placeholders})
+            ORDER BY ct.course_id, ct.position
+        """, tuple(chunk))
+        for course_id, name in rows:
+            topics[course_id].append(name)
+    return topics
+
+def build_fts_query(text: str) -> str:
+    """Turn free text into an FTS5 MATCH expression of prefix terms (all must match)"""
+    terms = re.findall(r"\w+", text.lower())
+    return " ".join(f'"{term}"*' for term in terms)
+
+def get_schema_version(conn: sqlite3.Connection) -> int:
+    """Return the highest applied migration version (0 for a fresh database)"""
+    row = conn.execute("SELECT MAX(version) FROM schema_version").fetchone()
+    return row[0] or 0
+
+def run_migrations(conn: sqlite3.Connection):
+    """Apply migrations newer than the recorded schema version, each in its own transaction"""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY,
+            description TEXT,
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    current = get_schema_version(conn)
+    for version, description, migration in MIGRATIONS:
+        if version <= current:
+            continue
+        try:
+            conn.execute("BEGIN")
+            if callable(migration):
+                migration(conn)
+            else:
+                for statement in migration:
+                    conn.execute(statement)
+            conn.execute(
+                "INSERT INTO schema_version (version, description) VALUES (?, ?)",
+                (version, description)
+            )
+            conn.commit()
+            logger.info(f"Applied migration {version}: {description}")
+        except Exception as e:
+            logger.error(f"Migration {version} failed: {e}")
+            conn.rollback()
+            raise
+
+def execute_query(
+    query: str,
+    params: tuple = (),
+    fetch_one: bool = False,
+    read_only: Optional[bool] = None
+):
+    """Execute a query on a pooled connection and return results.
+
+    SELECTs go to the read-only pool and everything else to the writer,
+    unless `read_only` is given explicitly.
+    """
+    if read_only is None:
+        read_only = is_read_query(query)
+    pool = read_pool if read_only else write_pool
+    with pool.connection() as conn:
+        try:
+            cursor = conn.execute(query, params)
+            if fetch_one:
+                result = cursor.fetchone()
+            else:
+                result = cursor.fetchall()
+            conn.commit()
+            return result
+        except Exception as e:
+            logger.error(f"Database query error: {e}")
+            conn.rollback()
+            raise
+
+async def run_in_db_thread(fn: Callable, *args, **kwargs):
+    """Run blocking database code on the DB executor without stalling the event loop"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_db_executor(), partial(fn, *args, **kwargs))
+
+async def execute_query_async(
+    query: str,
+    params: tuple = (),
+    fetch_one: bool = False,
+    read_only: Optional[bool] = None
+):
+    """Async counterpart of execute_query for use from route handlers"""
+    return await run_in_db_thread(execute_query, query, params, fetch_one, read_only)
+
+async def get_course_topics_async(course_ids: List[str]) -> Dict[str, List[str]]:
+    """Async counterpart of get_course_topics"""
+    return await run_in_db_thread(get_course_topics, course_ids)
+
+def get_user_version(user_id: int) -> int:
+    """Current data version of a user (0 before their first write)"""
+    row = execute_query("SELECT version FROM user_versions WHERE user_id = ?", (user_id,), fetch_one=True)
+    return row[0] if row else 0
+
+async def get_user_version_async(user_id: int) -> int:
+    """Async counterpart of get_user_version"""
+    return await run_in_db_thread(get_user_version, user_id)
 
 def get_user_by_id(user_id: int):
     """Get user by ID"""
@@ -116,4 +669,8 @@ def get_user_by_id(user_id: int):
 
 def get_user_by_username(username: str):
     """Get user by username"""
-    return execute_query("SELECT * FROM users WHERE username = ?", (username,), fetch_one=True) 
\ No newline at end of file
+    return execute_query("SELECT * FROM users WHERE username = ?", (username,), fetch_one=True) 
+
+async def get_user_by_username_async(username: str):
+    """Get user by username without blocking the event loop"""
+    return await execute_query_async("SELECT * FROM users WHERE username = ?", (username,), fetch_one=True)
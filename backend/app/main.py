@@ -1,4 +1,5 @@
 from fastapi import FastAPI, HTTPException, Depends, status
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from contextlib import asynccontextmanager
@@ -7,17 +8,36 @@ import os
 from pathlib import Path
 
 from .routers import auth, courses, recommendations, feedback
-from .database import init_db
+from .database import init_db, close_pools
 from .config import settings
+from .services.course_catalog import course_catalog
+from .services.jobs import job_runner, JobAlreadyRunning
+from .services.weaviate_service import weaviate_service
+
+def bootstrap_local_index():
+    """With no Weaviate and no local index yet, build one in the background"""
+    if (weaviate_service.vector_store is weaviate_service.local_store and weaviate_service.local_store.enabled
+            and weaviate_service.embedding_model and not weaviate_service.local_store.available()):
+        try:
+            job_runner.submit("reindex", weaviate_service.reindex)
+        except JobAlreadyRunning:
+            pass
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
     print("Starting AI Course Recommender API...")
     init_db()
+    job_runner.recover()
+    course_catalog.load()
+    # The embedding model takes seconds to load; serve basic recommendations
+    # until it is ready instead of holding up startup
+    weaviate_service.start(on_ready=bootstrap_local_index)
     yield
     # Shutdown
     print("Shutting down AI Course Recommender API...")
+    job_runner.shutdown()
+    close_pools()
 
 app = FastAPI(
     title="AI Course Recommender", 
@@ -50,4 +70,13 @@ async def root():
 
 @app.get("/health")
 async def health_check():
-    return {"status": "healthy", "service": "ai-course-recommender"} 
\ No newline at end of file
+    return {"status": "healthy", "service": "ai-course-recommender"}
+
+@app.get("/ready")
+async def readiness_check():
+    """Vector search readiness: 503 until the embedding model has loaded (retried with backoff if it fails)"""
+    readiness = dict(weaviate_service.readiness)
+    return JSONResponse(
+        status_code=status.HTTP_200_OK if weaviate_service.is_ready() else status.HTTP_503_SERVICE_UNAVAILABLE,
+        content=readiness
+    ) 
\ No newline at end of file
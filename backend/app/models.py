@@ -35,6 +35,7 @@ class CourseResponse(BaseModel):
     format: str
     rating: float
     similarity_score: Optional[float] = None
+    snippet: Optional[str] = None  # Highlighted description excerpt from text search
 
 # Feedback Models
 class FeedbackCreate(BaseModel):
@@ -6,7 +6,7 @@ import hashlib
 import logging
 
 from ..models import UserCreate, UserResponse, Token
-from ..database import execute_query, get_user_by_username
+from ..database import execute_query_async, get_user_by_username_async
 from ..config import settings
 
 router = APIRouter()
@@ -36,7 +36,7 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
                 detail="Could not validate credentials",
                 headers={"WWW-Authenticate": "Bearer"},
             )
-        user = get_user_by_username(username)
+        user = await get_user_by_username_async(username)
         if user is None:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
@@ -56,7 +56,7 @@ async def register_user(user_data: UserCreate):
     """Register a new user"""
     try:
         # Check if user already exists
-        existing_user = get_user_by_username(user_data.username)
+        existing_user = await get_user_by_username_async(user_data.username)
         if existing_user:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
@@ -65,7 +65,7 @@ async def register_user(user_data: UserCreate):
         
         # Insert new user
         query = "INSERT INTO users (username, email) VALUES (?, ?) RETURNING id, username, email, created_at"
-        result = execute_query(query, (user_data.username, user_data.email), fetch_one=True)
+        result = await execute_query_async(query, (user_data.username, user_data.email), fetch_one=True)
         
         if result:
             return UserResponse(
@@ -93,7 +93,7 @@ async def register_user(user_data: UserCreate):
 async def login(username: str):
     """Simple login (just username for demo - add password in production)"""
     try:
-        user = get_user_by_username(username)
+        user = await get_user_by_username_async(username)
         if not user:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
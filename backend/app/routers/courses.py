@@ -1,5 +1,6 @@
 from fastapi import APIRouter, HTTPException, Depends, status, Query
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple
+import base64
 import json
 import logging
 
@@ -7,23 +8,79 @@ from ..models import (
     Course, CourseResponse, CourseSearchRequest, CourseFilters,
     InteractionCreate, InteractionResponse
 )
-from ..database import execute_query
+from ..database import (
+    execute_query_async, build_fts_query, course_has_topic_condition, get_course_topics_async
+)
 from ..routers.auth import get_current_user
+from ..services.course_catalog import course_catalog
+from ..services.cache import LRUCache, invalidate_user
+from ..config import settings
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
+# Cursor pagination sort orders: ORDER BY clause and the columns encoded in the cursor
+CURSOR_SORTS = {
+    "rating": ("rating DESC, id DESC", ("rating", "id")),
+    "id": ("id DESC", ("id",)),
+}
+COUNT_MODES = ("exact", "cached", "none")
+
+# Filtered COUNT(*) results for count=cached, keyed by (difficulty, topics)
+_count_cache = LRUCache(
+    max_entries=settings.COURSE_COUNT_CACHE_MAX_ENTRIES, ttl=settings.COURSE_COUNT_CACHE_TTL, name="course_counts"
+)
+
+def _encode_cursor(sort: str, values: List[Any]) -> str:
+    """Opaque cursor pointing just past the given sort key"""
+    payload = json.dumps({"s": sort, "k": values}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+def _decode_cursor(cursor: str, sort: str) -> List[Any]:
+    """Return the sort key from a cursor, or raise 400 if it is malformed"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if payload["s"] != sort or len(payload["k"]) != len(CURSOR_SORTS[sort][1]):
+            raise ValueError("cursor does not match sort order")
+        return payload["k"]
+    except Exception:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid pagination cursor"
+        )
+
+async def _count_courses(where_clause: str, params: List[Any], cache_key: Tuple[Any, ...], mode: str) -> Optional[int]:
+    """Total matching courses; count=cached reuses a recent result for the same filters"""
+    if mode == "none":
+        return None
+    if mode == "cached":
+        total = _count_cache.get(cache_key)
+        if total is not None:
+            return total
+    total = (await execute_query_async("SELECT COUNT(*) FROM courses" + where_clause, tuple(params), fetch_one=True))[0]
+    _count_cache.set(cache_key, total)
+    return total
+
 @router.get("/", response_model=Dict[str, Any])
 async def get_courses(
     limit: int = Query(20, ge=1, le=100),
     offset: int = Query(0, ge=0),
     difficulty: Optional[str] = Query(None),
-    topics: Optional[str] = Query(None)  # Comma-separated topics
+    topics: Optional[str] = Query(None),  # Comma-separated topics
+    pagination: str = Query("offset"),  # "offset" or "cursor"
+    cursor: Optional[str] = Query(None),  # next_cursor from the previous cursor page
+    sort: str = Query("rating"),  # Cursor mode order: "rating" or "id"
+    count: str = Query("exact")  # "exact", "cached" or "none"
 ):
     """Get all courses with optional filtering and pagination metadata"""
     try:
-        # Build base query for counting
-        count_query = "SELECT COUNT(*) FROM courses"
+        if pagination not in ("offset", "cursor") or sort not in CURSOR_SORTS or count not in COUNT_MODES:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid pagination, sort or count mode"
+            )
+
         query = "SELECT id, title, description, topics, difficulty, duration, format, rating FROM courses"
         params = []
         conditions = []
@@ -32,37 +89,69 @@ async def get_courses(
             conditions.append("difficulty = ?")
             params.append(difficulty)
             
+        topic_list: List[str] = []
         if topics:
-            topic_list = [topic.strip() for topic in topics.split(",")]
+            topic_list = [topic.strip() for topic in topics.split(",") if topic.strip()]
             for topic in topic_list:
-                conditions.append("topics LIKE ?")
-                params.append(f"%{topic}%")
+                conditions.append(course_has_topic_condition())
+                params.append(topic)
         
-        if conditions:
-            where_clause = " WHERE " + " AND ".join(conditions)
-            count_query += where_clause
+        where_clause = " WHERE " + " AND ".join(conditions) if conditions else ""
+        cache_key = (difficulty, tuple(sorted(t.lower() for t in topic_list)))
+        total_count = await _count_courses(where_clause, params, cache_key, count)
+
+        if pagination == "cursor":
+            # Keyset pagination: seek past the last key instead of skipping rows
+            order_by, key_columns = CURSOR_SORTS[sort]
+            page_conditions = list(conditions)
+            page_params = list(params)
+            if cursor:
+                key = _decode_cursor(cursor, sort)
+                page_conditions.append(f"({', '.join(key_columns)}) < ({', '.join('?' * len(key))})")
+                page_params.extend(key)
+            if page_conditions:
+                query += " WHERE " + " AND ".join(page_conditions)
+            query += f" ORDER BY {order_by} LIMIT ?"
+            page_params.append(limit + 1)
+            courses = await execute_query_async(query, tuple(page_params))
+            has_more = len(courses) > limit
+            courses = courses[:limit]
+        else:
             query += where_clause
-            
-        # Get total count
-        total_count = execute_query(count_query, tuple(params), fetch_one=True)[0]
-        
-        # Get paginated results
-        query += f" LIMIT {limit} OFFSET {offset}"
-        courses = execute_query(query, tuple(params))
+            query += f" LIMIT {limit} OFFSET {offset}"
+            courses = await execute_query_async(query, tuple(params))
+
+        course_topics = await get_course_topics_async([course[0] for course in courses])
         
         course_list = []
         for course in courses:
-            topics_list = json.loads(course[3]) if course[3] else []
             course_list.append(CourseResponse(
                 id=course[0],
                 title=course[1],
                 description=course[2],
-                topics=topics_list,
+                topics=course_topics[course[0]],
                 difficulty=course[4],
                 duration=course[5],
                 format=course[6],
                 rating=course[7]
             ))
+
+        if pagination == "cursor":
+            next_cursor = None
+            if has_more and courses:
+                last = dict(courses[-1])
+                next_cursor = _encode_cursor(sort, [last[column] for column in CURSOR_SORTS[sort][1]])
+            return {
+                "courses": course_list,
+                "pagination": {
+                    "mode": "cursor",
+                    "limit": limit,
+                    "sort": sort,
+                    "next_cursor": next_cursor,
+                    "has_more": has_more,
+                    "total": total_count
+                }
+            }
         
         return {
             "courses": course_list,
@@ -71,10 +160,12 @@ async def get_courses(
                 "page": (offset // limit) + 1,
                 "limit": limit,
                 "offset": offset,
-                "total_pages": (total_count + limit - 1) // limit
+                "total_pages": (total_count + limit - 1) // limit if total_count is not None else None
             }
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error fetching courses: {e}")
         raise HTTPException(
@@ -86,8 +177,8 @@ async def get_courses(
 async def get_course(course_id: str):
     """Get a specific course by ID"""
     try:
-        query = "SELECT id, title, description, topics, difficulty, duration, format, rating FROM courses WHERE id = ?"
-        course = execute_query(query, (course_id,), fetch_one=True)
+        catalog = await course_catalog.snapshot_async()
+        course = catalog.get(course_id)
         
         if not course:
             raise HTTPException(
@@ -95,18 +186,7 @@ async def get_course(course_id: str):
                 detail="Course not found"
             )
         
-        topics_list = json.loads(course[3]) if course[3] else []
-        
-        return CourseResponse(
-            id=course[0],
-            title=course[1],
-            description=course[2],
-            topics=topics_list,
-            difficulty=course[4],
-            duration=course[5],
-            format=course[6],
-            rating=course[7]
-        )
+        return CourseResponse(**course)
         
     except HTTPException:
         raise
@@ -119,54 +199,66 @@ async def get_course(course_id: str):
 
 @router.post("/search", response_model=List[CourseResponse])
 async def search_courses(search_request: CourseSearchRequest):
-    """Search courses with text query and filters"""
+    """Search courses with BM25-ranked full-text matching and filters"""
     try:
+        match_query = build_fts_query(search_request.query)
+        if not match_query:
+            return []
+
+        # Column weights: title matches count most, then topics, then description
         query = """
-            SELECT id, title, description, topics, difficulty, duration, format, rating 
-            FROM courses 
-            WHERE title LIKE ? OR description LIKE ?
+            SELECT c.id, c.title, c.description, c.difficulty, c.duration, c.format, c.rating,
+                   bm25(courses_fts, 10.0, 2.0, 5.0) AS rank,
+                   snippet(courses_fts, 1, '<mark>', '</mark>', '...', 16) AS snippet
+            FROM courses_fts
+            JOIN courses c ON c.rowid = courses_fts.rowid
+            WHERE courses_fts MATCH ?
         """
-        params = [f"%{search_request.query}%", f"%{search_request.query}%"]
+        params = [match_query]
         conditions = []
         
         if search_request.filters:
             if search_request.filters.topics:
                 for topic in search_request.filters.topics:
-                    conditions.append("topics LIKE ?")
-                    params.append(f"%{topic}%")
+                    conditions.append(course_has_topic_condition("c.id"))
+                    params.append(topic)
             
             if search_request.filters.difficulty:
-                conditions.append("difficulty = ?")
+                conditions.append("c.difficulty = ?")
                 params.append(search_request.filters.difficulty)
                 
             if search_request.filters.format:
-                conditions.append("format = ?")
+                conditions.append("c.format = ?")
                 params.append(search_request.filters.format)
                 
             if search_request.filters.min_rating:
-                conditions.append("rating >= ?")
+                conditions.append("c.rating >= ?")
                 params.append(search_request.filters.min_rating)
         
         if conditions:
             query += " AND " + " AND ".join(conditions)
             
-        query += f" LIMIT {search_request.limit}"
+        query += " ORDER BY rank LIMIT ?"
+        params.append(search_request.limit)
         
-        courses = execute_query(query, tuple(params))
+        courses = await execute_query_async(query, tuple(params))
+        course_topics = await get_course_topics_async([course[0] for course in courses])
         
         course_list = []
         for course in courses:
-            topics_list = json.loads(course[3]) if course[3] else []
+            # bm25() is negative with lower meaning better; map it onto (0, 1)
+            relevance = -course[7]
             course_list.append(CourseResponse(
                 id=course[0],
                 title=course[1],
                 description=course[2],
-                topics=topics_list,
-                difficulty=course[4],
-                duration=course[5],
-                format=course[6],
-                rating=course[7],
-                similarity_score=0.8  # Placeholder for text similarity
+                topics=course_topics[course[0]],
+                difficulty=course[3],
+                duration=course[4],
+                format=course[5],
+                rating=course[6],
+                similarity_score=round(relevance / (1.0 + relevance), 3),
+                snippet=course[8]
             ))
         
         return course_list
@@ -191,13 +283,14 @@ async def log_interaction(
             VALUES (?, ?, ?) 
             RETURNING id, user_id, course_id, interaction_type, created_at
         """
-        result = execute_query(
+        result = await execute_query_async(
             query, 
             (current_user["id"], course_id, interaction.interaction_type.value), 
             fetch_one=True
         )
         
         if result:
+            invalidate_user(current_user["id"])
             return InteractionResponse(
                 id=result[0],
                 user_id=result[1],
@@ -233,7 +326,7 @@ async def get_course_interactions(
             WHERE user_id = ? AND course_id = ?
             ORDER BY created_at DESC
         """
-        interactions = execute_query(query, (current_user["id"], course_id))
+        interactions = await execute_query_async(query, (current_user["id"], course_id))
         
         interaction_list = []
         for interaction in interactions:
@@ -7,8 +7,9 @@ from datetime import datetime
 from ..models import (
     FeedbackCreate, FeedbackResponse, UserPreferences, UserPreferencesUpdate
 )
-from ..database import execute_query
+from ..database import execute_query_async, get_course_topics_async
 from ..routers.auth import get_current_user
+from ..services.cache import invalidate_user
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
@@ -27,7 +28,7 @@ async def submit_feedback(
             RETURNING id, user_id, course_id, rating, feedback_text, learning_style, difficulty_preference, pace_preference, created_at
         """
         
-        result = execute_query(
+        result = await execute_query_async(
             query,
             (
                 current_user["id"],
@@ -44,6 +45,7 @@ async def submit_feedback(
         if result:
             # Update user preferences based on new feedback
             await update_user_preferences_from_feedback(current_user["id"], feedback)
+            invalidate_user(current_user["id"])
             
             return FeedbackResponse(
                 id=result[0],
@@ -82,7 +84,7 @@ async def get_user_feedback(current_user: dict = Depends(get_current_user)):
             WHERE user_id = ? 
             ORDER BY created_at DESC
         """
-        feedback_list = execute_query(query, (current_user["id"],))
+        feedback_list = await execute_query_async(query, (current_user["id"],))
         
         result = []
         for feedback in feedback_list:
@@ -121,7 +123,7 @@ async def get_course_feedback(
             WHERE user_id = ? AND course_id = ? 
             ORDER BY created_at DESC
         """
-        feedback_list = execute_query(query, (current_user["id"], course_id))
+        feedback_list = await execute_query_async(query, (current_user["id"], course_id))
         
         result = []
         for feedback in feedback_list:
@@ -155,7 +157,7 @@ async def get_user_preferences(current_user: dict = Depends(get_current_user)):
             FROM user_preferences 
             WHERE user_id = ?
         """
-        preferences = execute_query(query, (current_user["id"],), fetch_one=True)
+        preferences = await execute_query_async(query, (current_user["id"],), fetch_one=True)
         
         if preferences:
             preferred_topics = json.loads(preferences[0]) if preferences[0] else []
@@ -192,7 +194,7 @@ async def update_user_preferences(
     """Update user preferences"""
     try:
         # Get current preferences
-        current_prefs = execute_query(
+        current_prefs = await execute_query_async(
             "SELECT preferred_topics, difficulty_level, learning_style, time_commitment, excluded_topics FROM user_preferences WHERE user_id = ?",
             (current_user["id"],),
             fetch_one=True
@@ -213,7 +215,7 @@ async def update_user_preferences(
                 SET preferred_topics = ?, difficulty_level = ?, learning_style = ?, time_commitment = ?, excluded_topics = ?, last_updated = CURRENT_TIMESTAMP
                 WHERE user_id = ?
             """
-            execute_query(query, (json.dumps(new_topics), new_difficulty, new_learning_style, new_time_commitment, json.dumps(new_excluded_topics), current_user["id"]))
+            await execute_query_async(query, (json.dumps(new_topics), new_difficulty, new_learning_style, new_time_commitment, json.dumps(new_excluded_topics), current_user["id"]))
         else:
             # Insert new preferences
             query = """
@@ -222,7 +224,7 @@ async def update_user_preferences(
             """
             new_topics = preferences.preferred_topics or []
             new_excluded_topics = preferences.excluded_topics or []
-            execute_query(query, (
+            await execute_query_async(query, (
                 current_user["id"],
                 json.dumps(new_topics),
                 preferences.difficulty_level,
@@ -234,6 +236,8 @@ async def update_user_preferences(
             new_learning_style = preferences.learning_style
             new_time_commitment = preferences.time_commitment
         
+        invalidate_user(current_user["id"])
+        
         return UserPreferences(
             preferred_topics=new_topics,
             difficulty_level=new_difficulty,
@@ -253,14 +257,12 @@ async def update_user_preferences_from_feedback(user_id: int, feedback: Feedback
     """Update user preferences based on new feedback"""
     try:
         # Get course topics to update preferred topics
-        course_query = "SELECT topics FROM courses WHERE id = ?"
-        course = execute_query(course_query, (feedback.course_id,), fetch_one=True)
+        course_topics = (await get_course_topics_async([feedback.course_id]))[feedback.course_id]
         
-        if course and course[0]:
-            course_topics = json.loads(course[0])
+        if course_topics:
             
             # Get current preferences
-            current_prefs = execute_query(
+            current_prefs = await execute_query_async(
                 "SELECT preferred_topics FROM user_preferences WHERE user_id = ?",
                 (user_id,),
                 fetch_one=True
@@ -280,12 +282,12 @@ async def update_user_preferences_from_feedback(user_id: int, feedback: Feedback
                 
                 # Update or insert preferences
                 if current_prefs:
-                    execute_query(
+                    await execute_query_async(
                         "UPDATE user_preferences SET preferred_topics = ?, difficulty_level = ?, learning_style = ?, last_updated = CURRENT_TIMESTAMP WHERE user_id = ?",
                         (json.dumps(current_topics), feedback.difficulty_preference, feedback.learning_style, user_id)
                     )
                 else:
-                    execute_query(
+                    await execute_query_async(
                         "INSERT INTO user_preferences (user_id, preferred_topics, difficulty_level, learning_style) VALUES (?, ?, ?, ?)",
                         (user_id, json.dumps(current_topics), feedback.difficulty_preference, feedback.learning_style)
                     )
@@ -305,7 +307,7 @@ async def delete_feedback(
             SELECT id, user_id, course_id FROM user_feedback 
             WHERE id = ? AND user_id = ?
         """
-        feedback = execute_query(check_query, (feedback_id, current_user["id"]), fetch_one=True)
+        feedback = await execute_query_async(check_query, (feedback_id, current_user["id"]), fetch_one=True)
         
         if not feedback:
             raise HTTPException(
@@ -315,7 +317,8 @@ async def delete_feedback(
         
         # Delete the feedback
         delete_query = "DELETE FROM user_feedback WHERE id = ? AND user_id = ?"
-        result = execute_query(delete_query, (feedback_id, current_user["id"]))
+        result = await execute_query_async(delete_query, (feedback_id, current_user["id"]))
+        invalidate_user(current_user["id"])
         
         logger.info(f"User {current_user['id']} deleted feedback {feedback_id} for course {feedback[2]}")
         
@@ -343,7 +346,7 @@ async def update_feedback(
             SELECT id, user_id FROM user_feedback 
             WHERE id = ? AND user_id = ?
         """
-        existing_feedback = execute_query(check_query, (feedback_id, current_user["id"]), fetch_one=True)
+        existing_feedback = await execute_query_async(check_query, (feedback_id, current_user["id"]), fetch_one=True)
         
         if not existing_feedback:
             raise HTTPException(
@@ -359,7 +362,7 @@ async def update_feedback(
             RETURNING id, user_id, course_id, rating, feedback_text, learning_style, difficulty_preference, pace_preference, created_at
         """
         
-        result = execute_query(
+        result = await execute_query_async(
             update_query,
             (
                 feedback.rating,
@@ -376,6 +379,7 @@ async def update_feedback(
         if result:
             # Update user preferences based on updated feedback
             await update_user_preferences_from_feedback(current_user["id"], feedback)
+            invalidate_user(current_user["id"])
             
             logger.info(f"User {current_user['id']} updated feedback {feedback_id}")
             
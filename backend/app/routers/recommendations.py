@@ -2,13 +2,18 @@ from fastapi import APIRouter, HTTPException, Depends, status
 from typing import List, Dict, Any
 import json
 import logging
+from functools import partial
 
 from ..models import RecommendationRequest, RecommendationResponse, CourseResponse
-from ..database import execute_query
+from ..database import execute_query_async, run_in_db_thread
 from ..routers.auth import get_current_user
 from ..services.llm_service import LLMService
 from ..services.recommendation_engine import recommendation_engine
 from ..services.weaviate_service import weaviate_service
+from ..services.user_context import user_context_loader
+from ..services.query_parser import query_parser
+from ..services.course_indexer import REINDEX_MODES
+from ..services.jobs import job_runner, JobAlreadyRunning
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
@@ -178,7 +183,7 @@ async def semantic_course_search(
         if exclude_topics:
             exclude_list = [topic.strip() for topic in exclude_topics.split(",")]
         
-        search_results = weaviate_service.search_similar_courses(
+        search_results = await weaviate_service.search_similar_courses_async(
             query_text=query,
             limit=max_results,
             min_certainty=min_similarity,
@@ -239,7 +244,7 @@ async def get_recommendation_history(
             GROUP BY learning_style, difficulty_preference
             ORDER BY COUNT(*) DESC
         """
-        feedback_stats = execute_query(feedback_query, (user_id,))
+        feedback_stats = await execute_query_async(feedback_query, (user_id,))
         
         # Get interaction summary
         interaction_query = """
@@ -250,33 +255,33 @@ async def get_recommendation_history(
             WHERE user_id = ?
             GROUP BY interaction_type
         """
-        interaction_stats = execute_query(interaction_query, (user_id,))
+        interaction_stats = await execute_query_async(interaction_query, (user_id,))
         
-        # Get preferred topics from recent feedback
+        # Aggregate preferred topics from the 10 most recent positively rated courses
         topics_query = """
-            SELECT c.topics, uf.rating
-            FROM user_feedback uf
-            JOIN courses c ON uf.course_id = c.id
-            WHERE uf.user_id = ? AND uf.rating >= 4
-            ORDER BY uf.created_at DESC
+            SELECT t.name, COUNT(*) AS topic_count
+            FROM (
+                SELECT uf.course_id, uf.created_at
+                FROM user_feedback uf
+                JOIN courses c ON uf.course_id = c.id
+                WHERE uf.user_id = ? AND uf.rating >= 4
+                ORDER BY uf.created_at DESC
+                LIMIT 10
+            ) recent
+            JOIN course_topics ct ON ct.course_id = recent.course_id
+            JOIN topics t ON t.id = ct.topic_id
+            GROUP BY t.id
+            ORDER BY topic_count DESC, MAX(recent.created_at) DESC
             LIMIT 10
         """
-        recent_preferences = execute_query(topics_query, (user_id,))
-        
-        # Aggregate preferred topics
-        topic_counts: Dict[str, int] = {}
-        for pref in recent_preferences:
-            if pref[0]:
-                topics = json.loads(pref[0])
-                for topic in topics:
-                    topic_counts[topic] = topic_counts.get(topic, 0) + 1
+        preferred_topics = await execute_query_async(topics_query, (user_id,))
         
         return {
             "feedback_summary": [dict(stat) for stat in feedback_stats],
             "interaction_summary": [dict(stat) for stat in interaction_stats],
-            "preferred_topics": sorted(topic_counts.items(), key=lambda x: x[1], reverse=True)[:10],
+            "preferred_topics": [(topic[0], topic[1]) for topic in preferred_topics],
             "total_interactions": sum([stat[1] for stat in interaction_stats]),
-            "vector_search_enabled": weaviate_service.client is not None
+            "vector_search_enabled": weaviate_service.vector_search_available()
         }
         
     except Exception as e:
@@ -295,7 +300,11 @@ async def vector_db_health():
         health_status = weaviate_service.health_check()
         return {
             "weaviate": health_status,
-            "recommendation_engine": "vector" if health_status['status'] == 'connected' else "basic"
+            "recommendation_engine": "vector" if weaviate_service.vector_search_available() else "basic",
+            "recommendation_cache": recommendation_engine.cache_stats(),
+            "recommendation_stages": recommendation_engine.stage_stats(),
+            "user_context_cache": user_context_loader.stats(),
+            "query_parser": query_parser.stats()
         }
     except Exception as e:
         logger.error(f"Error checking vector DB health: {e}")
@@ -304,38 +313,41 @@ async def vector_db_health():
             "recommendation_engine": "basic"
         }
 
-@router.post("/admin/vector-db/reindex")
-async def reindex_vector_database():
-    """Reindex all courses in vector database (admin endpoint)"""
+@router.post("/admin/vector-db/reindex", status_code=status.HTTP_202_ACCEPTED)
+async def reindex_vector_database(mode: str = "incremental"):
+    """Start reindexing courses in vector database as a background job (admin endpoint)
+
+    `incremental` re-embeds only new or changed courses and removes deleted
+    ones; `rebuild` builds a fresh collection next to the live one and
+    switches to it once validated; `full` drops the collections and rebuilds
+    them from scratch. The local vector index, if enabled, is synced as well.
+    Poll `/admin/jobs/{job_id}` for progress.
+    """
     try:
-        logger.info("Starting vector database reindexing...")
-        courses = execute_query(
-            "SELECT id, title, description, topics, difficulty, duration, format, rating FROM courses"
-        )
-        weaviate_service.create_schema()
-        successful = 0
-        failed = 0
-        for course in courses:
-            course_data = {
-                'id': course[0],
-                'title': course[1],
-                'description': course[2],
-                'topics': json.loads(course[3]) if course[3] else [],
-                'difficulty': course[4],
-                'duration': course[5],
-                'format': course[6],
-                'rating': course[7]
-            }
-            if weaviate_service.add_course(course_data):
-                successful += 1
-            else:
-                failed += 1
+        if mode not in REINDEX_MODES:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="mode must be 'incremental', 'rebuild' or 'full'"
+            )
+        if not weaviate_service.client and not weaviate_service.local_store.enabled:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Vector database not available"
+            )
+        job_id = job_runner.submit("reindex", partial(weaviate_service.reindex, mode))
+        logger.info(f"Started {mode} vector database reindexing as job {job_id}")
         return {
-            "message": "Vector database reindexing completed",
-            "successful": successful,
-            "failed": failed,
-            "total": len(courses)
+            "message": "Vector database reindexing started",
+            "mode": mode,
+            "job_id": job_id
         }
+    except JobAlreadyRunning as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Reindex job {e.job_id} is already running"
+        )
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error reindexing vector database: {e}")
         raise HTTPException(
@@ -343,63 +355,32 @@ async def reindex_vector_database():
             detail=f"Failed to reindex vector database: {str(e)}"
         )
 
+@router.get("/admin/jobs/{job_id}")
+async def get_job_status(job_id: int):
+    """Status, progress and ETA of a background job (admin endpoint)"""
+    job = await run_in_db_thread(job_runner.get, job_id)
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Job not found"
+        )
+    return job
+
+@router.post("/admin/jobs/{job_id}/cancel")
+async def cancel_job(job_id: int):
+    """Request cancellation of a queued or running job (admin endpoint)"""
+    if not await run_in_db_thread(job_runner.cancel, job_id):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Job not found or already finished"
+        )
+    return {"message": "Cancellation requested", "job_id": job_id}
+
 async def get_user_context(user_id: int) -> Dict[str, Any]:
     """Get comprehensive user context for recommendations"""
     try:
-        prefs_query = """
-            SELECT preferred_topics, difficulty_level, learning_style, time_commitment
-            FROM user_preferences 
-            WHERE user_id = ?
-        """
-        preferences = execute_query(prefs_query, (user_id,), fetch_one=True)
-        
-        feedback_query = """
-            SELECT course_id, rating, feedback_text, learning_style, difficulty_preference
-            FROM user_feedback 
-            WHERE user_id = ?
-            ORDER BY created_at DESC
-            LIMIT 10
-        """
-        recent_feedback = execute_query(feedback_query, (user_id,))
-        
-        interaction_query = """
-            SELECT course_id, interaction_type, created_at
-            FROM course_interactions 
-            WHERE user_id = ?
-            ORDER BY created_at DESC
-            LIMIT 20
-        """
-        recent_interactions = execute_query(interaction_query, (user_id,))
-        
-        context = {
-            "user_id": user_id,
-            "preferences": {
-                "topics": json.loads(preferences[0]) if preferences and preferences[0] else [],
-                "difficulty": preferences[1] if preferences else None,
-                "learning_style": preferences[2] if preferences else None,
-                "time_commitment": preferences[3] if preferences else None
-            } if preferences else {"topics": [], "difficulty": None, "learning_style": None, "time_commitment": None},
-            "recent_feedback": [
-                {
-                    "course_id": f[0],
-                    "rating": f[1],
-                    "feedback_text": f[2],
-                    "learning_style": f[3],
-                    "difficulty_preference": f[4]
-                }
-                for f in recent_feedback
-            ],
-            "recent_interactions": [
-                {
-                    "course_id": i[0],
-                    "interaction_type": i[1],
-                    "created_at": str(i[2])
-                }
-                for i in recent_interactions
-            ],
-            "vector_search_available": weaviate_service.client is not None
-        }
-        return context
+        context = await user_context_loader.get(user_id)
+        return {**context, "vector_search_available": weaviate_service.vector_search_available()}
     except Exception as e:
         logger.error(f"Error building user context: {e}")
         return {
@@ -0,0 +1,206 @@
+import logging
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+def estimate_size(value: Any, _seen: Optional[Set[int]] = None) -> int:
+    """Approximate deep size of a value in bytes"""
+    if _seen is None:
+        _seen = set()
+    if id(value) in _seen:
+        return 0
+    _seen.add(id(value))
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(estimate_size(k, _seen) + estimate_size(v, _seen) for k, v in value.items())
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        size += sum(estimate_size(item, _seen) for item in value)
+    elif hasattr(value, '__dict__'):
+        size += estimate_size(vars(value), _seen)
+    return size
+
+
+class _Entry:
+    __slots__ = ('value', 'expires_at', 'size', 'tags')
+
+    def __init__(self, value: Any, expires_at: float, size: int, tags: frozenset):
+        self.value = value
+        self.expires_at = expires_at
+        self.size = size
+        self.tags = tags
+
+
+class LRUCache:
+    """Thread-safe LRU cache with a TTL and entry/byte bounds.
+
+    Entries can carry tags (e.g. a user ID) so every entry derived from one
+    user's data can be dropped at once with `invalidate_tag`.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        max_bytes: Optional[int] = None,
+        ttl: Optional[float] = 300.0,
+        name: str = "cache",
+        size_fn: Callable[[Any], int] = estimate_size,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.name = name
+        self._size_fn = size_fn
+        self._clock = clock
+        self._entries: "OrderedDict[Hashable, _Entry]" = OrderedDict()
+        self._tags: Dict[Hashable, Set[Hashable]] = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Cached value for `key`, or `default` if missing or expired"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            if entry.expires_at <= self._clock():
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry.value
+
+    def set(self, key: Hashable, value: Any, tags: tuple = (), ttl: Optional[float] = None) -> None:
+        """Store a value, evicting least recently used entries to stay within bounds"""
+        ttl = self.ttl if ttl is None else ttl
+        size = self._size_fn(value) if self.max_bytes is not None else 0
+        if self.max_bytes is not None and size > self.max_bytes:
+            logger.debug(f"{self.name}: value for {key!r} ({size} bytes) exceeds max_bytes, not cached")
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            now = self._clock()
+            expires_at = now + ttl if ttl is not None else float('inf')
+            entry = _Entry(value, expires_at, size, frozenset(tags))
+            self._entries[key] = entry
+            self._bytes += size
+            for tag in entry.tags:
+                self._tags.setdefault(tag, set()).add(key)
+            self._evict(now)
+
+    def delete(self, key: Hashable) -> bool:
+        """Remove one key; returns whether it was present"""
+        with self._lock:
+            if key not in self._entries:
+                return False
+            self._remove(key)
+            self.invalidations += 1
+            return True
+
+    def invalidate_tag(self, tag: Hashable) -> int:
+        """Remove every entry stored with `tag`; returns the number removed"""
+        with self._lock:
+            keys = list(self._tags.get(tag, ()))
+            for key in keys:
+                self._remove(key)
+            self.invalidations += len(keys)
+            return len(keys)
+
+    def clear(self) -> None:
+        """Remove all entries (statistics are kept)"""
+        with self._lock:
+            self.invalidations += len(self._entries)
+            self._entries.clear()
+            self._tags.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Size and hit/miss/eviction counters"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations
+            }
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        entry = self._entries.get(key)
+        return entry is not None and entry.expires_at > self._clock()
+
+    def _remove(self, key: Hashable) -> None:
+        entry = self._entries.pop(key)
+        self._bytes -= entry.size
+        for tag in entry.tags:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+    def _evict(self, now: float) -> None:
+        # Expired entries at the cold end go first, then LRU order until within bounds
+        while self._entries:
+            key, entry = next(iter(self._entries.items()))
+            if entry.expires_at <= now:
+                self._remove(key)
+                self.expirations += 1
+            elif len(self._entries) > self.max_entries or (
+                self.max_bytes is not None and self._bytes > self.max_bytes
+            ):
+                self._remove(key)
+                self.evictions += 1
+            else:
+                break
+
+
+# Per-user invalidation: caches holding user-derived data register a callback
+# here, and every endpoint that writes user data calls invalidate_user(). This
+# only frees memory early in the process that took the write; freshness across
+# worker processes comes from the user_versions counter in SQLite, which
+# those caches include in their keys.
+_user_invalidation_hooks: List[Callable[[int], Any]] = []
+
+def register_user_invalidation_hook(hook: Callable[[int], Any]) -> Callable[[int], Any]:
+    """Call `hook(user_id)` whenever a user's feedback, preferences or interactions change"""
+    _user_invalidation_hooks.append(hook)
+    return hook
+
+def unregister_user_invalidation_hook(hook: Callable[[int], Any]) -> bool:
+    """Stop calling a registered hook; returns whether it was registered"""
+    try:
+        _user_invalidation_hooks.remove(hook)
+        return True
+    except ValueError:
+        return False
+
+def invalidate_user(user_id: int) -> None:
+    """Drop every cached result derived from this user's data"""
+    for hook in _user_invalidation_hooks:
+        try:
+            hook(user_id)
+        except Exception as e:
+            logger.error(f"Error invalidating caches for user {user_id}: {e}")
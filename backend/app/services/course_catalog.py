@@ -0,0 +1,308 @@
+import logging
+import sys
+import threading
+import time
+from typing import List, Dict, Any, Optional, Iterable, Set
+
+import numpy as np
+
+from ..config import settings
+from ..database import execute_query, get_course_topics, run_in_db_thread
+
+logger = logging.getLogger(__name__)
+
+DIFFICULTY_LEVELS = ['beginner', 'intermediate', 'advanced']
+
+COURSE_COLUMNS = "id, title, description, difficulty, duration, format, rating"
+
+
+class CatalogSnapshot:
+    """Immutable columnar view of the course catalog.
+
+    Row `i` describes the course `ids[i]`. Numeric columns are NumPy arrays so
+    scoring and ranking can work on the whole catalog at once; topics are
+    stored as tuples of interned topic IDs into `topic_names`.
+    """
+
+    def __init__(
+        self,
+        ids: List[str],
+        titles: List[str],
+        descriptions: List[str],
+        durations: List[str],
+        formats: List[str],
+        difficulties: List[str],
+        ratings: np.ndarray,
+        topic_ids: List[tuple],
+        topic_names: List[str],
+        active: np.ndarray,
+        version: int
+    ):
+        self.ids = ids
+        self.titles = titles
+        self.descriptions = descriptions
+        self.durations = durations
+        self.formats = formats
+        self.difficulties = difficulties
+        self.ratings = ratings
+        self.topic_ids = topic_ids
+        self.topic_names = topic_names
+        self.active = active
+        self.version = version
+        self.index: Dict[str, int] = {course_id: i for i, course_id in enumerate(ids)}
+        self.difficulty_codes = np.array(
+            [DIFFICULTY_LEVELS.index(d.lower()) if d and d.lower() in DIFFICULTY_LEVELS else -1 for d in difficulties],
+            dtype=np.int8
+        )
+        # Lowercased text for substring matching, mirroring the old LIKE filter
+        self._search_text: Optional[List[str]] = None
+
+    def __len__(self) -> int:
+        return int(self.active.sum())
+
+    def topics(self, row: int) -> List[str]:
+        """Topic names of a row in tag order"""
+        return [self.topic_names[t] for t in self.topic_ids[row]]
+
+    def course_dict(self, row: int) -> Dict[str, Any]:
+        """A fresh course dict in the shape the engine and routers expect"""
+        return {
+            'id': self.ids[row],
+            'title': self.titles[row],
+            'description': self.descriptions[row],
+            'topics': self.topics(row),
+            'difficulty': self.difficulties[row],
+            'duration': self.durations[row],
+            'format': self.formats[row],
+            'rating': float(self.ratings[row])
+        }
+
+    def get(self, course_id: str) -> Optional[Dict[str, Any]]:
+        """Course dict by ID, or None if unknown or deleted"""
+        row = self.index.get(course_id)
+        if row is None or not self.active[row]:
+            return None
+        return self.course_dict(row)
+
+    def get_many(self, course_ids: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """Course dicts for every known ID in `course_ids`"""
+        result: Dict[str, Dict[str, Any]] = {}
+        for course_id in course_ids:
+            course = self.get(course_id)
+            if course:
+                result[course_id] = course
+        return result
+
+    def rows(self, exclude_ids: Optional[Set[str]] = None, text: Optional[str] = None) -> np.ndarray:
+        """Active row indices, optionally minus `exclude_ids` and filtered by a substring"""
+        mask = self.active.copy()
+        if exclude_ids:
+            for course_id in exclude_ids:
+                row = self.index.get(course_id)
+                if row is not None:
+                    mask[row] = False
+        if text:
+            if self._search_text is None:
+                self._search_text = [
+                    f"{title}\n{description}\n{' '.join(self.topics(i))}".lower()
+                    for i, (title, description) in enumerate(zip(self.titles, self.descriptions))
+                ]
+            needle = text.lower()
+            mask &= np.fromiter((needle in haystack for haystack in self._search_text), dtype=bool, count=len(self.ids))
+        return np.flatnonzero(mask)
+
+    def top_rated(self, limit: int) -> List[Dict[str, Any]]:
+        """Highest-rated active courses"""
+        ratings = np.where(self.active, self.ratings, -np.inf)
+        order = np.argsort(-ratings, kind="stable")[:limit]
+        return [self.course_dict(int(row)) for row in order if self.active[row]]
+
+
+class CourseCatalog:
+    """Process-wide, read-mostly snapshot of the courses table.
+
+    The catalog loads every course once, then follows the course_changes log
+    (filled by triggers on courses) to re-read only the rows that changed.
+    Readers take a snapshot and keep using it for the whole request; a refresh
+    builds a new snapshot and swaps it in.
+
+    Every worker process follows the same log, so rows are only pruned once
+    they are `change_retention` seconds old. A catalog that finds rows it
+    never applied already pruned (a gap in seq) reloads in full.
+    """
+
+    def __init__(self, refresh_interval: float = 5.0, change_retention: float = 3600.0):
+        self.refresh_interval = refresh_interval
+        self.change_retention = change_retention
+        self._snapshot: Optional[CatalogSnapshot] = None
+        self._last_change = 0
+        self._last_check = 0.0
+        self._lock = threading.Lock()
+
+    def load(self) -> CatalogSnapshot:
+        """Read the full catalog from SQLite"""
+        with self._lock:
+            last_change = execute_query("SELECT COALESCE(MAX(seq), 0) FROM course_changes", fetch_one=True)[0]
+            rows = execute_query(f"SELECT {COURSE_COLUMNS} FROM courses ORDER BY rowid")
+            topics = get_course_topics([row[0] for row in rows])
+            topic_names: List[str] = []
+            topic_index: Dict[str, int] = {}
+            snapshot = self._build(
+                [dict(row) for row in rows], topics, topic_names, topic_index,
+                version=(self._snapshot.version + 1) if self._snapshot else 1
+            )
+            self._snapshot = snapshot
+            self._last_change = last_change
+            self._last_check = time.monotonic()
+            self._prune_changes()
+            logger.info(f"Loaded course catalog: {len(snapshot)} courses, {len(topic_names)} topics")
+            return snapshot
+
+    def refresh(self) -> CatalogSnapshot:
+        """Apply course changes logged since the last load or refresh"""
+        if self._snapshot is None:
+            return self.load()
+        with self._lock:
+            self._last_check = time.monotonic()
+            changes = execute_query(
+                "SELECT seq, course_id FROM course_changes WHERE seq > ? ORDER BY seq",
+                (self._last_change,)
+            )
+            if not changes:
+                return self._snapshot
+            # seq has no holes (AUTOINCREMENT), so a jump means rows were pruned before we applied them
+            if changes[0][0] == self._last_change + 1:
+                changed_ids = list(dict.fromkeys(change[1] for change in changes))
+                placeholders = ",".join("?" * len(changed_ids))
+                rows = {
+                    row[0]: dict(row)
+                    for row in execute_query(f"SELECT {COURSE_COLUMNS} FROM courses WHERE id IN ({placeholders})", tuple(changed_ids))
+                }
+                topics = get_course_topics(list(rows))
+                self._snapshot = self._apply_changes(self._snapshot, changed_ids, rows, topics)
+                self._last_change = changes[-1][0]
+                self._prune_changes()
+                logger.info(f"Refreshed course catalog: {len(changed_ids)} changed courses")
+                return self._snapshot
+        logger.info("Course changes were pruned before this catalog applied them; reloading")
+        return self.load()
+
+    def _prune_changes(self) -> None:
+        """Delete applied change rows older than change_retention; the newest row
+        is always kept so other catalogs can tell pruned rows from no changes"""
+        execute_query(
+            "DELETE FROM course_changes WHERE seq <= ? AND seq < (SELECT MAX(seq) FROM course_changes) "
+            "AND changed_at < datetime('now', ?)",
+            (self._last_change, f"-{int(self.change_retention)} seconds")
+        )
+
+    def _build(
+        self,
+        rows: List[Dict[str, Any]],
+        topics: Dict[str, List[str]],
+        topic_names: List[str],
+        topic_index: Dict[str, int],
+        version: int
+    ) -> CatalogSnapshot:
+        """Build a snapshot from course rows and their topics"""
+        def intern_topics(names: List[str]) -> tuple:
+            ids = []
+            for name in names:
+                key = name.lower()
+                if key not in topic_index:
+                    topic_index[key] = len(topic_names)
+                    topic_names.append(sys.intern(name))
+                ids.append(topic_index[key])
+            return tuple(ids)
+
+        return CatalogSnapshot(
+            ids=[sys.intern(row['id']) for row in rows],
+            titles=[row['title'] for row in rows],
+            descriptions=[row['description'] or '' for row in rows],
+            durations=[row['duration'] for row in rows],
+            formats=[row['format'] for row in rows],
+            difficulties=[row['difficulty'] for row in rows],
+            ratings=np.array([row['rating'] or 0.0 for row in rows], dtype=np.float64),
+            topic_ids=[intern_topics(topics.get(row['id'], [])) for row in rows],
+            topic_names=topic_names,
+            active=np.ones(len(rows), dtype=bool),
+            version=version
+        )
+
+    def _apply_changes(
+        self,
+        snapshot: CatalogSnapshot,
+        changed_ids: List[str],
+        rows: Dict[str, Dict[str, Any]],
+        topics: Dict[str, List[str]]
+    ) -> CatalogSnapshot:
+        """Copy-on-write update: replace changed rows, append new ones, deactivate deleted ones"""
+        topic_names = list(snapshot.topic_names)
+        topic_index = {name.lower(): i for i, name in enumerate(topic_names)}
+        columns = {
+            'ids': list(snapshot.ids),
+            'titles': list(snapshot.titles),
+            'descriptions': list(snapshot.descriptions),
+            'durations': list(snapshot.durations),
+            'formats': list(snapshot.formats),
+            'difficulties': list(snapshot.difficulties),
+            'topic_ids': list(snapshot.topic_ids),
+        }
+        ratings = snapshot.ratings.tolist()
+        active = snapshot.active.tolist()
+        new_rows = self._build(list(rows.values()), topics, topic_names, topic_index, version=0)
+
+        for course_id in changed_ids:
+            row = snapshot.index.get(course_id)
+            if course_id not in rows:
+                if row is not None:
+                    active[row] = False
+                continue
+            new_row = new_rows.index[course_id]
+            if row is None:
+                row = len(columns['ids'])
+                for values in columns.values():
+                    values.append(None)
+                ratings.append(0.0)
+                active.append(True)
+            columns['ids'][row] = new_rows.ids[new_row]
+            columns['titles'][row] = new_rows.titles[new_row]
+            columns['descriptions'][row] = new_rows.descriptions[new_row]
+            columns['durations'][row] = new_rows.durations[new_row]
+            columns['formats'][row] = new_rows.formats[new_row]
+            columns['difficulties'][row] = new_rows.difficulties[new_row]
+            columns['topic_ids'][row] = new_rows.topic_ids[new_row]
+            ratings[row] = float(new_rows.ratings[new_row])
+            active[row] = True
+
+        return CatalogSnapshot(
+            **columns,
+            ratings=np.array(ratings, dtype=np.float64),
+            topic_names=topic_names,
+            active=np.array(active, dtype=bool),
+            version=snapshot.version + 1
+        )
+
+    def snapshot(self) -> CatalogSnapshot:
+        """Current snapshot, loading or refreshing it if due"""
+        if self._snapshot is None:
+            return self.load()
+        if time.monotonic() - self._last_check >= self.refresh_interval:
+            return self.refresh()
+        return self._snapshot
+
+    async def snapshot_async(self) -> CatalogSnapshot:
+        """Current snapshot; any load or refresh runs on the DB executor"""
+        if self._snapshot is not None and time.monotonic() - self._last_check < self.refresh_interval:
+            return self._snapshot
+        return await run_in_db_thread(self.snapshot)
+
+    def invalidate(self) -> None:
+        """Force the next snapshot() call to check for changes"""
+        self._last_check = 0.0
+
+
+# Global instance
+course_catalog = CourseCatalog(
+    refresh_interval=settings.CATALOG_REFRESH_INTERVAL, change_retention=settings.COURSE_CHANGES_RETENTION
+)
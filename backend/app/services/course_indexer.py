@@ -0,0 +1,372 @@
+import hashlib
+import json
+import logging
+import re
+import time
+from typing import List, Dict, Any, Optional, Callable, Iterator, Tuple
+
+from weaviate.classes.data import DataObject
+from weaviate.classes.query import Filter
+from weaviate.util import generate_uuid5
+
+from ..config import settings
+from ..database import execute_query, get_course_topics
+
+logger = logging.getLogger(__name__)
+
+COURSE_COLUMNS = "id, title, description, difficulty, duration, format, rating"
+
+# progress(done, total) is called after every chunk
+ProgressCallback = Callable[[int, int], None]
+
+
+def course_content_text(course: Dict[str, Any]) -> str:
+    """Text embedded for a course"""
+    content_parts = [
+        course.get('title', ''),
+        course.get('description', ''),
+        ' '.join(course.get('topics', [])),
+        course.get('difficulty', ''),
+        course.get('format', '')
+    ]
+    return ' '.join(filter(None, content_parts))
+
+def course_uuid(course_id: str) -> str:
+    """Deterministic Weaviate object id for a course, so re-inserts overwrite"""
+    return str(generate_uuid5(course_id, "Course"))
+
+def course_content_hash(properties: Dict[str, Any]) -> str:
+    """Hash of everything that ends up in a Course object, including the embedding model"""
+    indexed = {key: value for key, value in properties.items() if key != "contentHash"}
+    payload = json.dumps([settings.EMBEDDING_MODEL, indexed], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+def title_tokens(title: Optional[str]) -> List[str]:
+    """Lowercased words of a title, as matched by negative keywords"""
+    return sorted(set(re.findall(r"\b\w+\b", (title or "").lower())))
+
+def course_properties(course: Dict[str, Any], content_text: str) -> Dict[str, Any]:
+    """Weaviate properties of a Course object"""
+    topics = course.get('topics', [])
+    properties = {
+        "courseId": course.get('id'),
+        "title": course.get('title'),
+        "description": course.get('description'),
+        "topics": topics,
+        "difficulty": course.get('difficulty'),
+        "duration": course.get('duration'),
+        "format": course.get('format'),
+        "rating": float(course.get('rating') or 0.0),
+        "contentVector": content_text,
+        # Exact-match copies of topics and title words for server-side exclusion filters
+        "topicTags": [topic.lower().strip() for topic in topics],
+        "titleTokens": title_tokens(course.get('title'))
+    }
+    properties["contentHash"] = course_content_hash(properties)
+    return properties
+
+def count_courses() -> int:
+    return execute_query("SELECT COUNT(*) FROM courses", fetch_one=True)[0]
+
+def iter_course_chunks(chunk_size: int) -> Iterator[List[Dict[str, Any]]]:
+    """Stream the courses table in id order, `chunk_size` rows at a time"""
+    last_id = ""
+    while True:
+        rows = execute_query(
+            f"SELECT {COURSE_COLUMNS} FROM courses WHERE id > ? ORDER BY id LIMIT ?",
+            (last_id, chunk_size)
+        )
+        if not rows:
+            return
+        courses = [dict(row) for row in rows]
+        topics = get_course_topics([course['id'] for course in courses])
+        for course in courses:
+            course['topics'] = topics.get(course['id'], [])
+        yield courses
+        last_id = courses[-1]['id']
+
+def sample_courses(count: int) -> List[Dict[str, Any]]:
+    """Random courses (with topics) used to spot-check an index"""
+    rows = execute_query(f"SELECT {COURSE_COLUMNS} FROM courses ORDER BY RANDOM() LIMIT ?", (count,))
+    courses = [dict(row) for row in rows]
+    topics = get_course_topics([course['id'] for course in courses])
+    for course in courses:
+        course['topics'] = topics.get(course['id'], [])
+    return courses
+
+def insert_with_retry(
+    collection,
+    objects: List[DataObject],
+    max_retries: int = 3,
+    backoff: float = 0.5,
+    sleep: Callable[[float], None] = time.sleep
+) -> Dict[int, str]:
+    """Batch-insert objects, retrying failed ones with exponential backoff.
+
+    Returns {index in `objects`: error message} for objects that still failed
+    after the last attempt.
+    """
+    pending = list(range(len(objects)))
+    errors: Dict[int, str] = {}
+    for attempt in range(max_retries + 1):
+        if attempt:
+            delay = backoff * 2 ** (attempt - 1)
+            logger.warning(f"Retrying {len(pending)} failed objects in {delay:.1f}s (attempt {attempt + 1})")
+            sleep(delay)
+        try:
+            result = collection.data.insert_many([objects[i] for i in pending])
+        except Exception as e:
+            errors = {i: str(e) for i in pending}
+            continue
+        errors = {pending[i]: error.message for i, error in result.errors.items()}
+        pending = sorted(errors)
+        if not pending:
+            break
+    return errors
+
+
+def delete_objects(collection, uuids: List[str], chunk_size: int) -> int:
+    """Delete objects by id, `chunk_size` ids per request; returns the number deleted"""
+    deleted = 0
+    for i in range(0, len(uuids), chunk_size):
+        result = collection.data.delete_many(where=Filter.by_id().contains_any(uuids[i:i + chunk_size]))
+        deleted += result.successful
+    return deleted
+
+def indexed_hashes(collection) -> Dict[str, Tuple[str, Optional[str]]]:
+    """{uuid: (courseId, contentHash)} for every object in a Course collection"""
+    indexed = {}
+    for obj in collection.iterator(return_properties=["courseId", "contentHash"]):
+        indexed[str(obj.uuid)] = (obj.properties.get("courseId"), obj.properties.get("contentHash"))
+    return indexed
+
+def count_missing_exclusion_fields(collection) -> int:
+    """Objects written before topicTags/titleTokens existed (they pass any exclusion filter)"""
+    missing = 0
+    for obj in collection.iterator(return_properties=["title", "topics", "topicTags", "titleTokens"]):
+        props = obj.properties
+        if (props.get("topics") and not props.get("topicTags")) or (props.get("title") and not props.get("titleTokens")):
+            missing += 1
+    return missing
+
+
+class CourseIndexer:
+    """Bulk ingestion of the SQLite course catalog into a Weaviate collection.
+
+    Courses are streamed in chunks; each chunk is embedded with one batched
+    encode call and written with one batch insert (failed objects are
+    retried with backoff). Objects get deterministic ids derived from the
+    course id, so writing a course again overwrites it.
+    """
+
+    def __init__(
+        self,
+        service,
+        chunk_size: int = settings.INDEX_CHUNK_SIZE,
+        max_retries: int = settings.INDEX_MAX_RETRIES,
+        backoff: float = settings.INDEX_RETRY_BACKOFF
+    ):
+        self.service = service
+        self.chunk_size = chunk_size
+        self.max_retries = max_retries
+        self.backoff = backoff
+
+    def index_chunk(self, collection, courses: List[Dict[str, Any]]) -> Tuple[int, Dict[str, str]]:
+        """Embed and insert one chunk; returns (inserted, {course_id: error})"""
+        texts = [course_content_text(course) for course in courses]
+        vectors = self.service.generate_embeddings(texts)
+        failures: Dict[str, str] = {}
+        objects: List[DataObject] = []
+        object_courses: List[str] = []
+        for course, text, vector in zip(courses, texts, vectors):
+            if not vector:
+                failures[course['id']] = "could not generate embedding"
+                continue
+            objects.append(DataObject(
+                properties=course_properties(course, text),
+                uuid=course_uuid(course['id']),
+                vector=vector
+            ))
+            object_courses.append(course['id'])
+        errors: Dict[int, str] = {}
+        if objects:
+            errors = insert_with_retry(collection, objects, self.max_retries, self.backoff)
+            for i, error in errors.items():
+                failures[object_courses[i]] = error
+        return len(objects) - len(errors), failures
+
+    def ingest(self, collection_name: Optional[str] = None, progress: Optional[ProgressCallback] = None) -> Dict[str, Any]:
+        """Index every course; returns totals and a per-chunk report"""
+        collection = self.service.get_course_collection(collection_name)
+        total = count_courses()
+        started = time.perf_counter()
+        done = 0
+        inserted = 0
+        failures: Dict[str, str] = {}
+        chunks: List[Dict[str, Any]] = []
+        for number, courses in enumerate(iter_course_chunks(self.chunk_size), 1):
+            chunk_started = time.perf_counter()
+            chunk_inserted, chunk_failures = self.index_chunk(collection, courses)
+            seconds = time.perf_counter() - chunk_started
+            done += len(courses)
+            inserted += chunk_inserted
+            failures.update(chunk_failures)
+            chunks.append({
+                "chunk": number,
+                "courses": len(courses),
+                "inserted": chunk_inserted,
+                "failed": len(chunk_failures),
+                "seconds": round(seconds, 3),
+                "courses_per_sec": round(len(courses) / seconds, 1) if seconds else None
+            })
+            logger.info(
+                f"Indexed chunk {number}: {chunk_inserted}/{len(courses)} courses in {seconds:.2f}s "
+                f"({len(courses) / max(seconds, 1e-9):.1f} courses/s), {len(chunk_failures)} failed"
+            )
+            if progress:
+                progress(done, max(total, done))
+        seconds = time.perf_counter() - started
+        return {
+            "total": done,
+            "successful": inserted,
+            "failed": len(failures),
+            "failures": failures,
+            "seconds": round(seconds, 3),
+            "courses_per_sec": round(done / seconds, 1) if seconds else None,
+            "chunks": chunks
+        }
+
+    def sync(self, collection_name: Optional[str] = None, progress: Optional[ProgressCallback] = None) -> Dict[str, Any]:
+        """Bring a collection in line with the catalog without rebuilding it.
+
+        Only courses that are new or whose content hash changed are embedded
+        and upserted; objects for courses no longer in the catalog (or
+        stored under a non-deterministic id by older imports) are deleted.
+        """
+        collection = self.service.get_course_collection(collection_name)
+        total = count_courses()
+        started = time.perf_counter()
+        indexed = indexed_hashes(collection)
+        done = 0
+        unchanged = 0
+        upserted = 0
+        failures: Dict[str, str] = {}
+        chunks: List[Dict[str, Any]] = []
+        for number, courses in enumerate(iter_course_chunks(self.chunk_size), 1):
+            chunk_started = time.perf_counter()
+            stale = []
+            for course in courses:
+                current = indexed.pop(course_uuid(course['id']), None)
+                text = course_content_text(course)
+                if current is None or current[1] != course_properties(course, text)["contentHash"]:
+                    stale.append(course)
+            chunk_upserted, chunk_failures = self.index_chunk(collection, stale) if stale else (0, {})
+            seconds = time.perf_counter() - chunk_started
+            done += len(courses)
+            unchanged += len(courses) - len(stale)
+            upserted += chunk_upserted
+            failures.update(chunk_failures)
+            chunks.append({
+                "chunk": number,
+                "courses": len(courses),
+                "upserted": chunk_upserted,
+                "failed": len(chunk_failures),
+                "seconds": round(seconds, 3)
+            })
+            if progress:
+                progress(done, max(total, done))
+        # Whatever is left is not in the catalog under its deterministic id
+        deleted = delete_objects(collection, sorted(indexed), self.chunk_size) if indexed else 0
+        seconds = time.perf_counter() - started
+        logger.info(
+            f"Synced {done} courses in {seconds:.2f}s: {upserted} upserted, {unchanged} unchanged, "
+            f"{deleted} deleted, {len(failures)} failed"
+        )
+        return {
+            "total": done,
+            "unchanged": unchanged,
+            "upserted": upserted,
+            "deleted": deleted,
+            "failed": len(failures),
+            "failures": failures,
+            "seconds": round(seconds, 3),
+            "chunks": chunks
+        }
+
+    def validate(self, collection_name: str, expected: int, samples: int = settings.INDEX_VALIDATION_SAMPLES) -> Dict[str, Any]:
+        """Check a built collection: object count and whether sample courses find themselves"""
+        collection = self.service.get_course_collection(collection_name)
+        count = collection.aggregate.over_all(total_count=True).total_count
+        courses = sample_courses(samples)
+        vectors = self.service.generate_embeddings([course_content_text(course) for course in courses])
+        missed = []
+        for course, vector in zip(courses, vectors):
+            found = False
+            if vector:
+                response = collection.query.near_vector(
+                    near_vector=vector,
+                    limit=settings.INDEX_VALIDATION_TOP_K,
+                    return_properties=["courseId"]
+                )
+                found = any(obj.properties.get("courseId") == course['id'] for obj in response.objects)
+            if not found:
+                missed.append(course['id'])
+        recall = 1 - len(missed) / len(courses) if courses else 1.0
+        return {
+            "passed": count == expected and recall >= settings.INDEX_VALIDATION_MIN_RECALL,
+            "count": count,
+            "expected": expected,
+            "samples": len(courses),
+            "recall": round(recall, 3),
+            "missed": missed
+        }
+
+    def rebuild(self, progress: Optional[ProgressCallback] = None, adopt_legacy: bool = False) -> Dict[str, Any]:
+        """Blue/green rebuild: index into a new collection, validate it, then switch reads over.
+
+        The served collection is untouched until the switch, so searches keep
+        working throughout; a build that fails validation is discarded.
+        A collection created before aliases can only be replaced with
+        `adopt_legacy` (see WeaviateService.switch_course_collection).
+        """
+        if not adopt_legacy and self.service.has_legacy_course_collection():
+            raise RuntimeError(LEGACY_COLLECTION_ERROR)
+        shadow = self.service.create_course_version()
+        try:
+            report = self.ingest(shadow, progress)
+            validation = self.validate(shadow, report["total"])
+        except Exception:
+            self.service.drop_course_collection(shadow)
+            raise
+        report.update({"collection": shadow, "validation": validation, "switched": False, "previous": None})
+        if not validation["passed"]:
+            logger.error(f"Rebuilt index {shadow} failed validation, keeping the current one: {validation}")
+            self.service.drop_course_collection(shadow)
+            return report
+        previous = self.service.switch_course_collection(shadow, adopt_legacy=adopt_legacy)
+        if previous:
+            self.service.drop_course_collection(previous)
+        report.update({"switched": True, "previous": previous})
+        return report
+
+
+REINDEX_MODES = ("incremental", "rebuild", "full")
+
+LEGACY_COLLECTION_ERROR = (
+    "Course is a collection created before aliases; switching it to an alias is a one-off "
+    "maintenance step: run `python migrate_to_weaviate.py --adopt-alias`"
+)
+
+def reindex_courses(
+    service, mode: str = "incremental", progress: Optional[ProgressCallback] = None, adopt_legacy: bool = False
+) -> Dict[str, Any]:
+    """Reindex the catalog into `service` using one of REINDEX_MODES"""
+    indexer = CourseIndexer(service)
+    if mode == "full":
+        if not service.create_schema():
+            raise RuntimeError("Failed to create Weaviate schema")
+        return indexer.ingest(progress=progress)
+    if mode == "rebuild":
+        return indexer.rebuild(progress=progress, adopt_legacy=adopt_legacy)
+    service.ensure_schema()
+    return indexer.sync(progress=progress)
@@ -0,0 +1,114 @@
+import json
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Union
+
+import numpy as np
+
+# EMBEDDING_MODEL values starting with this load an exported ONNX model directory
+ONNX_PREFIX = "onnx:"
+
+ONNX_MODEL_FILE = "model_int8.onnx"
+TOKENIZER_FILE = "tokenizer.json"
+CONFIG_FILE = "embedding_config.json"
+
+
+def parse_model_spec(spec: str):
+    """("onnx", directory) or ("sentence-transformers", model name)"""
+    if spec.startswith(ONNX_PREFIX):
+        return "onnx", spec[len(ONNX_PREFIX):]
+    return "sentence-transformers", spec
+
+
+def mean_pool(hidden: np.ndarray, attention_mask: np.ndarray, normalize: bool = True) -> np.ndarray:
+    """Average token embeddings over the real (unpadded) tokens, as SentenceTransformer's Pooling does"""
+    mask = attention_mask[:, :, None].astype(np.float32)
+    pooled = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+    if normalize:
+        pooled /= np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+    return pooled.astype(np.float32)
+
+
+def cosine_agreement(reference: np.ndarray, candidate: np.ndarray) -> Dict[str, float]:
+    """Row-wise cosine similarity between two models' embeddings of the same texts"""
+    reference = reference / np.linalg.norm(reference, axis=1, keepdims=True)
+    candidate = candidate / np.linalg.norm(candidate, axis=1, keepdims=True)
+    cosines = (reference * candidate).sum(axis=1)
+    return {
+        "texts": int(len(cosines)),
+        "mean": round(float(cosines.mean()), 5),
+        "p05": round(float(np.percentile(cosines, 5)), 5),
+        "min": round(float(cosines.min()), 5)
+    }
+
+
+class OnnxEmbeddingModel:
+    """Sentence embeddings from a transformer exported to ONNX and quantized
+    to int8 (see export_onnx_model.py), run with ONNX Runtime on CPU.
+
+    Mirrors the parts of SentenceTransformer's interface the app uses:
+    `encode(texts, batch_size)` and `get_sentence_embedding_dimension()`.
+    """
+
+    def __init__(self, directory: str, threads: int = 0):
+        import onnxruntime
+        from tokenizers import Tokenizer
+
+        self.directory = Path(directory)
+        self.config: Dict[str, Any] = json.loads((self.directory / CONFIG_FILE).read_text())
+        self.tokenizer = Tokenizer.from_file(str(self.directory / TOKENIZER_FILE))
+        self.tokenizer.enable_truncation(max_length=self.config["max_seq_length"])
+        self.tokenizer.enable_padding(pad_id=self.config["pad_token_id"], pad_token=self.config["pad_token"])
+
+        options = onnxruntime.SessionOptions()
+        options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = onnxruntime.InferenceSession(
+            str(self.directory / ONNX_MODEL_FILE), options, providers=["CPUExecutionProvider"]
+        )
+        self.input_names = {model_input.name for model_input in self.session.get_inputs()}
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self.config["dimension"]
+
+    def encode(self, sentences: Union[str, List[str]], batch_size: int = 32, **kwargs) -> np.ndarray:
+        """Unit vectors for `sentences`; a single string gives a single vector"""
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+        embeddings = np.zeros((len(texts), self.get_sentence_embedding_dimension()), dtype=np.float32)
+        # Batch texts of similar length together so little time goes to padding
+        order = sorted(range(len(texts)), key=lambda i: -len(texts[i]))
+        for start in range(0, len(order), batch_size):
+            batch = order[start:start + batch_size]
+            embeddings[batch] = self._encode_batch([texts[i] for i in batch])
+        return embeddings[0] if single else embeddings
+
+    def _encode_batch(self, texts: List[str]) -> np.ndarray:
+        encodings = self.tokenizer.encode_batch(texts)
+        feeds = {
+            "input_ids": np.array([e.ids for e in encodings], dtype=np.int64),
+            "attention_mask": np.array([e.attention_mask for e in encodings], dtype=np.int64),
+            "token_type_ids": np.array([e.type_ids for e in encodings], dtype=np.int64)
+        }
+        hidden = self.session.run(None, {name: value for name, value in feeds.items() if name in self.input_names})[0]
+        return mean_pool(hidden, feeds["attention_mask"], self.config.get("normalize", True))
+
+
+def load_embedding_model(spec: str, threads: int = 0, shared_weights_dir: Optional[str] = None):
+    """The embedding model named by an EMBEDDING_MODEL setting.
+
+    "onnx:<directory>" loads an exported ONNX model; anything else is a
+    SentenceTransformer model name or path, whose weights are memory-mapped
+    from `shared_weights_dir` when given so worker processes share them.
+    Backends are imported here, not at module import: torch alone takes
+    seconds to load.
+    """
+    backend, target = parse_model_spec(spec)
+    if backend == "onnx":
+        return OnnxEmbeddingModel(target, threads=threads)
+    from sentence_transformers import SentenceTransformer
+    model = SentenceTransformer(target)
+    if shared_weights_dir:
+        from .weight_store import share_model_weights
+        share_model_weights(model, shared_weights_dir, target)
+    return model
@@ -0,0 +1,89 @@
+import asyncio
+import logging
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Any, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class EmbeddingBatcher:
+    """Coalesces concurrent embedding requests into batched encode calls.
+
+    Callers await `embed(text)`. Requests that arrive within `max_wait_ms` of
+    the first pending one (or until `max_batch_size` are queued) are encoded
+    together by `embed_batch` on a dedicated model thread. While a batch is
+    being encoded, new requests queue up and form the next batch.
+
+    Pending requests and the flush timer are kept per event loop: a timer
+    only fires on the loop that scheduled it, so callers on another loop
+    (e.g. a later asyncio.run) must never wait on it.
+    """
+
+    def __init__(
+        self,
+        embed_batch: Callable[[List[str]], List[List[float]]],
+        max_batch_size: int = 32,
+        max_wait_ms: float = 5.0
+    ):
+        self.embed_batch = embed_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self._pending: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, List[Tuple[str, asyncio.Future]]]" = (
+            weakref.WeakKeyDictionary()
+        )
+        self._flush_handles: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.TimerHandle]" = (
+            weakref.WeakKeyDictionary()
+        )
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="embedding")
+        self.batches = 0
+        self.items = 0
+
+    async def embed(self, text: str) -> List[float]:
+        """Embedding for one text, encoded together with concurrent requests"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        pending = self._pending.setdefault(loop, [])
+        pending.append((text, future))
+        if len(pending) >= self.max_batch_size:
+            self._flush(loop)
+        elif loop not in self._flush_handles:
+            self._flush_handles[loop] = loop.call_later(self.max_wait, self._flush, loop)
+        return await future
+
+    def _flush(self, loop: asyncio.AbstractEventLoop) -> None:
+        handle = self._flush_handles.pop(loop, None)
+        if handle is not None:
+            handle.cancel()
+        batch = self._pending.pop(loop, [])
+        # Requests whose caller already gave up (e.g. timed out) are dropped
+        batch = [(text, future) for text, future in batch if not future.done()]
+        if not batch:
+            return
+        self.batches += 1
+        self.items += len(batch)
+        encoding = loop.run_in_executor(self._executor, self.embed_batch, [text for text, _ in batch])
+        encoding.add_done_callback(lambda done: self._resolve(batch, done))
+
+    @staticmethod
+    def _resolve(batch: List[Tuple[str, asyncio.Future]], done: asyncio.Future) -> None:
+        error = done.exception()
+        if error is not None:
+            logger.error(f"Error encoding embedding batch of {len(batch)}: {error}")
+        for i, (_, future) in enumerate(batch):
+            if future.done():
+                continue
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(done.result()[i])
+
+    def stats(self) -> Dict[str, Any]:
+        """Batch count and average batch size"""
+        return {
+            "batches": self.batches,
+            "items": self.items,
+            "mean_batch_size": round(self.items / self.batches, 2) if self.batches else 0.0,
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000.0
+        }
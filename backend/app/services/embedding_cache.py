@@ -0,0 +1,253 @@
+import fcntl
+import hashlib
+import json
+import logging
+import os
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Any, Optional
+
+import numpy as np
+
+from .cache import LRUCache
+
+logger = logging.getLogger(__name__)
+
+KEY_BYTES = 16
+
+
+def embedding_key(model_name: str, text: str) -> bytes:
+    """Content hash identifying the embedding of `text` under a given model"""
+    return hashlib.blake2b(f"{model_name}\0{text}".encode("utf-8"), digest_size=KEY_BYTES).digest()
+
+
+class EmbeddingStore:
+    """Append-only on-disk embedding store, shareable between processes.
+
+    Vectors live in a float32 file (`vectors.f32`, read through np.memmap),
+    their content-hash keys in `keys.bin`, and the dimension and model name
+    in `meta.json`. Row i holds the vector of the i-th key, so the number of
+    complete keys in `keys.bin` is the row count.
+
+    Appends take an exclusive flock on `.lock` and first pick up the keys
+    other processes appended, so workers sharing the directory never write
+    the same row. The vector is written before its key: a key on disk always
+    has its vector, and a process that dies mid-append loses only that row.
+    """
+
+    def __init__(self, directory: Path, model_name: str, initial_capacity: int = 1024):
+        self.directory = Path(directory)
+        self.model_name = model_name
+        self.initial_capacity = initial_capacity
+        self.dim: Optional[int] = None
+        self.count = 0
+        self._capacity = 0
+        self._vectors: Optional[np.memmap] = None
+        self._vectors_fd: Optional[int] = None
+        self._keys_fd: Optional[int] = None
+        self._rows: Dict[bytes, int] = {}
+        self._lock = threading.Lock()
+        self.directory.mkdir(parents=True, exist_ok=True)
+        with self._file_lock():
+            self._open()
+
+    @property
+    def _meta_path(self) -> Path:
+        return self.directory / "meta.json"
+
+    @property
+    def _keys_path(self) -> Path:
+        return self.directory / "keys.bin"
+
+    @property
+    def _vectors_path(self) -> Path:
+        return self.directory / "vectors.f32"
+
+    @contextmanager
+    def _file_lock(self):
+        """Exclusive lock shared with every process using this directory"""
+        with open(self.directory / ".lock", "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _read_meta(self) -> Optional[Dict[str, Any]]:
+        """The store header, or None if no process has created the store yet"""
+        if not self._meta_path.exists():
+            return None
+        return json.loads(self._meta_path.read_text())
+
+    def _open(self) -> None:
+        """Map an existing store, unless it was built by another model. Call under the file lock"""
+        meta = self._read_meta()
+        if meta is None:
+            return
+        if meta.get("model") != self.model_name:
+            logger.warning(f"Embedding store at {self.directory} was built with {meta.get('model')}, starting fresh")
+            return
+        self._close_files()
+        self.dim = int(meta["dim"])
+        self.count = 0
+        self._capacity = 0
+        self._vectors = None
+        self._rows = {}
+        self._vectors_fd = os.open(self._vectors_path, os.O_RDWR | os.O_CREAT)
+        self._keys_fd = os.open(self._keys_path, os.O_RDWR | os.O_APPEND | os.O_CREAT)
+        self._read_new_keys()
+        logger.info(f"Opened embedding store with {self.count} vectors ({self.directory})")
+
+    def _create(self, dim: int) -> None:
+        """Start an empty store. Call under the file lock"""
+        self._close_files()
+        meta_tmp = self._meta_path.with_name(f"meta.json.{os.getpid()}.tmp")
+        meta_tmp.write_text(json.dumps({"model": self.model_name, "dim": dim}))
+        # Empty the data files before the new meta names them, so no process
+        # reads the old model's rows as this one's
+        for path in (self._keys_path, self._vectors_path):
+            with open(path, "wb"):
+                pass
+        os.replace(meta_tmp, self._meta_path)
+        self._open()
+
+    def _close_files(self) -> None:
+        self._vectors = None
+        for fd in (self._vectors_fd, self._keys_fd):
+            if fd is not None:
+                os.close(fd)
+        self._vectors_fd = self._keys_fd = None
+
+    def _read_new_keys(self) -> None:
+        """Index the keys appended since we last looked, by this or another process"""
+        total = os.fstat(self._keys_fd).st_size // KEY_BYTES
+        if total > self.count:
+            new_keys = os.pread(self._keys_fd, (total - self.count) * KEY_BYTES, self.count * KEY_BYTES)
+            for i in range(total - self.count):
+                self._rows[new_keys[i * KEY_BYTES:(i + 1) * KEY_BYTES]] = self.count + i
+            self.count = total
+        if self.count > self._capacity or self._vectors is None:
+            self._map()
+
+    def _map(self) -> None:
+        """(Re)map the vectors file at its current size, which other processes may have grown"""
+        self._capacity = os.fstat(self._vectors_fd).st_size // (self.dim * 4)
+        self._vectors = (
+            np.memmap(self._vectors_path, dtype=np.float32, mode="r", shape=(self._capacity, self.dim))
+            if self._capacity else None
+        )
+
+    def get(self, key: bytes) -> Optional[np.ndarray]:
+        """Stored vector for a key (a copy, safe to keep after the store grows)"""
+        with self._lock:
+            row = self._rows.get(key)
+            if row is None and self.dim is None:
+                # Another process may have created the store since we opened
+                # it. meta.json is replaced atomically, so no file lock needed
+                meta = self._read_meta()
+                if meta is not None and meta.get("model") == self.model_name:
+                    self._open()
+                    row = self._rows.get(key)
+            elif row is None:
+                # Keys are append-only and written after their vectors, so
+                # reading them needs no file lock
+                self._read_new_keys()
+                row = self._rows.get(key)
+            if row is None:
+                return None
+            return np.array(self._vectors[row])
+
+    def put(self, key: bytes, vector: np.ndarray) -> None:
+        """Append a vector unless the key is already stored"""
+        with self._lock:
+            if key in self._rows:
+                return
+            with self._file_lock():
+                if self.dim is None:
+                    # Another process may have created the store since we opened it
+                    self._open()
+                    if self.dim is None:
+                        self._create(len(vector))
+                else:
+                    self._read_new_keys()
+                if key in self._rows or len(vector) != self.dim:
+                    return
+                # Drop a partial key left by a process that died mid-append
+                size = os.fstat(self._keys_fd).st_size
+                if size != self.count * KEY_BYTES:
+                    os.ftruncate(self._keys_fd, self.count * KEY_BYTES)
+                row = self.count
+                if row >= self._capacity:
+                    os.ftruncate(self._vectors_fd, max(self._capacity * 2, self.initial_capacity) * self.dim * 4)
+                    self._map()
+                os.pwrite(self._vectors_fd, np.asarray(vector, dtype=np.float32).tobytes(), row * self.dim * 4)
+                os.write(self._keys_fd, key)
+                self._rows[key] = row
+                self.count += 1
+
+    def flush(self) -> None:
+        with self._lock:
+            for fd in (self._vectors_fd, self._keys_fd):
+                if fd is not None:
+                    os.fsync(fd)
+
+    def __len__(self) -> int:
+        return self.count
+
+
+class EmbeddingCache:
+    """Content-hash keyed embedding cache: in-memory LRU in front of an optional on-disk store"""
+
+    def __init__(self, model_name: str, max_entries: int = 10000, store_dir: Optional[str] = None):
+        self.model_name = model_name
+        self._memory = LRUCache(max_entries=max_entries, ttl=None, name="embeddings")
+        self._store: Optional[EmbeddingStore] = None
+        if store_dir:
+            try:
+                self._store = EmbeddingStore(Path(store_dir), model_name)
+            except Exception as e:
+                logger.error(f"Error opening embedding store at {store_dir}: {e}")
+        self.disk_hits = 0
+        self.misses = 0
+
+    def get(self, text: str) -> Optional[np.ndarray]:
+        """Cached embedding for an already-cleaned text"""
+        key = embedding_key(self.model_name, text)
+        vector = self._memory.get(key)
+        if vector is not None:
+            return vector
+        if self._store is not None:
+            vector = self._store.get(key)
+            if vector is not None:
+                self.disk_hits += 1
+                self._memory.set(key, vector)
+                return vector
+        self.misses += 1
+        return None
+
+    def put(self, text: str, vector: np.ndarray) -> np.ndarray:
+        """Remember an embedding; returns it as a float32 array"""
+        vector = np.asarray(vector, dtype=np.float32)
+        key = embedding_key(self.model_name, text)
+        self._memory.set(key, vector)
+        if self._store is not None:
+            try:
+                self._store.put(key, vector)
+            except Exception as e:
+                logger.error(f"Error writing embedding store: {e}")
+        return vector
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit rates for the memory and disk tiers"""
+        memory = self._memory.stats()
+        lookups = memory["hits"] + self.disk_hits + self.misses
+        return {
+            "entries": memory["entries"],
+            "memory_hits": memory["hits"],
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": round((memory["hits"] + self.disk_hits) / lookups, 4) if lookups else 0.0,
+            "evictions": memory["evictions"],
+            "disk_entries": len(self._store) if self._store is not None else None
+        }
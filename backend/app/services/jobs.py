@@ -0,0 +1,277 @@
+import json
+import logging
+import os
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Callable, Dict, Any, Optional, Set
+
+from ..config import settings
+from ..database import execute_query
+
+logger = logging.getLogger(__name__)
+
+JOB_COLUMNS = (
+    "id, kind, status, progress_done, progress_total, result, error, "
+    "cancel_requested, created_at, started_at, updated_at, finished_at, owner"
+)
+
+# A job function receives progress(done, total) and returns a JSON-serializable result
+ProgressCallback = Callable[[int, int], None]
+JobFunction = Callable[[ProgressCallback], Any]
+
+
+class JobCancelled(Exception):
+    """Raised from a job's progress callback once the job has been cancelled"""
+
+
+class JobAlreadyRunning(Exception):
+    """A job of the same kind is already queued or running"""
+
+    def __init__(self, job_id: int):
+        super().__init__(f"Job {job_id} is already queued or running")
+        self.job_id = job_id
+
+
+def _timestamp(value: Optional[float]) -> Optional[str]:
+    return datetime.fromtimestamp(value).isoformat() if value else None
+
+
+def process_owner() -> str:
+    """Owner tag for the jobs this process starts, as hostname:pid"""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def _owner_is_alive(owner: str) -> Optional[bool]:
+    """Whether the owning process still exists; None when it runs on another host"""
+    hostname, _, pid = owner.rpartition(":")
+    if hostname != socket.gethostname() or not pid.isdigit():
+        return None
+    try:
+        os.kill(int(pid), 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+class JobRunner:
+    """Runs long jobs (vector reindexing, migrations) on a small thread pool.
+
+    Every job is a row in the `jobs` table, so its status can be polled from
+    any request, or from another process sharing the database. Cancellation
+    is cooperative: after `cancel()`, the job's progress callback raises
+    JobCancelled at its next report.
+
+    Each job records the process that owns it, which refreshes `updated_at`
+    on its unfinished jobs every `heartbeat_interval` seconds, so a
+    restarting process can tell abandoned jobs from ones other workers (or
+    migrate_to_weaviate.py) are still running.
+    """
+
+    def __init__(
+        self,
+        max_workers: int = 1,
+        clock: Callable[[], float] = time.time,
+        heartbeat_interval: float = settings.JOB_HEARTBEAT_INTERVAL,
+        stale_after: float = settings.JOB_STALE_AFTER
+    ):
+        self.max_workers = max_workers
+        self.clock = clock
+        self.heartbeat_interval = heartbeat_interval
+        self.stale_after = stale_after
+        self.owner = process_owner()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._heartbeat: Optional[threading.Thread] = None
+        self._stopping = threading.Event()
+        self._cancelled: Set[int] = set()
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        # Created on first use so importing the module starts no threads
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(self.max_workers, thread_name_prefix="jobs")
+            self._stopping.clear()
+            self._heartbeat = threading.Thread(target=self._beat, name="jobs-heartbeat", daemon=True)
+            self._heartbeat.start()
+        return self._executor
+
+    def _beat(self) -> None:
+        while not self._stopping.wait(self.heartbeat_interval):
+            try:
+                execute_query(
+                    "UPDATE jobs SET updated_at = ? WHERE owner = ? AND status IN ('queued', 'running')",
+                    (self.clock(), self.owner)
+                )
+            except Exception as e:
+                logger.error(f"Error refreshing job heartbeat: {e}")
+
+    def recover(self) -> None:
+        """Fail queued or running jobs whose owning process is gone.
+
+        An owner on this host is checked by pid; one elsewhere (or a job
+        from before owners were recorded) counts as gone once its heartbeat
+        is older than `stale_after`. This process's own jobs only count as
+        gone after `shutdown()`.
+        """
+        now = self.clock()
+        rows = execute_query(
+            "SELECT id, owner, COALESCE(updated_at, created_at) FROM jobs WHERE status IN ('queued', 'running')"
+        )
+        abandoned = []
+        for job_id, owner, heartbeat in rows:
+            if owner == self.owner:
+                # Ours, from before a shutdown() that dropped the queue
+                alive = self._executor is not None
+            else:
+                alive = _owner_is_alive(owner) if owner else None
+            if alive is False or (alive is None and heartbeat < now - self.stale_after):
+                abandoned.append(job_id)
+        if not abandoned:
+            return
+        placeholders = ",".join("?" * len(abandoned))
+        rows = execute_query(
+            "UPDATE jobs SET status = 'failed', error = 'interrupted by restart', finished_at = ?, updated_at = ? "
+            f"WHERE id IN ({placeholders}) AND status IN ('queued', 'running') RETURNING id",
+            (now, now, *abandoned)
+        )
+        if rows:
+            logger.warning(f"Marked {len(rows)} interrupted jobs as failed")
+
+    def active_job(self, kind: str) -> Optional[int]:
+        """Id of a queued or running job of this kind"""
+        row = execute_query(
+            "SELECT id FROM jobs WHERE kind = ? AND status IN ('queued', 'running') ORDER BY id LIMIT 1",
+            (kind,),
+            fetch_one=True
+        )
+        return row[0] if row else None
+
+    def submit(self, kind: str, fn: JobFunction, exclusive: bool = True) -> int:
+        """Queue a job and return its id; exclusive jobs refuse to run twice at once"""
+        now = self.clock()
+        if exclusive:
+            # Check and insert in one statement on the writer, so two processes
+            # submitting at once cannot both see no active job
+            row = execute_query(
+                "INSERT INTO jobs (kind, status, created_at, updated_at, owner) "
+                "SELECT ?, 'queued', ?, ?, ? WHERE NOT EXISTS "
+                "(SELECT 1 FROM jobs WHERE kind = ? AND status IN ('queued', 'running')) RETURNING id",
+                (kind, now, now, self.owner, kind),
+                fetch_one=True
+            )
+            if row is None:
+                raise JobAlreadyRunning(self.active_job(kind))
+        else:
+            row = execute_query(
+                "INSERT INTO jobs (kind, status, created_at, updated_at, owner) VALUES (?, 'queued', ?, ?, ?) RETURNING id",
+                (kind, now, now, self.owner),
+                fetch_one=True
+            )
+        job_id = row[0]
+        self.executor.submit(self._run, job_id, fn)
+        logger.info(f"Queued {kind} job {job_id}")
+        return job_id
+
+    def cancel(self, job_id: int) -> bool:
+        """Request cancellation; returns False if the job is unknown or already finished"""
+        now = self.clock()
+        rows = execute_query(
+            "UPDATE jobs SET cancel_requested = 1, updated_at = ? "
+            "WHERE id = ? AND status IN ('queued', 'running') RETURNING id",
+            (now, job_id)
+        )
+        if rows:
+            self._cancelled.add(job_id)
+        return bool(rows)
+
+    def _is_cancelled(self, job_id: int) -> bool:
+        if job_id in self._cancelled:
+            return True
+        # Another process may have requested it
+        row = execute_query("SELECT cancel_requested FROM jobs WHERE id = ?", (job_id,), fetch_one=True)
+        return bool(row and row[0])
+
+    def _finish(self, job_id: int, status: str, result: Any = None, error: Optional[str] = None) -> None:
+        now = self.clock()
+        execute_query(
+            "UPDATE jobs SET status = ?, result = ?, error = ?, finished_at = ?, updated_at = ? WHERE id = ?",
+            (status, json.dumps(result) if result is not None else None, error, now, now, job_id)
+        )
+        self._cancelled.discard(job_id)
+
+    def _run(self, job_id: int, fn: JobFunction) -> None:
+        if self._is_cancelled(job_id):
+            self._finish(job_id, "cancelled")
+            return
+        now = self.clock()
+        execute_query(
+            "UPDATE jobs SET status = 'running', started_at = ?, updated_at = ? WHERE id = ?",
+            (now, now, job_id)
+        )
+
+        def progress(done: int, total: int) -> None:
+            execute_query(
+                "UPDATE jobs SET progress_done = ?, progress_total = ?, updated_at = ? WHERE id = ?",
+                (done, total, self.clock(), job_id)
+            )
+            if self._is_cancelled(job_id):
+                raise JobCancelled()
+
+        try:
+            result = fn(progress)
+        except JobCancelled:
+            logger.info(f"Job {job_id} cancelled")
+            self._finish(job_id, "cancelled")
+        except Exception as e:
+            logger.error(f"Job {job_id} failed: {e}")
+            self._finish(job_id, "failed", error=str(e))
+        else:
+            logger.info(f"Job {job_id} completed")
+            self._finish(job_id, "completed", result=result)
+
+    def get(self, job_id: int) -> Optional[Dict[str, Any]]:
+        """Job status with progress percentage and an ETA while running"""
+        row = execute_query(f"SELECT {JOB_COLUMNS} FROM jobs WHERE id = ?", (job_id,), fetch_one=True)
+        if not row:
+            return None
+        job = dict(row)
+        done, total = job["progress_done"] or 0, job["progress_total"]
+        percent = None
+        eta_seconds = None
+        if total:
+            percent = round(100.0 * done / total, 1)
+        if job["status"] == "completed":
+            percent = 100.0
+        elif job["status"] == "running" and total and done:
+            # Assume the remaining items take as long as the finished ones did
+            elapsed = self.clock() - job["started_at"]
+            eta_seconds = round(elapsed / done * (total - done), 1)
+        return {
+            "id": job["id"],
+            "kind": job["kind"],
+            "status": job["status"],
+            "progress": {"done": done, "total": total, "percent": percent},
+            "eta_seconds": eta_seconds,
+            "cancel_requested": bool(job["cancel_requested"]),
+            "result": json.loads(job["result"]) if job["result"] else None,
+            "error": job["error"],
+            "owner": job["owner"],
+            "created_at": _timestamp(job["created_at"]),
+            "started_at": _timestamp(job["started_at"]),
+            "finished_at": _timestamp(job["finished_at"])
+        }
+
+    def shutdown(self, wait: bool = False) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait, cancel_futures=True)
+            self._executor = None
+            self._stopping.set()
+            self._heartbeat = None
+
+
+# Global job runner instance
+job_runner = JobRunner(max_workers=settings.JOB_WORKERS)
@@ -0,0 +1,206 @@
+import json
+import logging
+import os
+import re
+from collections import deque
+from typing import List, Dict, Any, Tuple
+
+from ..config import settings
+from .cache import LRUCache
+
+logger = logging.getLogger(__name__)
+
+SYNONYMS_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "config", "synonyms.json"))
+
+# Used when config/synonyms.json is missing
+DEFAULT_SYNONYMS = {
+    'website': 'website web development web app',
+    'webapp': 'webapp web application web development',
+    'full stack': 'full stack web development frontend backend database',
+    'software engineer': 'software engineer developer programmer coding programming'
+}
+
+# Phrases introducing something the user does not want
+NEGATIVE_PREFIXES = [
+    "don't want to learn",
+    "not interested in",
+    "avoid",
+    "but not",
+    "except",
+    "without",
+    "no",
+    "i don't like"
+]
+# "no ..." is left in the text to embed; it rarely reads as a negation there
+STRIPPED_PREFIXES = [prefix for prefix in NEGATIVE_PREFIXES if prefix != "no"]
+
+NEGATIVE_PATTERN = re.compile(rf"\b(?:{'|'.join(map(re.escape, NEGATIVE_PREFIXES))}) ([^,.!?]+)", re.IGNORECASE)
+NOT_WORD_PATTERN = re.compile(r"\bnot (\w+)", re.IGNORECASE)
+STRIP_PATTERN = re.compile(
+    rf"\b(?:{'|'.join(map(re.escape, STRIPPED_PREFIXES))}) [^,.!?]+|\bnot \w+", re.IGNORECASE
+)
+WHITESPACE_PATTERN = re.compile(r"\s+")
+EDGE_PUNCTUATION_PATTERN = re.compile(r"^[,.\s]+|[,.\s]+$")
+
+# Embedded instead when nothing meaningful is left of the query
+FALLBACK_QUERY = "programming software development"
+
+
+class SynonymMatcher:
+    """Aho-Corasick automaton over synonym phrases.
+
+    Finds every occurrence of every phrase in one pass over the text. A match
+    must start and end on word boundaries; where matches overlap, the
+    leftmost one wins and among those the longest.
+    """
+
+    def __init__(self, mappings: Dict[str, str]):
+        self.expansions = {phrase.lower().strip(): expansion for phrase, expansion in mappings.items() if phrase.strip()}
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[List[int]] = [[]]  # Lengths of the phrases ending at each state
+        for phrase in self.expansions:
+            state = 0
+            for char in phrase:
+                if char not in self._goto[state]:
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._output.append([])
+                    self._goto[state][char] = len(self._goto) - 1
+                state = self._goto[state][char]
+            self._output[state].append(len(phrase))
+        self._link_failures()
+
+    def _link_failures(self) -> None:
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, child in self._goto[state].items():
+                queue.append(child)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[child] = self._goto[fallback].get(char, 0)
+                self._output[child] = self._output[child] + self._output[self._fail[child]]
+
+    def find_all(self, text: str) -> List[Tuple[int, int]]:
+        """(start, end) of every whole-word phrase occurrence in `text` (already lowercased)"""
+        found = []
+        state = 0
+        for i, char in enumerate(text):
+            while state and char not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(char, 0)
+            end = i + 1
+            if end < len(text) and text[end].isalnum():
+                continue
+            for length in self._output[state]:
+                start = end - length
+                if start == 0 or not text[start - 1].isalnum():
+                    found.append((start, end))
+        return found
+
+    def matches(self, text: str) -> List[Tuple[int, int]]:
+        """Non-overlapping (start, end) matches, leftmost-longest first"""
+        selected = []
+        position = 0
+        for start, end in sorted(self.find_all(text), key=lambda match: (match[0], -match[1])):
+            if start >= position:
+                selected.append((start, end))
+                position = end
+        return selected
+
+    def expand(self, text: str) -> str:
+        """Replace every matched phrase with its expansion"""
+        lowered = text.lower()
+        # Keep the original casing unless lowercasing shifted character positions
+        source = text if len(lowered) == len(text) else lowered
+        parts = []
+        position = 0
+        for start, end in self.matches(lowered):
+            parts.append(source[position:start])
+            parts.append(self.expansions[lowered[start:end]])
+            position = end
+        parts.append(source[position:])
+        return "".join(parts)
+
+    def __len__(self) -> int:
+        return len(self.expansions)
+
+
+class ParsedQuery:
+    """A free-text query split into what to embed and what to exclude"""
+
+    __slots__ = ("text", "clean_text", "negative_keywords")
+
+    def __init__(self, text: str, clean_text: str, negative_keywords: Tuple[str, ...]):
+        self.text = text
+        self.clean_text = clean_text
+        self.negative_keywords = negative_keywords
+
+    def __repr__(self) -> str:
+        return f"ParsedQuery(clean_text={self.clean_text!r}, negative_keywords={self.negative_keywords!r})"
+
+
+class QueryParser:
+    """Parses search queries: negative phrases become exclusion keywords and are
+    removed from the text to embed, and synonyms are expanded. Patterns are
+    compiled once at import and parsed queries are memoized."""
+
+    def __init__(self, synonyms: Dict[str, str], cache_size: int = 2048):
+        self.synonyms = SynonymMatcher(synonyms)
+        self._cache = LRUCache(max_entries=cache_size, ttl=None, name="parsed_queries")
+
+    @classmethod
+    def from_config(cls, path: str = SYNONYMS_PATH, cache_size: int = 2048) -> "QueryParser":
+        """Parser using config/synonyms.json, with safe fallback"""
+        synonyms: Dict[str, str] = {}
+        try:
+            if os.path.exists(path):
+                with open(path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                if isinstance(data, dict):
+                    synonyms = {str(k).lower(): str(v) for k, v in data.items()}
+                    logger.info(f"Loaded {len(synonyms)} synonym mappings from config")
+            if not synonyms:
+                synonyms = dict(DEFAULT_SYNONYMS)
+                logger.warning("Synonym config not found; using minimal defaults")
+        except Exception as e:
+            logger.error(f"Error loading synonyms: {e}")
+        return cls(synonyms, cache_size)
+
+    def parse(self, query: str) -> ParsedQuery:
+        """Parsed form of a query, memoized"""
+        parsed = self._cache.get(query)
+        if parsed is None:
+            parsed = ParsedQuery(query, self._clean(query), self._negative_keywords(query))
+            self._cache.set(query, parsed)
+        return parsed
+
+    def expand(self, text: str) -> str:
+        """Synonym expansion alone, for text that carries no negations"""
+        return self.synonyms.expand(text)
+    
+    @staticmethod
+    def _negative_keywords(query: str) -> Tuple[str, ...]:
+        keywords = set()
+        for match in NEGATIVE_PATTERN.finditer(query.lower()):
+            keywords.update(match.group(1).split())
+        keywords.update(NOT_WORD_PATTERN.findall(query.lower()))
+        return tuple(sorted(keywords))
+
+    def _clean(self, query: str) -> str:
+        clean_query = self.synonyms.expand(STRIP_PATTERN.sub("", query))
+        clean_query = WHITESPACE_PATTERN.sub(" ", clean_query).strip()
+        clean_query = EDGE_PUNCTUATION_PATTERN.sub("", clean_query)
+        # If query becomes empty or too short, use a generic programming query
+        if len(clean_query.strip()) < 3:
+            return FALLBACK_QUERY
+        return clean_query
+
+    def stats(self) -> Dict[str, Any]:
+        return {"synonyms": len(self.synonyms), **self._cache.stats()}
+
+
+# Global parser instance
+query_parser = QueryParser.from_config(cache_size=settings.QUERY_PARSE_CACHE_SIZE)
@@ -0,0 +1,62 @@
+from typing import List, Dict, Any, Optional
+
+from .course_catalog import CatalogSnapshot, course_catalog
+from .query_parser import ParsedQuery, query_parser
+
+POSITIVE_RATING = 4
+
+
+class RecommendationContext:
+    """Everything one recommendation request needs, resolved once.
+
+    Built at the start of get_personalized_recommendations and passed to
+    every pipeline stage, so all stages see the same catalog snapshot and
+    courses referenced by the user's feedback are looked up in one batch.
+    """
+
+    def __init__(
+        self,
+        user_id: int,
+        query: Optional[str],
+        user_context: Optional[Dict[str, Any]],
+        catalog: CatalogSnapshot
+    ):
+        self.user_id = user_id
+        self.query = query
+        # Negative keywords and the text to embed, parsed once for every stage
+        self.parsed_query: Optional[ParsedQuery] = query_parser.parse(query) if query else None
+        self.user_context = user_context or {}
+        self.catalog = catalog
+        self.preferences: Dict[str, Any] = self.user_context.get('preferences') or {}
+        # Completed, dropped and low-rated courses, when the context loader already resolved them
+        self.excluded_course_ids: Optional[List[str]] = self.user_context.get('excluded_course_ids')
+        self.positive_feedback = [
+            f for f in self.user_context.get('recent_feedback') or []
+            if f.get('rating', 0) >= POSITIVE_RATING and f.get('course_id')
+        ]
+        self.courses = catalog.get_many(f['course_id'] for f in self.positive_feedback)
+        # Topics of every highly rated course, repeated per rating so they can be counted
+        self.positive_topics: List[str] = [
+            topic for course in self.positive_courses() for topic in course['topics']
+        ]
+
+    @classmethod
+    async def build(
+        cls,
+        user_id: int,
+        query: Optional[str],
+        user_context: Optional[Dict[str, Any]]
+    ) -> "RecommendationContext":
+        """Take a catalog snapshot and resolve the courses the user rated highly"""
+        catalog = await course_catalog.snapshot_async()
+        return cls(user_id, query, user_context, catalog)
+
+    @property
+    def has_user_context(self) -> bool:
+        return bool(self.user_context)
+
+    def positive_courses(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Highly rated courses in feedback order (one entry per feedback row)"""
+        feedback = self.positive_feedback if limit is None else self.positive_feedback[:limit]
+        return [self.courses[f['course_id']] for f in feedback if f['course_id'] in self.courses]
+
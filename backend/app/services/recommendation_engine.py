@@ -1,29 +1,50 @@
 import json
 import logging
 import asyncio
+import time
 from typing import List, Dict, Any, Optional, Tuple
 import sqlite3
 from collections import Counter
 import math
-import re
 from datetime import datetime, timedelta
 from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor
 
 from ..models import CourseResponse
-from ..database import execute_query
+from ..database import execute_query_async, get_user_version_async
 from ..config import settings
 from .weaviate_service import weaviate_service
+from .course_catalog import course_catalog
+from .recommendation_context import RecommendationContext
+from .query_parser import query_parser
+from .scoring import score_courses
+from .cache import LRUCache, register_user_invalidation_hook
 
 logger = logging.getLogger(__name__)
 
+# Blocking candidate work (embedding, Weaviate calls, catalog scans) runs here, off the event loop
+candidate_executor = ThreadPoolExecutor(
+    max_workers=settings.CANDIDATE_THREADS, thread_name_prefix="candidates"
+)
+
 class RecommendationEngine:
     """Recommendation engine combining vector similarity and content-based signals"""
     
     def __init__(self):
         self.max_recommendations = settings.MAX_RECOMMENDATIONS
         self.min_similarity_score = settings.MIN_SIMILARITY_SCORE
-        self._cache = {}
-        self._cache_ttl = 300
+        self._cache = LRUCache(
+            max_entries=settings.RECOMMENDATION_CACHE_MAX_ENTRIES,
+            max_bytes=settings.RECOMMENDATION_CACHE_MAX_BYTES,
+            ttl=settings.RECOMMENDATION_CACHE_TTL,
+            name="recommendations"
+        )
+        self.source_timeouts = {
+            'vector': settings.VECTOR_SOURCE_TIMEOUT,
+            'content': settings.CONTENT_SOURCE_TIMEOUT
+        }
+        self._stage_stats: Dict[str, Dict[str, float]] = {}
+        self._source_failures: Counter = Counter()
     
     async def get_personalized_recommendations(
         self,
@@ -35,24 +56,43 @@ class RecommendationEngine:
     ) -> List[CourseResponse]:
         """Get personalized recommendations (vector + content-based)"""
         try:
-            cache_key = f"rec_{user_id}_{hash(str(query))}_{max_results}"
-            if not force_refresh and cache_key in self._cache:
-                cache_entry = self._cache[cache_key]
-                if datetime.now() - cache_entry['timestamp'] < timedelta(seconds=self._cache_ttl):
+            # Key on the user's data version from SQLite, which every write bumps,
+            # so results computed from older feedback/preferences are never served,
+            # whichever worker process took the write. Contexts from the user
+            # context loader already carry it
+            version = user_context.get('version') if user_context else None
+            if version is None:
+                version = await get_user_version_async(user_id)
+            cache_key = (user_id, version, query, max_results)
+            if not force_refresh:
+                cached = self._cache.get(cache_key)
+                if cached is not None:
                     logger.info(f"Returning cached recommendations for user {user_id}")
-                    return cache_entry['data']
-                else:
-                    del self._cache[cache_key]
+                    return cached
             
             if force_refresh and user_context:
                 logger.info(f"Force refreshing recommendations for user {user_id}")
             
-            vector_courses = await self._get_vector_recommendations(user_id, query, user_context)
-            content_courses = await self._get_content_based_recommendations(user_id, query, user_context)
+            timings: Dict[str, float] = {}
+            started = time.perf_counter()
+            context = await RecommendationContext.build(user_id, query, user_context)
+            timings['context'] = (time.perf_counter() - started) * 1000
+            stage_started = time.perf_counter()
+            sources = await asyncio.gather(
+                self._run_source('vector', self._get_vector_recommendations(context), timings),
+                self._run_source('content', self._get_content_based_recommendations(context), timings)
+            )
+            timings['candidates'] = (time.perf_counter() - stage_started) * 1000
+            if all(courses is None for courses in sources):
+                logger.warning(f"All candidate sources failed for user {user_id}, using fallback")
+                return await self._get_fallback_recommendations(max_results)
+            vector_courses, content_courses = (courses or [] for courses in sources)
             
+            stage_started = time.perf_counter()
             combined_courses = self._combine_recommendations(vector_courses, content_courses)
-            scored_courses = await self._score_courses(combined_courses, user_context, user_id)
+            scored_courses = self._score_courses(combined_courses, context)
             scored_courses.sort(key=lambda x: x[1], reverse=True)
+            timings['scoring'] = (time.perf_counter() - stage_started) * 1000
             
             recommendations: List[CourseResponse] = []
             for course, score in scored_courses[:max_results]:
@@ -60,54 +100,82 @@ class RecommendationEngine:
                 course_response.similarity_score = round(score, 3)
                 recommendations.append(course_response)
             
-            logger.info(f"Generated {len(recommendations)} recommendations for user {user_id}")
+            timings['total'] = (time.perf_counter() - started) * 1000
+            self._record_timings(timings)
+            stages = ", ".join(f"{stage} {ms:.1f}ms" for stage, ms in timings.items() if stage != 'total')
+            logger.info(f"Generated {len(recommendations)} recommendations for user {user_id} in {timings['total']:.1f}ms ({stages})")
             
-            self._cache[cache_key] = {
-                'data': recommendations,
-                'timestamp': datetime.now()
-            }
+            self._cache.set(cache_key, recommendations, tags=(user_id,))
             
             return recommendations
         except Exception as e:
             logger.error(f"Error generating recommendations: {e}")
             return await self._get_fallback_recommendations(max_results)
     
-    async def _get_vector_recommendations(
-        self,
-        user_id: int,
-        query: Optional[str],
-        user_context: Dict[str, Any]
-    ) -> List[Dict[str, Any]]:
+    def invalidate_user(self, user_id: int) -> None:
+        """Drop cached recommendations after the user's data changed"""
+        removed = self._cache.invalidate_tag(user_id)
+        if removed:
+            logger.info(f"Invalidated {removed} cached recommendation sets for user {user_id}")
+    
+    def cache_stats(self) -> Dict[str, Any]:
+        """Recommendation cache size and hit/miss/eviction counters"""
+        return self._cache.stats()
+    
+    async def _run_source(self, name: str, source, timings: Dict[str, float]) -> Optional[List[Dict[str, Any]]]:
+        """Await one candidate source with its timeout; None means it failed or timed out"""
+        started = time.perf_counter()
+        try:
+            return await asyncio.wait_for(source, timeout=self.source_timeouts[name])
+        except asyncio.TimeoutError:
+            self._source_failures[name] += 1
+            logger.warning(f"{name} candidate source timed out after {self.source_timeouts[name]}s, continuing without it")
+            return None
+        except Exception as e:
+            self._source_failures[name] += 1
+            logger.error(f"Error in {name} candidate source: {e}")
+            return None
+        finally:
+            timings[name] = (time.perf_counter() - started) * 1000
+    
+    def _record_timings(self, timings: Dict[str, float]) -> None:
+        """Accumulate per-stage latency statistics"""
+        for stage, ms in timings.items():
+            stats = self._stage_stats.setdefault(stage, {'count': 0, 'total_ms': 0.0, 'max_ms': 0.0})
+            stats['count'] += 1
+            stats['total_ms'] += ms
+            stats['max_ms'] = max(stats['max_ms'], ms)
+    
+    def stage_stats(self) -> Dict[str, Any]:
+        """Mean/max latency per recommendation stage and candidate source failures"""
+        return {
+            'stages': {
+                stage: {
+                    'count': int(stats['count']),
+                    'mean_ms': round(stats['total_ms'] / stats['count'], 2),
+                    'max_ms': round(stats['max_ms'], 2)
+                }
+                for stage, stats in self._stage_stats.items()
+            },
+            'source_failures': dict(self._source_failures)
+        }
+    
+    async def _get_vector_recommendations(self, context: RecommendationContext) -> List[Dict[str, Any]]:
         """Get candidates using vector search"""
         try:
+            parsed = context.parsed_query
             search_queries: List[str] = []
             exclude_topics: List[str] = []
             
-            if query:
-                search_queries.append(query)
-                negative_patterns = [
-                    r"don't want to learn ([^,.!?]+)",
-                    r"not interested in ([^,.!?]+)",
-                    r"avoid ([^,.!?]+)",
-                    r"but not ([^,.!?]+)",
-                    r"except ([^,.!?]+)",
-                    r"without ([^,.!?]+)",
-                    r"no ([^,.!?]+)",
-                    r"I don't like ([^,.!?]+)"
-                ]
-                
-                query_lower = query.lower()
-                for pattern in negative_patterns:
-                    matches = re.findall(pattern, query_lower)
-                    for match in matches:
-                        keywords = [word.strip() for word in match.split() if word.strip()]
-                        exclude_topics.extend(keywords)
+            if parsed:
+                search_queries.append(parsed.clean_text)
+                exclude_topics.extend(parsed.negative_keywords)
             
-            if user_context and user_context.get('preferences'):
-                prefs = user_context['preferences']
+            prefs = context.preferences
+            if prefs:
                 if prefs.get('topics'):
                     topics_text = ' '.join(prefs['topics'])
-                    search_queries.append(f"courses about {topics_text}")
+                    search_queries.append(query_parser.expand(f"courses about {topics_text}"))
                 
                 style_text = ""
                 if prefs.get('learning_style'):
@@ -115,34 +183,23 @@ class RecommendationEngine:
                 if prefs.get('difficulty'):
                     style_text += f" {prefs['difficulty']} level"
                 if style_text.strip():
-                    search_queries.append(style_text.strip())
+                    search_queries.append(query_parser.expand(style_text.strip()))
             
-            if user_context and user_context.get('recent_feedback'):
-                positive_feedback = [f for f in user_context['recent_feedback'] if f.get('rating', 0) >= 4]
-                current_prefs = user_context.get('preferences', {})
-                if current_prefs.get('topics'):
-                    logger.info(f"User {user_id} current preferences: {current_prefs['topics']}")
-                if positive_feedback:
-                    for feedback in positive_feedback[:3]:
-                        course_id = feedback.get('course_id')
-                        if course_id:
-                            course = execute_query(
-                                "SELECT title, description, topics FROM courses WHERE id = ?",
-                                (course_id,),
-                                fetch_one=True
-                            )
-                            if course:
-                                topics = json.loads(course[2]) if course[2] else []
-                                search_text = f"{course[0]} {' '.join(topics)}"
-                                search_queries.append(search_text)
+            if context.positive_feedback:
+                if prefs.get('topics'):
+                    logger.info(f"User {context.user_id} current preferences: {prefs['topics']}")
+                for course in context.positive_courses(limit=3):
+                    search_queries.append(query_parser.expand(f"{course['title']} {' '.join(course['topics'])}"))
             
             combined_query = ' '.join(search_queries[:3]) if search_queries else "programming software development technology"
             
-            vector_results = weaviate_service.search_similar_courses(
+            vector_results = await weaviate_service.search_similar_courses_async(
                 combined_query,
                 limit=max(15, self.max_recommendations * 2),
                 min_certainty=0.4,
-                exclude_topics=exclude_topics
+                exclude_topics=exclude_topics,
+                executor=candidate_executor,
+                parse_query=False
             )
             
             candidates: List[Dict[str, Any]] = []
@@ -165,65 +222,44 @@ class RecommendationEngine:
             logger.error(f"Error in vector recommendations: {e}")
             return []
     
-    async def _get_content_based_recommendations(
-        self,
-        user_id: int,
-        query: Optional[str],
-        user_context: Dict[str, Any]
-    ) -> List[Dict[str, Any]]:
+    async def _get_content_based_recommendations(self, context: RecommendationContext) -> List[Dict[str, Any]]:
         """Get candidates using content-based filtering"""
         try:
-            completed_courses = execute_query(
-                "SELECT DISTINCT course_id FROM course_interactions WHERE user_id = ? AND interaction_type IN ('completed', 'dropped')",
-                (user_id,)
-            )
-            completed_ids = [c[0] for c in completed_courses]
+            user_id = context.user_id
+            if context.excluded_course_ids is not None:
+                exclude_ids = set(context.excluded_course_ids)
+            else:
+                completed_courses = await execute_query_async(
+                    "SELECT DISTINCT course_id FROM course_interactions WHERE user_id = ? AND interaction_type IN ('completed', 'dropped')",
+                    (user_id,)
+                )
+                completed_ids = [c[0] for c in completed_courses]
+                
+                low_rated = await execute_query_async(
+                    "SELECT course_id FROM user_feedback WHERE user_id = ? AND rating <= 2",
+                    (user_id,)
+                )
+                low_rated_ids = [c[0] for c in low_rated]
+                
+                exclude_ids = set(completed_ids + low_rated_ids)
             
-            low_rated = execute_query(
-                "SELECT course_id FROM user_feedback WHERE user_id = ? AND rating <= 2",
-                (user_id,)
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(
+                candidate_executor, self._collect_content_candidates, context.catalog, exclude_ids, context.query
             )
-            low_rated_ids = [c[0] for c in low_rated]
-            
-            exclude_ids = set(completed_ids + low_rated_ids)
-            
-            base_query = "SELECT id, title, description, topics, difficulty, duration, format, rating FROM courses"
-            params: List[Any] = []
-            conditions: List[str] = []
-            
-            if query:
-                conditions.append("(title LIKE ? OR description LIKE ? OR topics LIKE ?)")
-                params.extend([f"%{query}%", f"%{query}%", f"%{query}%"])
-            
-            if exclude_ids:
-                placeholders = ",".join("?" * len(exclude_ids))
-                conditions.append(f"id NOT IN ({placeholders})")
-                params.extend(list(exclude_ids))
-            
-            if conditions:
-                base_query += " WHERE " + " AND ".join(conditions)
-            
-            courses = execute_query(base_query, tuple(params))
-            
-            candidates: List[Dict[str, Any]] = []
-            for course in courses:
-                candidates.append({
-                    'id': course[0],
-                    'title': course[1],
-                    'description': course[2],
-                    'topics': json.loads(course[3]) if course[3] else [],
-                    'difficulty': course[4],
-                    'duration': course[5],
-                    'format': course[6],
-                    'rating': course[7],
-                    'vector_similarity': 0.0
-                })
-            
-            return candidates
         except Exception as e:
             logger.error(f"Error in content-based recommendations: {e}")
             return []
     
+    def _collect_content_candidates(self, catalog, exclude_ids, query: Optional[str]) -> List[Dict[str, Any]]:
+        """Catalog courses matching the query, minus excluded ones"""
+        candidates: List[Dict[str, Any]] = []
+        for row in catalog.rows(exclude_ids=exclude_ids, text=query):
+            course = catalog.course_dict(int(row))
+            course['vector_similarity'] = 0.0
+            candidates.append(course)
+        return candidates
+    
     def _combine_recommendations(
         self,
         vector_courses: List[Dict[str, Any]],
@@ -242,145 +278,18 @@ class RecommendationEngine:
                 combined[course_id]['source'] = 'content'
         return list(combined.values())
     
-    async def _score_courses(
-        self,
-        courses: List[Dict],
-        user_context: Dict[str, Any],
-        user_id: int
-    ) -> List[Tuple[Dict, float]]:
+    def _score_courses(self, courses: List[Dict], context: RecommendationContext) -> List[Tuple[Dict, float]]:
         """Score courses combining rating, vector similarity, and preference fit"""
         try:
-            if not user_context:
-                return [(course, course['rating'] / 5.0 + course.get('vector_similarity', 0.0) * 0.5) for course in courses]
-            
-            preferences = user_context.get('preferences', {})
-            preferred_topics = preferences.get('topics', [])
-            preferred_difficulty = preferences.get('difficulty')
-            preferred_learning_style = preferences.get('learning_style')
-            
-            positive_topics = self._extract_positive_topic_patterns(user_context)
-            
-            scored_courses: List[Tuple[Dict, float]] = []
-            for course in courses:
-                score = 0.0
-                base_score = course['rating'] / 5.0 * 0.2
-                score += base_score
-                vector_score = course.get('vector_similarity', 0.0) * 0.4
-                score += vector_score
-                topic_score = self._calculate_topic_score(
-                    course['topics'], preferred_topics, positive_topics
-                ) * 0.3
-                score += topic_score
-                difficulty_score = self._calculate_difficulty_score(
-                    course['difficulty'], preferred_difficulty
-                ) * 0.1
-                score += difficulty_score
-                style_score = self._calculate_learning_style_score(
-                    course['format'], preferred_learning_style
-                ) * 0.05
-                score += style_score
-                diversity_score = self._calculate_diversity_score(
-                    course['topics'], preferred_topics
-                ) * 0.05
-                score += diversity_score
-                if course.get('source') == 'vector':
-                    score += 0.02
-                scored_courses.append((course, score))
-            return scored_courses
+            if not context.has_user_context:
+                scores = score_courses(courses, None, [])
+            else:
+                scores = score_courses(courses, context.preferences, context.positive_topics)
+            return [(course, float(score)) for course, score in zip(courses, scores)]
         except Exception as e:
             logger.error(f"Error in scoring: {e}")
             return [(course, course['rating'] / 5.0) for course in courses]
     
-    def _calculate_topic_score(
-        self,
-        course_topics: List[str],
-        preferred_topics: List[str],
-        positive_topics: List[str]
-    ) -> float:
-        """Topic scoring with positive feedback weighting"""
-        if not course_topics:
-            return 0.0
-        score = 0.0
-        total_weight = 0.0
-        for topic in course_topics:
-            if topic.lower() in [p.lower() for p in preferred_topics]:
-                score += 1.0
-            total_weight += 1.0
-        positive_counter = Counter([t.lower() for t in positive_topics])
-        for topic in course_topics:
-            topic_lower = topic.lower()
-            if topic_lower in positive_counter:
-                frequency_weight = min(positive_counter[topic_lower] / 3.0, 0.8)
-                score += frequency_weight
-        return min(score / max(len(course_topics), 1), 1.0)
-    
-    def _calculate_difficulty_score(self, course_difficulty: str, preferred_difficulty: Optional[str]) -> float:
-        """Difficulty preference score"""
-        if not preferred_difficulty or not course_difficulty:
-            return 0.5
-        if course_difficulty.lower() == preferred_difficulty.lower():
-            return 1.0
-        difficulty_levels = ['beginner', 'intermediate', 'advanced']
-        try:
-            course_idx = difficulty_levels.index(course_difficulty.lower())
-            preferred_idx = difficulty_levels.index(preferred_difficulty.lower())
-            distance = abs(course_idx - preferred_idx)
-            if distance == 0:
-                return 1.0
-            elif distance == 1:
-                return 0.7
-            else:
-                return 0.3
-        except ValueError:
-            return 0.5
-    
-    def _calculate_learning_style_score(self, course_format: str, preferred_style: Optional[str]) -> float:
-        """Learning style compatibility score"""
-        if not preferred_style or not course_format:
-            return 0.5
-        format_style_map = {
-            'hands-on': ['hands-on', 'practical', 'project-based', 'interactive'],
-            'video': ['visual', 'auditory', 'multimedia'],
-            'interactive': ['hands-on', 'visual', 'engaging'],
-            'text': ['reading', 'theoretical', 'self-paced'],
-            'live': ['interactive', 'collaborative', 'social'],
-            'project-based': ['hands-on', 'practical', 'applied']
-        }
-        preferred_lower = preferred_style.lower()
-        course_format_lower = course_format.lower()
-        if preferred_lower in course_format_lower:
-            return 1.0
-        for format_key, compatible_styles in format_style_map.items():
-            if format_key in course_format_lower:
-                if any(style in preferred_lower for style in compatible_styles):
-                    return 0.8
-        return 0.4
-    
-    def _calculate_diversity_score(self, course_topics: List[str], preferred_topics: List[str]) -> float:
-        """Small bonus for exploring topics beyond current preferences"""
-        if not course_topics or not preferred_topics:
-            return 0.2
-        new_topics = [t for t in course_topics if t.lower() not in [p.lower() for p in preferred_topics]]
-        diversity_ratio = len(new_topics) / len(course_topics)
-        return diversity_ratio * 0.5
-    
-    def _extract_positive_topic_patterns(self, user_context: Dict[str, Any]) -> List[str]:
-        """Extract topics from positively-rated courses"""
-        positive_topics: List[str] = []
-        for feedback in user_context.get('recent_feedback', []):
-            if feedback.get('rating', 0) >= 4:
-                course_id = feedback.get('course_id')
-                if course_id:
-                    course = execute_query(
-                        "SELECT topics FROM courses WHERE id = ?",
-                        (course_id,),
-                        fetch_one=True
-                    )
-                    if course and course[0]:
-                        topics = json.loads(course[0])
-                        positive_topics.extend(topics)
-        return positive_topics
-    
     async def get_similar_courses_vector(
         self,
         course_id: str,
@@ -388,19 +297,16 @@ class RecommendationEngine:
     ) -> List[CourseResponse]:
         """Get similar courses via vector similarity"""
         try:
-            target_course = execute_query(
-                "SELECT title, description, topics FROM courses WHERE id = ?",
-                (course_id,),
-                fetch_one=True
-            )
+            catalog = await course_catalog.snapshot_async()
+            target_course = catalog.get(course_id)
             if not target_course:
                 return []
-            topics = json.loads(target_course[2]) if target_course[2] else []
-            search_query = f"{target_course[0]} {target_course[1]} {' '.join(topics)}"
-            similar_courses = weaviate_service.search_similar_courses(
+            search_query = f"{target_course['title']} {target_course['description']} {' '.join(target_course['topics'])}"
+            similar_courses = await weaviate_service.search_similar_courses_async(
                 search_query,
                 limit=max_results + 1,
-                min_certainty=0.4
+                min_certainty=0.4,
+                executor=candidate_executor
             )
             result: List[CourseResponse] = []
             for course in similar_courses:
@@ -427,22 +333,12 @@ class RecommendationEngine:
     async def _get_fallback_recommendations(self, max_results: int) -> List[CourseResponse]:
         """Fallback based on top-rated courses"""
         try:
-            courses = execute_query(
-                "SELECT id, title, description, topics, difficulty, duration, format, rating FROM courses ORDER BY rating DESC LIMIT ?",
-                (max_results,)
-            )
+            catalog = await course_catalog.snapshot_async()
             result: List[CourseResponse] = []
-            for course in courses:
+            for course in catalog.top_rated(max_results):
                 result.append(CourseResponse(
-                    id=course[0],
-                    title=course[1],
-                    description=course[2],
-                    topics=json.loads(course[3]) if course[3] else [],
-                    difficulty=course[4],
-                    duration=course[5],
-                    format=course[6],
-                    rating=course[7],
-                    similarity_score=course[7] / 5.0
+                    **course,
+                    similarity_score=course['rating'] / 5.0
                 ))
             return result
         except Exception as e:
@@ -450,4 +346,5 @@ class RecommendationEngine:
             return []
 
 # Global instance
-recommendation_engine = RecommendationEngine() 
\ No newline at end of file
+recommendation_engine = RecommendationEngine()
+register_user_invalidation_hook(recommendation_engine.invalidate_user)
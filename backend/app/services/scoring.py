@@ -0,0 +1,206 @@
+from typing import List, Dict, Any, Optional
+from collections import Counter
+
+import numpy as np
+
+# Component weights of the personalized score
+RATING_WEIGHT = 0.2
+VECTOR_WEIGHT = 0.4
+TOPIC_WEIGHT = 0.3
+DIFFICULTY_WEIGHT = 0.1
+STYLE_WEIGHT = 0.05
+DIVERSITY_WEIGHT = 0.05
+VECTOR_SOURCE_BONUS = 0.02
+
+DIFFICULTY_LEVELS = ['beginner', 'intermediate', 'advanced']
+DIFFICULTY_DISTANCE_SCORES = np.array([1.0, 0.7, 0.3])
+
+FORMAT_STYLE_MAP = {
+    'hands-on': ['hands-on', 'practical', 'project-based', 'interactive'],
+    'video': ['visual', 'auditory', 'multimedia'],
+    'interactive': ['hands-on', 'visual', 'engaging'],
+    'text': ['reading', 'theoretical', 'self-paced'],
+    'live': ['interactive', 'collaborative', 'social'],
+    'project-based': ['hands-on', 'practical', 'applied']
+}
+
+
+# Scalar scoring: one course at a time. This is the reference definition of
+# every component; the batched kernel below must reproduce it exactly.
+
+def topic_score(course_topics: List[str], preferred_topics: List[str], positive_topics: List[str]) -> float:
+    """Topic scoring with positive feedback weighting"""
+    if not course_topics:
+        return 0.0
+    score = 0.0
+    total_weight = 0.0
+    for topic in course_topics:
+        if topic.lower() in [p.lower() for p in preferred_topics]:
+            score += 1.0
+        total_weight += 1.0
+    positive_counter = Counter([t.lower() for t in positive_topics])
+    for topic in course_topics:
+        topic_lower = topic.lower()
+        if topic_lower in positive_counter:
+            frequency_weight = min(positive_counter[topic_lower] / 3.0, 0.8)
+            score += frequency_weight
+    return min(score / max(len(course_topics), 1), 1.0)
+
+def difficulty_score(course_difficulty: str, preferred_difficulty: Optional[str]) -> float:
+    """Difficulty preference score"""
+    if not preferred_difficulty or not course_difficulty:
+        return 0.5
+    if course_difficulty.lower() == preferred_difficulty.lower():
+        return 1.0
+    try:
+        course_idx = DIFFICULTY_LEVELS.index(course_difficulty.lower())
+        preferred_idx = DIFFICULTY_LEVELS.index(preferred_difficulty.lower())
+        distance = abs(course_idx - preferred_idx)
+        if distance == 0:
+            return 1.0
+        elif distance == 1:
+            return 0.7
+        else:
+            return 0.3
+    except ValueError:
+        return 0.5
+
+def learning_style_score(course_format: str, preferred_style: Optional[str]) -> float:
+    """Learning style compatibility score"""
+    if not preferred_style or not course_format:
+        return 0.5
+    preferred_lower = preferred_style.lower()
+    course_format_lower = course_format.lower()
+    if preferred_lower in course_format_lower:
+        return 1.0
+    for format_key, compatible_styles in FORMAT_STYLE_MAP.items():
+        if format_key in course_format_lower:
+            if any(style in preferred_lower for style in compatible_styles):
+                return 0.8
+    return 0.4
+
+def diversity_score(course_topics: List[str], preferred_topics: List[str]) -> float:
+    """Small bonus for exploring topics beyond current preferences"""
+    if not course_topics or not preferred_topics:
+        return 0.2
+    new_topics = [t for t in course_topics if t.lower() not in [p.lower() for p in preferred_topics]]
+    diversity_ratio = len(new_topics) / len(course_topics)
+    return diversity_ratio * 0.5
+
+def score_course(course: Dict[str, Any], preferences: Dict[str, Any], positive_topics: List[str]) -> float:
+    """Personalized score of a single course"""
+    preferred_topics = preferences.get('topics', [])
+    score = 0.0
+    score += course['rating'] / 5.0 * RATING_WEIGHT
+    score += course.get('vector_similarity', 0.0) * VECTOR_WEIGHT
+    score += topic_score(course['topics'], preferred_topics, positive_topics) * TOPIC_WEIGHT
+    score += difficulty_score(course['difficulty'], preferences.get('difficulty')) * DIFFICULTY_WEIGHT
+    score += learning_style_score(course['format'], preferences.get('learning_style')) * STYLE_WEIGHT
+    score += diversity_score(course['topics'], preferred_topics) * DIVERSITY_WEIGHT
+    if course.get('source') == 'vector':
+        score += VECTOR_SOURCE_BONUS
+    return score
+
+
+# Batched scoring: encode all candidates as arrays and compute every
+# component in one pass. Operations are ordered like the scalar code so the
+# float64 results are bit-for-bit identical.
+
+def _difficulty_codes(values: List[Optional[str]]) -> np.ndarray:
+    """Ordinal difficulty codes, -1 for unknown levels"""
+    lookup = {level: i for i, level in enumerate(DIFFICULTY_LEVELS)}
+    return np.array([lookup.get(v.lower(), -1) if v else -1 for v in values], dtype=np.int8)
+
+def score_courses(
+    courses: List[Dict[str, Any]],
+    preferences: Optional[Dict[str, Any]],
+    positive_topics: List[str]
+) -> np.ndarray:
+    """Personalized scores for many courses at once (float64 array)"""
+    n = len(courses)
+    if n == 0:
+        return np.zeros(0)
+    ratings = np.array([course['rating'] for course in courses], dtype=np.float64)
+    vector_similarity = np.array([course.get('vector_similarity', 0.0) for course in courses], dtype=np.float64)
+
+    if preferences is None:
+        # No user context: rating plus half the vector similarity
+        return ratings / 5.0 + vector_similarity * 0.5
+
+    preferred_topics = preferences.get('topics', []) or []
+    preferred_difficulty = preferences.get('difficulty')
+    preferred_style = preferences.get('learning_style')
+
+    # Topic multi-hot matrix in COO form: one entry per (course, topic position)
+    topic_vocab: Dict[str, int] = {}
+    entry_course: List[int] = []
+    entry_position: List[int] = []
+    entry_topic: List[int] = []
+    for i, course in enumerate(courses):
+        for position, topic in enumerate(course['topics'] or []):
+            entry_course.append(i)
+            entry_position.append(position)
+            entry_topic.append(topic_vocab.setdefault(topic.lower(), len(topic_vocab)))
+    entry_course_arr = np.array(entry_course, dtype=np.int64)
+    entry_position_arr = np.array(entry_position, dtype=np.int64)
+    entry_topic_arr = np.array(entry_topic, dtype=np.int64)
+    topic_counts = np.bincount(entry_course_arr, minlength=n)
+
+    preferred_lower = {p.lower() for p in preferred_topics}
+    positive_counter = Counter([t.lower() for t in positive_topics])
+    vocab_preferred = np.zeros(len(topic_vocab), dtype=bool)
+    vocab_positive = np.zeros(len(topic_vocab), dtype=np.float64)
+    for topic, index in topic_vocab.items():
+        vocab_preferred[index] = topic in preferred_lower
+        if topic in positive_counter:
+            vocab_positive[index] = min(positive_counter[topic] / 3.0, 0.8)
+    entry_preferred = vocab_preferred[entry_topic_arr]
+
+    # Topic score: preferred matches first, then positive-feedback weights in tag order
+    topic = np.bincount(entry_course_arr, weights=entry_preferred.astype(np.float64), minlength=n)
+    entry_positive = vocab_positive[entry_topic_arr]
+    for position in range(int(entry_position_arr.max(initial=-1)) + 1):
+        at_position = entry_position_arr == position
+        topic[entry_course_arr[at_position]] += entry_positive[at_position]
+    has_topics = topic_counts > 0
+    topic = np.where(has_topics, np.minimum(topic / np.maximum(topic_counts, 1), 1.0), 0.0)
+
+    # Difficulty: exact (case-insensitive) match, else ordinal distance between known levels
+    difficulties = [course['difficulty'] for course in courses]
+    if preferred_difficulty:
+        course_codes = _difficulty_codes(difficulties)
+        preferred_code = _difficulty_codes([preferred_difficulty])[0]
+        same = np.array([bool(d) and d.lower() == preferred_difficulty.lower() for d in difficulties])
+        known = (course_codes >= 0) & (preferred_code >= 0)
+        distance = np.abs(course_codes.astype(np.int64) - int(preferred_code))
+        difficulty = np.where(known, DIFFICULTY_DISTANCE_SCORES[np.minimum(distance, 2)], 0.5)
+        difficulty = np.where(same, 1.0, difficulty)
+        missing = np.array([not d for d in difficulties])
+        difficulty = np.where(missing, 0.5, difficulty)
+    else:
+        difficulty = np.full(n, 0.5)
+
+    # Learning style depends only on the format string: score each distinct format once
+    formats = [course['format'] or '' for course in courses]
+    unique_formats, format_codes = np.unique(np.array(formats, dtype=object), return_inverse=True)
+    format_scores = np.array([learning_style_score(f, preferred_style) for f in unique_formats])
+    style = format_scores[format_codes.reshape(-1)]
+
+    # Diversity: share of topics outside the preferences
+    if preferred_topics:
+        new_topic_counts = np.bincount(entry_course_arr, weights=(~entry_preferred).astype(np.float64), minlength=n)
+        diversity = np.where(has_topics, new_topic_counts / np.maximum(topic_counts, 1) * 0.5, 0.2)
+    else:
+        diversity = np.full(n, 0.2)
+
+    vector_source = np.array([course.get('source') == 'vector' for course in courses])
+
+    score = np.zeros(n)
+    score += ratings / 5.0 * RATING_WEIGHT
+    score += vector_similarity * VECTOR_WEIGHT
+    score += topic * TOPIC_WEIGHT
+    score += difficulty * DIFFICULTY_WEIGHT
+    score += style * STYLE_WEIGHT
+    score += diversity * DIVERSITY_WEIGHT
+    score[vector_source] += VECTOR_SOURCE_BONUS
+    return score
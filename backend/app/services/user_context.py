@@ -0,0 +1,110 @@
+import json
+import logging
+from typing import List, Dict, Any, Optional
+
+from ..config import settings
+from ..database import execute_query_async, get_user_version_async
+from .cache import LRUCache, register_user_invalidation_hook
+
+logger = logging.getLogger(__name__)
+
+# Everything the recommendation pipeline needs about a user, in one statement.
+# Each column is a JSON document so the whole profile comes back as one row,
+# together with the data version it was read at.
+USER_PROFILE_QUERY = """
+    SELECT
+        COALESCE((SELECT version FROM user_versions WHERE user_id = :user_id), 0),
+        (SELECT json_array(preferred_topics, difficulty_level, learning_style, time_commitment)
+         FROM user_preferences WHERE user_id = :user_id),
+        (SELECT json_group_array(json_array(course_id, rating, feedback_text, learning_style, difficulty_preference))
+         FROM (SELECT course_id, rating, feedback_text, learning_style, difficulty_preference
+               FROM user_feedback WHERE user_id = :user_id
+               ORDER BY created_at DESC LIMIT 10)),
+        (SELECT json_group_array(json_array(course_id, interaction_type, created_at))
+         FROM (SELECT course_id, interaction_type, created_at
+               FROM course_interactions WHERE user_id = :user_id
+               ORDER BY created_at DESC LIMIT 20)),
+        (SELECT json_group_array(course_id)
+         FROM (SELECT DISTINCT course_id FROM course_interactions
+               WHERE user_id = :user_id AND interaction_type IN ('completed', 'dropped')
+               UNION
+               SELECT course_id FROM user_feedback WHERE user_id = :user_id AND rating <= 2))
+"""
+
+EMPTY_PREFERENCES = {"topics": [], "difficulty": None, "learning_style": None, "time_commitment": None}
+
+
+class UserContextLoader:
+    """Loads and caches the per-user context used for recommendations.
+
+    Contexts carry the user's data version from SQLite (user_versions, bumped
+    by every feedback, preferences or interaction write), read in the same
+    statement as the data. A cached context is served only while that
+    version is current, so writes made by other worker processes are seen
+    too, and downstream caches can include the version in their keys.
+    """
+
+    def __init__(self, max_entries: int = 4096, ttl: float = 300.0):
+        self._cache = LRUCache(max_entries=max_entries, ttl=ttl, name="user_context")
+
+    def invalidate(self, user_id: int) -> None:
+        """Drop the cached context early after a write in this process"""
+        self._cache.delete(user_id)
+
+    async def get(self, user_id: int) -> Dict[str, Any]:
+        """Cached context for a user, loading it if missing or stale"""
+        context = self._cache.get(user_id)
+        if context is not None and context["version"] == await get_user_version_async(user_id):
+            return context
+        context = await self.load(user_id)
+        self._cache.set(user_id, context)
+        return context
+
+    async def load(self, user_id: int) -> Dict[str, Any]:
+        """Read the user's context from SQLite in one query"""
+        row = await execute_query_async(USER_PROFILE_QUERY, {"user_id": user_id}, fetch_one=True)
+        preferences = json.loads(row[1]) if row[1] else None
+        recent_feedback = json.loads(row[2]) if row[2] else []
+        recent_interactions = json.loads(row[3]) if row[3] else []
+        excluded_course_ids = json.loads(row[4]) if row[4] else []
+        return {
+            "user_id": user_id,
+            "version": row[0],
+            "preferences": {
+                "topics": json.loads(preferences[0]) if preferences[0] else [],
+                "difficulty": preferences[1],
+                "learning_style": preferences[2],
+                "time_commitment": preferences[3]
+            } if preferences else dict(EMPTY_PREFERENCES),
+            "recent_feedback": [
+                {
+                    "course_id": f[0],
+                    "rating": f[1],
+                    "feedback_text": f[2],
+                    "learning_style": f[3],
+                    "difficulty_preference": f[4]
+                }
+                for f in recent_feedback
+            ],
+            "recent_interactions": [
+                {
+                    "course_id": i[0],
+                    "interaction_type": i[1],
+                    "created_at": str(i[2])
+                }
+                for i in recent_interactions
+            ],
+            "excluded_course_ids": excluded_course_ids
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        """Context cache counters"""
+        return self._cache.stats()
+
+
+# Global instance
+user_context_loader = UserContextLoader(
+    max_entries=settings.USER_CONTEXT_CACHE_MAX_ENTRIES,
+    ttl=settings.USER_CONTEXT_CACHE_TTL
+)
+register_user_invalidation_hook(user_context_loader.invalidate)
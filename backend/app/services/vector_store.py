@@ -0,0 +1,353 @@
+import abc
+import fcntl
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, List, Dict, Any, Optional, Sequence, Tuple
+
+import numpy as np
+from weaviate.classes.query import Filter
+
+from ..config import settings
+from .course_indexer import (
+    ProgressCallback, count_courses, course_content_text, course_properties, iter_course_chunks, title_tokens
+)
+
+logger = logging.getLogger(__name__)
+
+# (course properties, cosine distance)
+SearchHit = Tuple[Dict[str, Any], float]
+
+# Properties returned to callers (the embedded text and filter fields stay in the index)
+RESULT_PROPERTIES = ["courseId", "title", "description", "topics", "difficulty", "duration", "format", "rating"]
+
+# Fields negative keywords are matched against, exactly and lowercased
+EXCLUSION_PROPERTIES = ["topicTags", "titleTokens"]
+
+
+def exclusion_terms(keywords: Sequence[str]) -> List[str]:
+    """Normalized negative keywords; very short ones are ignored"""
+    return sorted({keyword.lower().strip() for keyword in keywords if len(keyword.strip()) >= 3})
+
+def matches_exclusions(properties: Dict[str, Any], terms: Sequence[str]) -> bool:
+    """Whether a course is tagged with, or has a title word equal to, any exclusion term"""
+    if not terms:
+        return False
+    topics = properties.get('topics') or []
+    tokens = {topic.lower().strip() for topic in topics} | set(title_tokens(properties.get('title')))
+    return any(term in tokens for term in terms)
+
+def exclusion_filter(terms: Sequence[str]):
+    """Weaviate filter keeping only courses that match none of the terms"""
+    return Filter.all_of([Filter.by_property(name).contains_none(list(terms)) for name in EXCLUSION_PROPERTIES])
+
+def fetch_until_enough(
+    fetch: Callable[[int], List[SearchHit]],
+    terms: Sequence[str],
+    limit: int,
+    max_fetch: int = settings.VECTOR_EXCLUSION_MAX_FETCH
+) -> List[SearchHit]:
+    """Filter exclusions client-side, fetching more only while results fall short.
+
+    Starts at twice the limit and doubles while excluded courses leave fewer
+    than `limit` hits and the backend still had more to give.
+    """
+    size = min(limit * 2, max(max_fetch, limit))
+    while True:
+        hits = fetch(size)
+        kept = [hit for hit in hits if not matches_exclusions(hit[0], terms)]
+        if len(kept) >= limit or len(hits) < size or size >= max_fetch:
+            return kept[:limit]
+        size = min(size * 2, max_fetch)
+
+
+def normalize(vector) -> np.ndarray:
+    vector = np.asarray(vector, dtype=np.float32)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+class VectorStore(abc.ABC):
+    """Backend answering nearest-neighbour queries over course vectors"""
+
+    name = "none"
+
+    def available(self) -> bool:
+        return False
+
+    @abc.abstractmethod
+    def search(
+        self, vector: List[float], limit: int, min_certainty: float, exclude: Sequence[str] = ()
+    ) -> List[SearchHit]:
+        """Up to `limit` closest courses to `vector`, nearest first, none matching the
+        `exclude` terms (see exclusion_terms)"""
+
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": self.name, "available": self.available()}
+
+
+class WeaviateVectorStore(VectorStore):
+    """Near-vector queries against the served Weaviate Course collection"""
+
+    name = "weaviate"
+
+    def __init__(self, service):
+        self.service = service
+        self.filtered_queries = 0
+        self.client_filtered_queries = 0
+
+    def available(self) -> bool:
+        return self.service.client is not None
+
+    def _query(self, vector: List[float], limit: int, min_certainty: float, filters=None) -> List[SearchHit]:
+        result = self.service.get_course_collection().query.near_vector(
+            near_vector=vector,
+            limit=limit,
+            distance=1.0 - min_certainty,  # Convert certainty to distance
+            filters=filters,
+            return_properties=RESULT_PROPERTIES,
+            return_metadata=["distance"]
+        )
+        return [
+            (obj.properties, obj.metadata.distance if obj.metadata.distance is not None else 1.0)
+            for obj in result.objects
+        ]
+
+    def search(
+        self, vector: List[float], limit: int, min_certainty: float, exclude: Sequence[str] = ()
+    ) -> List[SearchHit]:
+        if not exclude:
+            return self._query(vector, limit, min_certainty)
+        if self.service.exclusion_filters_supported():
+            self.filtered_queries += 1
+            return self._query(vector, limit, min_certainty, exclusion_filter(exclude))
+        # Collections indexed before the filter fields existed
+        self.client_filtered_queries += 1
+        return fetch_until_enough(lambda size: self._query(vector, size, min_certainty), exclude, limit)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **super().stats(),
+            "filtered_queries": self.filtered_queries,
+            "client_filtered_queries": self.client_filtered_queries
+        }
+
+
+class LocalIndex:
+    """One immutable build of the local index"""
+
+    def __init__(self, name: str, model: str, properties: List[Dict[str, Any]], hashes: List[str], vectors: np.ndarray):
+        self.name = name
+        self.model = model
+        self.properties = properties
+        self.hashes = hashes
+        self.vectors = vectors
+
+    def __len__(self) -> int:
+        return len(self.properties)
+
+
+class LocalVectorStore(VectorStore):
+    """In-process course index, so vector search works without Weaviate.
+
+    Search is always exact: one NumPy matrix product over every course
+    vector, a few milliseconds per query for catalogs of tens of thousands
+    of courses (see benchmarks/bench_vector_store.py). Each build is written
+    to its own subdirectory (unit vectors as a float32 file that is
+    memory-mapped on load, course properties and content hashes as JSON)
+    and `CURRENT` names the live build. `CURRENT` is replaced
+    atomically, so searches never see a half-written index.
+
+    Several processes can share the directory: builds hold an flock on
+    `.lock`, and every process maps the new build once it sees `CURRENT`
+    change.
+    """
+
+    name = "local"
+
+    def __init__(self, directory: Optional[str]):
+        self.directory = Path(directory) if directory else None
+        self._index: Optional[LocalIndex] = None
+        self._current_stat: Optional[Tuple[int, int]] = None
+        self._build_lock = threading.Lock()
+        self.searches = 0
+        self.load()
+
+    @property
+    def enabled(self) -> bool:
+        return self.directory is not None
+
+    def available(self) -> bool:
+        self.refresh()
+        index = self._index
+        return index is not None and len(index) > 0 and index.model == settings.EMBEDDING_MODEL
+
+    def _stat_current(self) -> Optional[Tuple[int, int]]:
+        try:
+            stat = os.stat(self.directory / "CURRENT")
+        except FileNotFoundError:
+            return None
+        return stat.st_ino, stat.st_mtime_ns
+
+    def refresh(self) -> None:
+        """Map a newer build if another process (or thread) has replaced CURRENT"""
+        if self.enabled and self._stat_current() != self._current_stat:
+            self.load()
+
+    @contextmanager
+    def _directory_lock(self):
+        """Exclusive lock shared with every process building into this directory"""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        with open(self.directory / ".lock", "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def load(self) -> None:
+        """Map the build named by CURRENT, if there is one"""
+        if not self.enabled:
+            return
+        current_stat = self._stat_current()
+        if current_stat is None:
+            return
+        try:
+            path = self.directory / (self.directory / "CURRENT").read_text().strip()
+            meta = json.loads((path / "courses.json").read_text())
+            vectors = np.memmap(path / "vectors.f32", dtype=np.float32, mode="r", shape=(meta["count"], meta["dim"]))
+            self._index = LocalIndex(path.name, meta["model"], meta["courses"], meta["hashes"], vectors)
+            self._current_stat = current_stat
+            logger.info(f"Loaded local vector index {path.name} with {meta['count']} courses")
+        except Exception as e:
+            logger.error(f"Error loading local vector index from {self.directory}: {e}")
+
+    def search(
+        self, vector: List[float], limit: int, min_certainty: float, exclude: Sequence[str] = ()
+    ) -> List[SearchHit]:
+        self.refresh()
+        index = self._index
+        if index is None or not len(index):
+            return []
+        self.searches += 1
+        query = normalize(vector)
+        distances = 1.0 - index.vectors @ query
+
+        def nearest(size: int) -> List[SearchHit]:
+            k = min(size, len(distances))
+            top = np.argpartition(distances, k - 1)[:k]
+            hits = [(float(distances[i]), int(i)) for i in top[np.argsort(distances[top])]]
+            return [(index.properties[i], distance) for distance, i in hits if 1.0 - distance >= min_certainty]
+
+        if not exclude:
+            return nearest(limit)
+        return fetch_until_enough(nearest, exclude, limit, max_fetch=len(index))
+
+    def sync(self, service, progress: Optional[ProgressCallback] = None) -> Dict[str, Any]:
+        """Rebuild from the course catalog, re-embedding only new or changed courses"""
+        if not self.enabled:
+            raise RuntimeError("Local vector index is disabled (LOCAL_INDEX_DIR is empty)")
+        with self._build_lock, self._directory_lock():
+            started = time.perf_counter()
+            # Start from the latest build, which another process may have written
+            self.refresh()
+            previous = self._index
+            known: Dict[str, Tuple[str, int]] = {}
+            if previous is not None and previous.model == settings.EMBEDDING_MODEL:
+                known = {props["courseId"]: (previous.hashes[row], row) for row, props in enumerate(previous.properties)}
+
+            total = count_courses()
+            done = 0
+            reused = 0
+            failed = 0
+            properties: List[Dict[str, Any]] = []
+            hashes: List[str] = []
+            vectors: List[np.ndarray] = []
+            for courses in iter_course_chunks(settings.INDEX_CHUNK_SIZE):
+                pending = []
+                for course in courses:
+                    text = course_content_text(course)
+                    props = course_properties(course, text)
+                    content_hash = props.pop("contentHash")
+                    props = {key: props[key] for key in RESULT_PROPERTIES}
+                    current = known.get(course['id'])
+                    if current and current[0] == content_hash:
+                        properties.append(props)
+                        hashes.append(content_hash)
+                        vectors.append(np.array(previous.vectors[current[1]]))
+                        reused += 1
+                    else:
+                        pending.append((props, content_hash, text))
+                if pending:
+                    embeddings = service.generate_embeddings([text for _, _, text in pending])
+                    for (props, content_hash, _), vector in zip(pending, embeddings):
+                        if not vector:
+                            failed += 1
+                            continue
+                        properties.append(props)
+                        hashes.append(content_hash)
+                        vectors.append(normalize(vector))
+                done += len(courses)
+                if progress:
+                    progress(done, max(total, done))
+
+            changed = previous is None or reused != len(previous) or len(properties) != reused
+            if properties and changed:
+                self._write(np.vstack(vectors), properties, hashes)
+            seconds = time.perf_counter() - started
+            report = {
+                "total": done,
+                "indexed": len(properties),
+                "embedded": len(properties) - reused,
+                "reused": reused,
+                "failed": failed,
+                "written": bool(properties and changed),
+                "seconds": round(seconds, 3)
+            }
+            logger.info(f"Synced local vector index: {report}")
+            return report
+
+    def _write(self, matrix: np.ndarray, properties: List[Dict[str, Any]], hashes: List[str]) -> None:
+        """Write a new build and point CURRENT at it. Call under the directory lock"""
+        replaced = self._index.name if self._index is not None else None
+        stamp = int(time.time() * 1000)
+        while (self.directory / f"index-{stamp}").exists():
+            stamp += 1
+        name = f"index-{stamp}"
+        path = self.directory / name
+        path.mkdir(parents=True)
+        matrix.astype(np.float32).tofile(path / "vectors.f32")
+        (path / "courses.json").write_text(json.dumps({
+            "model": settings.EMBEDDING_MODEL,
+            "count": len(matrix),
+            "dim": matrix.shape[1],
+            "courses": properties,
+            "hashes": hashes
+        }))
+        pointer = self.directory / "CURRENT.tmp"
+        pointer.write_text(name)
+        os.replace(pointer, self.directory / "CURRENT")
+        self.load()
+        # Keep the replaced build: other processes may have read CURRENT just
+        # before the swap and not mapped it yet. Anything older (or left by a
+        # crashed build) is only held by processes that already mapped it,
+        # and mappings survive unlinking
+        for old in self.directory.glob("index-*"):
+            if old.name not in (name, replaced):
+                shutil.rmtree(old, ignore_errors=True)
+
+    def stats(self) -> Dict[str, Any]:
+        index = self._index
+        return {
+            "backend": self.name,
+            "available": self.available(),
+            "directory": str(self.directory) if self.directory else None,
+            "build": index.name if index else None,
+            "courses": len(index) if index else 0,
+            "searches": self.searches
+        }
@@ -1,25 +1,135 @@
 import weaviate
 from weaviate.classes.config import Configure
-import json
 import logging
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Callable
 import numpy as np
-from sentence_transformers import SentenceTransformer
-import os
+import asyncio
+import threading
+import time
 
 from ..config import settings
+from .embedding_cache import EmbeddingCache
+from .embedding_batcher import EmbeddingBatcher
+from .embedding_backends import load_embedding_model
+from .course_indexer import (
+    LEGACY_COLLECTION_ERROR, course_content_text, course_properties, course_uuid, count_missing_exclusion_fields,
+    reindex_courses
+)
+from .query_parser import query_parser
+from .vector_store import VectorStore, WeaviateVectorStore, LocalVectorStore, exclusion_terms
 
 logger = logging.getLogger(__name__)
 
+# Searches read through this name; with blue/green rebuilds it is an alias
+# pointing at a versioned collection (Course_v<timestamp>)
+COURSE_ALIAS = "Course"
+
+CONTENT_HASH_PROPERTY = weaviate.classes.config.Property(
+    name="contentHash",
+    data_type=weaviate.classes.config.DataType.TEXT,
+    description="Hash of the indexed course fields, used for incremental sync"
+)
+
+# Lowercased exact-match fields that negative keywords are filtered on
+EXCLUSION_FILTER_PROPERTIES = [
+    weaviate.classes.config.Property(
+        name="topicTags",
+        data_type=weaviate.classes.config.DataType.TEXT_ARRAY,
+        description="Lowercased topic tags for exclusion filters",
+        tokenization=weaviate.classes.config.Tokenization.FIELD,
+        index_searchable=False
+    ),
+    weaviate.classes.config.Property(
+        name="titleTokens",
+        data_type=weaviate.classes.config.DataType.TEXT_ARRAY,
+        description="Lowercased title words for exclusion filters",
+        tokenization=weaviate.classes.config.Tokenization.FIELD,
+        index_searchable=False
+    )
+]
+
+# Properties added after the first Course schema; ensure_schema adds them in place
+LATER_COURSE_PROPERTIES = [CONTENT_HASH_PROPERTY] + EXCLUSION_FILTER_PROPERTIES
+
 class WeaviateService:
     def __init__(self):
-        """Initialize Weaviate client and embedding model"""
+        """Set up caches and stores; the Weaviate client and embedding model
+        are loaded by start(), off the import path"""
         self.client = None
         self.embedding_model = None
-        self.synonym_mappings: Dict[str, str] = {}
-        self._initialize_client()
-        self._initialize_embedding_model()
-        self._load_synonyms()
+        # idle -> starting -> ready; failed while the embedding model cannot be
+        # loaded, with retries (backing off) until it can
+        self.readiness: Dict[str, Any] = {"status": "idle", "weaviate": False, "embedding_model": False, "attempts": 0}
+        self._loader: Optional[threading.Thread] = None
+        self._attempted = threading.Event()
+        self._start_lock = threading.Lock()
+        self.course_collection_name = COURSE_ALIAS
+        self._exclusion_filters: Optional[bool] = None
+        self._exclusion_filters_lock = threading.Lock()
+        self.embedding_cache = EmbeddingCache(
+            settings.EMBEDDING_MODEL,
+            max_entries=settings.EMBEDDING_CACHE_SIZE,
+            store_dir=settings.EMBEDDING_CACHE_DIR or None
+        )
+        self.embedding_batcher = EmbeddingBatcher(
+            self.generate_embeddings,
+            max_batch_size=settings.EMBEDDING_BATCH_MAX_SIZE,
+            max_wait_ms=settings.EMBEDDING_BATCH_MAX_WAIT_MS
+        )
+        self.weaviate_store = WeaviateVectorStore(self)
+        self.local_store = LocalVectorStore(settings.LOCAL_INDEX_DIR or None)
+    
+    def start(self, on_ready: Optional[Callable[[], None]] = None) -> None:
+        """Connect to Weaviate and load the embedding model on a background
+        thread, retrying while the model fails to load; `on_ready` runs there
+        once it has loaded"""
+        with self._start_lock:
+            if self._loader is not None:
+                return
+            self.readiness["status"] = "starting"
+            self._loader = threading.Thread(
+                target=self._initialize, args=(on_ready,), name="weaviate-service-init", daemon=True
+            )
+            self._loader.start()
+    
+    def wait_until_ready(self, timeout: Optional[float] = None) -> bool:
+        """Start if needed and block until the first load attempt finishes; for scripts"""
+        self.start()
+        self._attempted.wait(timeout)
+        return self.is_ready()
+    
+    def is_ready(self) -> bool:
+        return self.readiness["status"] == "ready"
+    
+    def _initialize(self, on_ready: Optional[Callable[[], None]]) -> None:
+        started = time.perf_counter()
+        delay = settings.EMBEDDING_LOAD_RETRY_SECONDS
+        while True:
+            self.readiness["attempts"] += 1
+            if self.client is None:
+                self._initialize_client()
+            self.readiness["weaviate"] = self.client is not None
+            self._initialize_embedding_model()
+            self.readiness["embedding_model"] = self.embedding_model is not None
+            self.readiness["seconds"] = round(time.perf_counter() - started, 2)
+            if self.embedding_model is not None:
+                self.readiness["status"] = "ready"
+                self.readiness.pop("retry_in_seconds", None)
+                self._attempted.set()
+                break
+            # A missing download or a full disk can clear up; keep retrying
+            # rather than leaving /ready at 503 for the life of the process
+            self.readiness.update({"status": "failed", "retry_in_seconds": delay})
+            self._attempted.set()
+            logger.warning(f"Embedding model failed to load (attempt {self.readiness['attempts']}), retrying in {delay}s")
+            time.sleep(delay)
+            delay = min(delay * 2, settings.EMBEDDING_LOAD_RETRY_MAX_SECONDS)
+        logger.info(f"Vector search ready after {self.readiness['seconds']}s")
+        if on_ready:
+            try:
+                on_ready()
+            except Exception as e:
+                logger.error(f"Error in startup hook: {e}")
     
     def _initialize_client(self):
         """Initialize Weaviate client with connection"""
@@ -38,36 +148,131 @@ class WeaviateService:
             self.client = None
     
     def _initialize_embedding_model(self):
-        """Initialize sentence transformer model for embeddings"""
+        """Load the embedding model backend named by EMBEDDING_MODEL"""
         try:
-            self.embedding_model = SentenceTransformer(settings.EMBEDDING_MODEL)
+            self.embedding_model = load_embedding_model(
+                settings.EMBEDDING_MODEL, settings.EMBEDDING_ONNX_THREADS, settings.EMBEDDING_SHARED_WEIGHTS_DIR or None
+            )
             logger.info(f"Loaded embedding model: {settings.EMBEDDING_MODEL}")
         except Exception as e:
             logger.error(f"Error loading embedding model: {e}")
     
-    def _load_synonyms(self) -> None:
-        """Load synonym mappings from config/synonyms.json with safe fallback"""
+    @property
+    def vector_store(self) -> VectorStore:
+        """Backend serving course searches"""
+        if settings.VECTOR_STORE == "local":
+            return self.local_store
+        if settings.VECTOR_STORE == "weaviate" or self.client:
+            return self.weaviate_store
+        return self.local_store
+    
+    def vector_search_available(self) -> bool:
+        return self.embedding_model is not None and self.vector_store.available()
+    
+    def reindex(self, mode: str = "incremental", progress=None) -> Dict[str, Any]:
+        """Reindex the catalog into Weaviate (when connected) and the local vector index"""
+        report: Dict[str, Any] = {}
+        if self.client:
+            try:
+                report.update(reindex_courses(self, mode, progress))
+            finally:
+                # Objects written (or not) by this run decide whether filters are safe
+                self._exclusion_filters = None
+        if self.local_store.enabled:
+            report["local_index"] = self.local_store.sync(self, progress)
+        return report
+    
+    def exclusion_filters_supported(self) -> bool:
+        """Whether every object in the served Course collection has the fields exclusion filters need.
+
+        Having them in the schema is not enough: objects indexed before they
+        were added lack them until the next sync rewrites them, and would
+        pass any filter. Checked once per schema change or reindex.
+        """
+        if self._exclusion_filters is not None:
+            return self._exclusion_filters
+        with self._exclusion_filters_lock:
+            if self._exclusion_filters is None:
+                try:
+                    collection = self.get_course_collection()
+                    properties = {prop.name for prop in collection.config.get().properties}
+                    supported = all(prop.name in properties for prop in EXCLUSION_FILTER_PROPERTIES)
+                    if supported:
+                        missing = count_missing_exclusion_fields(collection)
+                        if missing:
+                            logger.warning(
+                                f"{missing} Course objects lack exclusion filter fields; "
+                                "filtering client-side until a reindex rewrites them"
+                            )
+                        supported = missing == 0
+                    self._exclusion_filters = supported
+                except Exception as e:
+                    logger.error(f"Error reading Course schema: {e}")
+                    return False
+            return self._exclusion_filters
+    
+    def get_course_collection(self, name: Optional[str] = None):
+        """Handle to the Course collection (or another collection with its schema)"""
+        return self.client.collections.get(name or self.course_collection_name)
+    
+    def active_course_collection(self) -> Optional[str]:
+        """Name of the collection currently served as Course, if any"""
+        alias = self.client.alias.get(alias_name=COURSE_ALIAS)
+        if alias:
+            return alias.collection
+        if self.client.collections.exists(COURSE_ALIAS):
+            return COURSE_ALIAS
+        return None
+    
+    def has_legacy_course_collection(self) -> bool:
+        """Whether Course is still a plain collection, created before aliases were used"""
+        return self.active_course_collection() == COURSE_ALIAS
+    
+    def create_course_version(self) -> str:
+        """Create an empty, versioned Course collection to build a new index into"""
+        name = f"{COURSE_ALIAS}_v{int(time.time() * 1000)}"
+        self._create_course_collection(name)
+        logger.info(f"Created shadow collection {name}")
+        return name
+    
+    def switch_course_collection(self, name: str, adopt_legacy: bool = False) -> Optional[str]:
+        """Point the Course alias at `name`; returns the collection served before, if it still exists.
+
+        A collection created before aliases occupies the alias name, so it has
+        to be deleted before the alias can exist. Weaviate cannot rename it,
+        and `name` already holds a full validated copy of it, but until the
+        alias is created other processes' searches of Course fail. That is a
+        one-off maintenance step, done only when `adopt_legacy` is set (see
+        `migrate_to_weaviate.py --adopt-alias`).
+        """
+        previous = self.active_course_collection()
+        if previous == COURSE_ALIAS and not adopt_legacy:
+            raise RuntimeError(LEGACY_COLLECTION_ERROR)
+        # Searches in this process go straight to the new collection while the alias moves
+        self.course_collection_name = name
         try:
-            base_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
-            synonyms_path = os.path.join(base_dir, "config", "synonyms.json")
-            if os.path.exists(synonyms_path):
-                with open(synonyms_path, "r", encoding="utf-8") as f:
-                    data = json.load(f)
-                    if isinstance(data, dict):
-                        self.synonym_mappings = {str(k).lower(): str(v) for k, v in data.items()}
-                        logger.info(f"Loaded {len(self.synonym_mappings)} synonym mappings from config")
-                        return
-            # Fallback minimal mappings
-            self.synonym_mappings = {
-                'website': 'website web development web app',
-                'webapp': 'webapp web application web development',
-                'full stack': 'full stack web development frontend backend database',
-                'software engineer': 'software engineer developer programmer coding programming'
-            }
-            logger.warning("Synonym config not found; using minimal defaults")
-        except Exception as e:
-            logger.error(f"Error loading synonyms: {e}")
-            self.synonym_mappings = {}
+            if previous == COURSE_ALIAS:
+                self.client.collections.delete(COURSE_ALIAS)
+                previous = None
+                logger.warning(f"Deleted pre-alias Course collection; {name} holds its replacement")
+            if self.client.alias.exists(alias_name=COURSE_ALIAS):
+                self.client.alias.update(alias_name=COURSE_ALIAS, new_target_collection=name)
+            else:
+                self.client.alias.create(alias_name=COURSE_ALIAS, target_collection=name)
+        except Exception:
+            logger.error(f"Could not point the Course alias at {name}; create it by hand, {name} is complete")
+            raise
+        finally:
+            if self.client.alias.exists(alias_name=COURSE_ALIAS):
+                self.course_collection_name = COURSE_ALIAS
+        self._exclusion_filters = None
+        logger.info(f"Course alias now points at {name} (was {previous})")
+        return previous
+    
+    def drop_course_collection(self, name: str) -> None:
+        """Delete a Course collection that is no longer served"""
+        self.client.collections.delete(name)
+        logger.info(f"Deleted collection {name}")
     
     def create_schema(self):
         """Create Weaviate schema for courses and user preferences"""
@@ -78,7 +283,12 @@ class WeaviateService:
         try:
             # Delete existing collections if they exist
             try:
-                self.client.collections.delete("Course")
+                active = self.active_course_collection()
+                if active and active != COURSE_ALIAS:
+                    self.client.alias.delete(alias_name=COURSE_ALIAS)
+                    self.client.collections.delete(active)
+                self.client.collections.delete(COURSE_ALIAS)
+                self.course_collection_name = COURSE_ALIAS
                 logger.info("Deleted existing Course collection")
             except:
                 pass
@@ -90,102 +300,11 @@ class WeaviateService:
                 pass
             
             # Create Course collection
-            self.client.collections.create(
-                name="Course",
-                description="AI Course catalog with vector embeddings",
-                vectorizer_config=Configure.Vectorizer.none(),  # We'll provide our own vectors
-                properties=[
-                    weaviate.classes.config.Property(
-                        name="courseId",
-                        data_type=weaviate.classes.config.DataType.TEXT,
-                        description="Unique course identifier"
-                    ),
-                    weaviate.classes.config.Property(
-                        name="title",
-                        data_type=weaviate.classes.config.DataType.TEXT,
-                        description="Course title"
-                    ),
-                    weaviate.classes.config.Property(
-                        name="description",
-                        data_type=weaviate.classes.config.DataType.TEXT,
-                        description="Detailed course description"
-                    ),
-                    weaviate.classes.config.Property(
-                        name="topics",
-                        data_type=weaviate.classes.config.DataType.TEXT_ARRAY,
-                        description="Course topic tags"
-                    ),
-                    weaviate.classes.config.Property(
-                        name="difficulty",
-                        data_type=weaviate.classes.config.DataType.TEXT,
-                        description="Course difficulty level"
-                    ),
-                    weaviate.classes.config.Property(
-                        name="duration",
-                        data_type=weaviate.classes.config.DataType.TEXT,
-                        description="Course duration"
-                    ),
-                    weaviate.classes.config.Property(
-                        name="format",
-                        data_type=weaviate.classes.config.DataType.TEXT,
-                        description="Course format (hands-on, video, etc.)"
-                    ),
-                    weaviate.classes.config.Property(
-                        name="rating",
-                        data_type=weaviate.classes.config.DataType.NUMBER,
-                        description="Average course rating"
-                    ),
-                    weaviate.classes.config.Property(
-                        name="contentVector",
-                        data_type=weaviate.classes.config.DataType.TEXT,
-                        description="Text used for vector embedding"
-                    )
-                ]
-            )
+            self._create_course_collection()
+            self._exclusion_filters = None
             
             # Create UserPreference collection
-            self.client.collections.create(
-                name="UserPreference",
-                description="User learning preferences with vector embeddings",
-                vectorizer_config=Configure.Vectorizer.none(),
-                properties=[
-                    weaviate.classes.config.Property(
-                        name="userId",
-                        data_type=weaviate.classes.config.DataType.TEXT,
-                        description="User identifier"
-                    ),
-                    weaviate.classes.config.Property(
-                        name="preferenceText",
-                        data_type=weaviate.classes.config.DataType.TEXT,
-                        description="User preference description"
-                    ),
-                    weaviate.classes.config.Property(
-                        name="topicsLiked",
-                        data_type=weaviate.classes.config.DataType.TEXT_ARRAY,
-                        description="Topics user has shown interest in"
-                    ),
-                    weaviate.classes.config.Property(
-                        name="topicsDisliked",
-                        data_type=weaviate.classes.config.DataType.TEXT_ARRAY,
-                        description="Topics user has shown disinterest in"
-                    ),
-                    weaviate.classes.config.Property(
-                        name="learningStyle",
-                        data_type=weaviate.classes.config.DataType.TEXT,
-                        description="Preferred learning style"
-                    ),
-                    weaviate.classes.config.Property(
-                        name="difficultyLevel",
-                        data_type=weaviate.classes.config.DataType.TEXT,
-                        description="Preferred difficulty level"
-                    ),
-                    weaviate.classes.config.Property(
-                        name="timestamp",
-                        data_type=weaviate.classes.config.DataType.DATE,
-                        description="When preference was created/updated"
-                    )
-                ]
-            )
+            self._create_user_preference_collection()
             
             logger.info("Successfully created Weaviate collections")
             return True
@@ -194,26 +313,174 @@ class WeaviateService:
             logger.error(f"Error creating Weaviate schema: {e}")
             return False
     
+    def ensure_schema(self) -> bool:
+        """Create missing collections without touching existing data"""
+        if not self.client:
+            logger.warning("Weaviate client not available, skipping schema creation")
+            return False
+            
+        try:
+            active = self.active_course_collection()
+            if not active:
+                self._create_course_collection()
+                logger.info("Created Course collection")
+            else:
+                # Older collections lack properties added since; existing objects
+                # get them on the next sync, as their content hash changes too
+                course_collection = self.get_course_collection(active)
+                properties = {prop.name for prop in course_collection.config.get().properties}
+                for prop in LATER_COURSE_PROPERTIES:
+                    if prop.name not in properties:
+                        course_collection.config.add_property(prop)
+                        logger.info(f"Added {prop.name} property to Course collection")
+                self._exclusion_filters = None
+            if not self.client.collections.exists("UserPreference"):
+                self._create_user_preference_collection()
+                logger.info("Created UserPreference collection")
+            return True
+            
+        except Exception as e:
+            logger.error(f"Error ensuring Weaviate schema: {e}")
+            return False
+    
+    def _create_course_collection(self, name: str = COURSE_ALIAS):
+        """Create a collection with the Course schema"""
+        self.client.collections.create(
+            name=name,
+            description="AI Course catalog with vector embeddings",
+            vectorizer_config=Configure.Vectorizer.none(),  # We'll provide our own vectors
+            properties=[
+                weaviate.classes.config.Property(
+                    name="courseId",
+                    data_type=weaviate.classes.config.DataType.TEXT,
+                    description="Unique course identifier"
+                ),
+                weaviate.classes.config.Property(
+                    name="title",
+                    data_type=weaviate.classes.config.DataType.TEXT,
+                    description="Course title"
+                ),
+                weaviate.classes.config.Property(
+                    name="description",
+                    data_type=weaviate.classes.config.DataType.TEXT,
+                    description="Detailed course description"
+                ),
+                weaviate.classes.config.Property(
+                    name="topics",
+                    data_type=weaviate.classes.config.DataType.TEXT_ARRAY,
+                    description="Course topic tags"
+                ),
+                weaviate.classes.config.Property(
+                    name="difficulty",
+                    data_type=weaviate.classes.config.DataType.TEXT,
+                    description="Course difficulty level"
+                ),
+                weaviate.classes.config.Property(
+                    name="duration",
+                    data_type=weaviate.classes.config.DataType.TEXT,
+                    description="Course duration"
+                ),
+                weaviate.classes.config.Property(
+                    name="format",
+                    data_type=weaviate.classes.config.DataType.TEXT,
+                    description="Course format (hands-on, video, etc.)"
+                ),
+                weaviate.classes.config.Property(
+                    name="rating",
+                    data_type=weaviate.classes.config.DataType.NUMBER,
+                    description="Average course rating"
+                ),
+                weaviate.classes.config.Property(
+                    name="contentVector",
+                    data_type=weaviate.classes.config.DataType.TEXT,
+                    description="Text used for vector embedding"
+                ),
+                *LATER_COURSE_PROPERTIES
+            ]
+        )
+    
+    def _create_user_preference_collection(self):
+        """Create the UserPreference collection"""
+        self.client.collections.create(
+            name="UserPreference",
+            description="User learning preferences with vector embeddings",
+            vectorizer_config=Configure.Vectorizer.none(),
+            properties=[
+                weaviate.classes.config.Property(
+                    name="userId",
+                    data_type=weaviate.classes.config.DataType.TEXT,
+                    description="User identifier"
+                ),
+                weaviate.classes.config.Property(
+                    name="preferenceText",
+                    data_type=weaviate.classes.config.DataType.TEXT,
+                    description="User preference description"
+                ),
+                weaviate.classes.config.Property(
+                    name="topicsLiked",
+                    data_type=weaviate.classes.config.DataType.TEXT_ARRAY,
+                    description="Topics user has shown interest in"
+                ),
+                weaviate.classes.config.Property(
+                    name="topicsDisliked",
+                    data_type=weaviate.classes.config.DataType.TEXT_ARRAY,
+                    description="Topics user has shown disinterest in"
+                ),
+                weaviate.classes.config.Property(
+                    name="learningStyle",
+                    data_type=weaviate.classes.config.DataType.TEXT,
+                    description="Preferred learning style"
+                ),
+                weaviate.classes.config.Property(
+                    name="difficultyLevel",
+                    data_type=weaviate.classes.config.DataType.TEXT,
+                    description="Preferred difficulty level"
+                ),
+                weaviate.classes.config.Property(
+                    name="timestamp",
+                    data_type=weaviate.classes.config.DataType.DATE,
+                    description="When preference was created/updated"
+                )
+            ]
+        )
+    
     def generate_embedding(self, text: str) -> List[float]:
         """Generate embedding for text using sentence transformer"""
+        return self.generate_embeddings([text])[0]
+    
+    def generate_embeddings(self, texts: List[str]) -> List[List[float]]:
+        """Generate embeddings for many texts with one batched encode call"""
         if not self.embedding_model:
-            return []
+            return [[] for _ in texts]
             
         try:
             # Clean and prepare text
-            clean_text = text.strip().replace('\n', ' ').replace('\r', ' ')
-            if not clean_text:
-                return []
-                
-            # Generate embedding
-            embedding = self.embedding_model.encode(clean_text)
-            
-            # Convert to list for JSON serialization
-            return embedding.tolist()
+            clean_texts = [text.strip().replace('\n', ' ').replace('\r', ' ') for text in texts]
+            embeddings: List[Optional[np.ndarray]] = [None] * len(texts)
+            
+            # Repeated texts (preference queries, unchanged courses) skip the model
+            missing: Dict[str, List[int]] = {}
+            for i, clean_text in enumerate(clean_texts):
+                if not clean_text:
+                    continue
+                embeddings[i] = self.embedding_cache.get(clean_text)
+                if embeddings[i] is None:
+                    missing.setdefault(clean_text, []).append(i)
+            
+            # Generate embeddings for the rest in one batch
+            if missing:
+                encoded = self.embedding_model.encode(list(missing), batch_size=settings.EMBEDDING_BATCH_MAX_SIZE)
+                for clean_text, embedding in zip(missing, encoded):
+                    embedding = self.embedding_cache.put(clean_text, embedding)
+                    for i in missing[clean_text]:
+                        embeddings[i] = embedding
+            
+            # Convert to lists for JSON serialization
+            return [embedding.tolist() if embedding is not None else [] for embedding in embeddings]
             
         except Exception as e:
-            logger.error(f"Error generating embedding: {e}")
-            return []
+            logger.error(f"Error generating embeddings: {e}")
+            return [[] for _ in texts]
     
     def add_course(self, course_data: Dict[str, Any]) -> bool:
         """Add course to Weaviate with vector embedding"""
@@ -223,14 +490,7 @@ class WeaviateService:
             
         try:
             # Create content text for embedding
-            content_parts = [
-                course_data.get('title', ''),
-                course_data.get('description', ''),
-                ' '.join(course_data.get('topics', [])),
-                course_data.get('difficulty', ''),
-                course_data.get('format', '')
-            ]
-            content_text = ' '.join(filter(None, content_parts))
+            content_text = course_content_text(course_data)
             
             # Generate embedding
             vector = self.generate_embedding(content_text)
@@ -240,24 +500,15 @@ class WeaviateService:
                 return False
             
             # Prepare data for Weaviate
-            weaviate_data = {
-                "courseId": course_data.get('id'),
-                "title": course_data.get('title'),
-                "description": course_data.get('description'),
-                "topics": course_data.get('topics', []),
-                "difficulty": course_data.get('difficulty'),
-                "duration": course_data.get('duration'),
-                "format": course_data.get('format'),
-                "rating": float(course_data.get('rating', 0.0)),
-                "contentVector": content_text
-            }
+            weaviate_data = course_properties(course_data, content_text)
             
             # Add to Weaviate using v4 API
-            course_collection = self.client.collections.get("Course")
-            uuid = course_collection.data.insert(
-                properties=weaviate_data,
-                vector=vector
-            )
+            course_collection = self.get_course_collection()
+            uuid = course_uuid(course_data.get('id'))
+            if course_collection.data.exists(uuid):
+                course_collection.data.replace(uuid=uuid, properties=weaviate_data, vector=vector)
+            else:
+                course_collection.data.insert(properties=weaviate_data, uuid=uuid, vector=vector)
             
             logger.info(f"Added course {course_data.get('id')} to Weaviate: {uuid}")
             return True
@@ -271,21 +522,16 @@ class WeaviateService:
         query_text: str, 
         limit: int = 10,
         min_certainty: float = 0.4,
-        exclude_topics: List[str] = None
+        exclude_topics: List[str] = None,
+        parse_query: bool = True
     ) -> List[Dict[str, Any]]:
         """Search for similar courses using vector similarity with negative filtering"""
-        if not self.client:
-            logger.warning("Weaviate client not available")
+        if not self.vector_search_available():
+            logger.warning("Vector search not available")
             return []
             
         try:
-            # Parse negative preferences from query
-            negative_keywords = self._extract_negative_keywords(query_text)
-            if exclude_topics:
-                negative_keywords.extend(exclude_topics)
-            
-            # Clean query for embedding (remove negative phrases)
-            clean_query = self._clean_query_for_embedding(query_text)
+            clean_query, negative_keywords = self._prepare_query(query_text, exclude_topics, parse_query)
             
             # Generate embedding for cleaned query
             query_vector = self.generate_embedding(clean_query)
@@ -294,142 +540,103 @@ class WeaviateService:
                 logger.warning("Could not generate embedding for query")
                 return []
             
-            # Get the Course collection
-            course_collection = self.client.collections.get("Course")
+            return self._search_by_vector(query_vector, limit, min_certainty, negative_keywords)
             
-            # Perform vector search using v4 API - get more results to allow for filtering
-            search_limit = limit * 3  # Get more results to account for filtering
-            result = course_collection.query.near_vector(
-                near_vector=query_vector,
-                limit=search_limit,
-                distance=1.0 - min_certainty,  # Convert certainty to distance
-                return_metadata=["distance"]
+        except Exception as e:
+            logger.error(f"Error searching similar courses: {e}")
+            return []
+    
+    async def search_similar_courses_async(
+        self,
+        query_text: str,
+        limit: int = 10,
+        min_certainty: float = 0.4,
+        exclude_topics: List[str] = None,
+        executor=None,
+        parse_query: bool = True
+    ) -> List[Dict[str, Any]]:
+        """search_similar_courses for async callers: the query embedding goes through the
+        micro-batcher and the vector store query runs on `executor`"""
+        if not self.vector_search_available():
+            logger.warning("Vector search not available")
+            return []
+            
+        try:
+            clean_query, negative_keywords = self._prepare_query(query_text, exclude_topics, parse_query)
+            query_vector = await self.embedding_batcher.embed(clean_query)
+            
+            if not query_vector:
+                logger.warning("Could not generate embedding for query")
+                return []
+            
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(
+                executor, self._search_by_vector, query_vector, limit, min_certainty, negative_keywords
             )
             
-            # Format results with negative filtering
+        except Exception as e:
+            logger.error(f"Error searching similar courses: {e}")
+            return []
+    
+    def _prepare_query(self, query_text: str, exclude_topics: Optional[List[str]], parse_query: bool = True):
+        """Negative keywords to filter on and the cleaned query to embed.
+
+        Callers that already parsed the query pass parse_query=False and their
+        negative keywords in exclude_topics; the text is then embedded as is.
+        """
+        negative_keywords: List[str] = []
+        clean_query = query_text
+        if parse_query:
+            parsed = query_parser.parse(query_text)
+            negative_keywords.extend(parsed.negative_keywords)
+            clean_query = parsed.clean_text
+        if exclude_topics:
+            negative_keywords.extend(exclude_topics)
+        return clean_query, negative_keywords
+    
+    def _search_by_vector(
+        self,
+        query_vector: List[float],
+        limit: int,
+        min_certainty: float,
+        negative_keywords: List[str]
+    ) -> List[Dict[str, Any]]:
+        """Run the near-vector query with excluded courses filtered out by the vector store"""
+        try:
+            terms = exclusion_terms(negative_keywords)
+            store = self.vector_store
+            try:
+                hits = store.search(query_vector, limit, min_certainty, terms)
+            except Exception as e:
+                if store is self.local_store or not self.local_store.available():
+                    raise
+                logger.warning(f"Weaviate search failed, using local vector index: {e}")
+                hits = self.local_store.search(query_vector, limit, min_certainty, terms)
+            
             formatted_courses = []
-            for obj in result.objects:
-                props = obj.properties
-                distance = obj.metadata.distance if obj.metadata.distance is not None else 1.0
+            for props, distance in hits:
                 certainty = 1.0 - distance
-                
                 if certainty >= min_certainty:
-                    # Check if course should be excluded based on negative keywords
-                    if not self._should_exclude_course(props, negative_keywords):
-                        formatted_courses.append({
-                            'id': props.get('courseId'),
-                            'title': props.get('title'),
-                            'description': props.get('description'),
-                            'topics': props.get('topics', []),
-                            'difficulty': props.get('difficulty'),
-                            'duration': props.get('duration'),
-                            'format': props.get('format'),
-                            'rating': props.get('rating'),
-                            'similarity_score': certainty,
-                            'distance': distance
-                        })
-                        
-                        # Stop when we have enough results
-                        if len(formatted_courses) >= limit:
-                            break
-            
-            logger.info(f"Found {len(formatted_courses)} similar courses (filtered {len(result.objects) - len(formatted_courses)} excluded courses)")
+                    formatted_courses.append({
+                        'id': props.get('courseId'),
+                        'title': props.get('title'),
+                        'description': props.get('description'),
+                        'topics': props.get('topics', []),
+                        'difficulty': props.get('difficulty'),
+                        'duration': props.get('duration'),
+                        'format': props.get('format'),
+                        'rating': props.get('rating'),
+                        'similarity_score': certainty,
+                        'distance': distance
+                    })
+            
+            logger.info(f"Found {len(formatted_courses)} similar courses (excluding {terms or 'nothing'})")
             return formatted_courses
             
         except Exception as e:
             logger.error(f"Error searching similar courses: {e}")
             return []
     
-    def _extract_negative_keywords(self, query_text: str) -> List[str]:
-        """Extract negative keywords from query text"""
-        negative_patterns = [
-            r"don't want to learn ([^,.!?]+)",
-            r"not interested in ([^,.!?]+)",
-            r"avoid ([^,.!?]+)",
-            r"but not ([^,.!?]+)",
-            r"except ([^,.!?]+)",
-            r"without ([^,.!?]+)",
-            r"no ([^,.!?]+)",
-            r"I don't like ([^,.!?]+)"
-        ]
-        
-        import re
-        negative_keywords = []
-        query_lower = query_text.lower()
-        
-        for pattern in negative_patterns:
-            matches = re.findall(pattern, query_lower)
-            for match in matches:
-                # Split multi-word matches and clean them
-                keywords = [word.strip() for word in match.split() if word.strip()]
-                negative_keywords.extend(keywords)
-        
-        # Also check for simple "not X" patterns
-        not_pattern = r"not (\w+)"
-        not_matches = re.findall(not_pattern, query_lower)
-        negative_keywords.extend(not_matches)
-        
-        return list(set(negative_keywords))  # Remove duplicates
-    
-    def _clean_query_for_embedding(self, query_text: str) -> str:
-        """Remove negative phrases from query for better embedding and expand synonyms"""
-        import re
-        
-        # Remove negative phrases
-        negative_patterns = [
-            r"don't want to learn [^,.!?]+",
-            r"not interested in [^,.!?]+",
-            r"but not [^,.!?]+",
-            r"avoid [^,.!?]+",
-            r"except [^,.!?]+",
-            r"without [^,.!?]+",
-            r"I don't like [^,.!?]+",
-            r"not \w+"
-        ]
-        
-        clean_query = query_text
-        for pattern in negative_patterns:
-            clean_query = re.sub(pattern, "", clean_query, flags=re.IGNORECASE)
-        
-        # Apply synonym expansion from config
-        query_lower = clean_query.lower()
-        for synonym, expansion in self.synonym_mappings.items():
-            if synonym in query_lower:
-                clean_query = clean_query.replace(synonym, expansion)
-                break
-        
-        # Clean up extra spaces and punctuation
-        clean_query = re.sub(r'\s+', ' ', clean_query).strip()
-        clean_query = re.sub(r'^[,.\s]+|[,.\s]+$', '', clean_query)
-        
-        # If query becomes empty or too short, use a generic programming query
-        if len(clean_query.strip()) < 3:
-            clean_query = "programming software development"
-            
-        return clean_query
-    
-    def _should_exclude_course(self, course_props: Dict, negative_keywords: List[str]) -> bool:
-        """Check if course should be excluded based on negative keywords"""
-        if not negative_keywords:
-            return False
-        
-        # Only check exact word matches in title and explicit topic tags (avoid substring matches in description)
-        import re
-        title_text = course_props.get('title', '').lower()
-        title_tokens = set(re.findall(r"\b\w+\b", title_text))
-        topics = course_props.get('topics', [])
-        topic_tokens = set([t.lower() for t in topics]) if isinstance(topics, list) else set()
-        
-        for keyword in negative_keywords:
-            kw = keyword.lower().strip()
-            if len(kw) < 3:
-                continue
-            if kw in topic_tokens or kw in title_tokens:
-                logger.info(f"Excluding course due to negative keyword '{kw}': {course_props.get('title')}")
-                return True
-        
-        return False
-    
     def add_user_preference(self, user_id: str, preference_data: Dict[str, Any]) -> bool:
         """Add or update user preferences in Weaviate"""
         if not self.client:
@@ -573,7 +780,10 @@ class WeaviateService:
         if not self.client:
             return {
                 "status": "disconnected",
-                "message": "Weaviate client not initialized"
+                "message": "Weaviate client not initialized",
+                "readiness": self.readiness,
+                "vector_store": self.vector_store.name,
+                "local_index": self.local_store.stats()
             }
         
         try:
@@ -581,8 +791,10 @@ class WeaviateService:
             
             # Get collections (equivalent to classes in v3)
             collections = []
+            course_collection = None
             try:
                 collections = list(self.client.collections.list_all().keys())
+                course_collection = self.active_course_collection()
             except:
                 pass
             
@@ -590,7 +802,14 @@ class WeaviateService:
                 "status": "connected" if is_ready else "error",
                 "ready": is_ready,
                 "collections": collections,
-                "embedding_model": settings.EMBEDDING_MODEL if self.embedding_model else None
+                "course_collection": course_collection,
+                "readiness": self.readiness,
+                "vector_store": self.vector_store.name,
+                "weaviate_store": self.weaviate_store.stats(),
+                "local_index": self.local_store.stats(),
+                "embedding_model": settings.EMBEDDING_MODEL if self.embedding_model else None,
+                "embedding_cache": self.embedding_cache.stats(),
+                "embedding_batches": self.embedding_batcher.stats()
             }
             
         except Exception as e:
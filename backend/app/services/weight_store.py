@@ -0,0 +1,115 @@
+import json
+import logging
+import os
+import re
+import warnings
+from pathlib import Path
+from typing import Dict
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+ALIGNMENT = 64  # Bytes; every tensor starts on a cache-line boundary
+
+
+def write_weight_store(arrays: Dict[str, np.ndarray], path: Path) -> None:
+    """Write named arrays into one flat file plus a JSON layout (`<path>.json`).
+
+    Both are written under temporary names and renamed into place, layout
+    last, so a reader sees either the old store or the complete new one.
+    """
+    layout = {}
+    offset = 0
+    for name, array in arrays.items():
+        offset = -(-offset // ALIGNMENT) * ALIGNMENT
+        layout[name] = {"dtype": array.dtype.str, "shape": list(array.shape), "offset": offset}
+        offset += array.nbytes
+    data_tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    store = np.memmap(data_tmp, dtype=np.uint8, mode="w+", shape=(max(offset, 1),))
+    for name, array in arrays.items():
+        start = layout[name]["offset"]
+        store[start:start + array.nbytes] = np.ascontiguousarray(array).view(np.uint8).reshape(-1)
+    store.flush()
+    del store
+    layout_tmp = path.with_name(f"{path.name}.json.{os.getpid()}.tmp")
+    layout_tmp.write_text(json.dumps(layout))
+    os.replace(data_tmp, path)
+    os.replace(layout_tmp, path.with_name(f"{path.name}.json"))
+
+
+def read_weight_store(path: Path) -> Dict[str, np.ndarray]:
+    """Read-only views of every array in a store, backed by one shared file mapping"""
+    layout = json.loads(path.with_name(f"{path.name}.json").read_text())
+    store = np.memmap(path, dtype=np.uint8, mode="r")
+    arrays = {}
+    for name, entry in layout.items():
+        dtype = np.dtype(entry["dtype"])
+        count = int(np.prod(entry["shape"], dtype=np.int64))
+        start = entry["offset"]
+        arrays[name] = store[start:start + count * dtype.itemsize].view(dtype).reshape(entry["shape"])
+    return arrays
+
+
+def store_matches(stored: Dict[str, np.ndarray], expected: Dict[str, np.ndarray]) -> bool:
+    """Whether a store holds exactly the tensors a model was loaded with"""
+    return stored.keys() == expected.keys() and all(
+        stored[name].dtype == expected[name].dtype and np.array_equal(stored[name], expected[name])
+        for name in expected
+    )
+
+
+def _matching_store(path: Path, state: Dict[str, np.ndarray]):
+    try:
+        stored = read_weight_store(path)
+    except (OSError, ValueError):
+        return None
+    return stored if store_matches(stored, state) else None
+
+
+def share_model_weights(model, directory: str, model_name: str):
+    """Swap a PyTorch model's weights for read-only memory-mapped copies.
+
+    Every worker process that maps the same file shares one copy of the
+    weights through the page cache, instead of holding its own (uvicorn
+    starts workers with spawn, so there is no fork copy-on-write to rely
+    on). The first worker to need the file writes it from its own freshly
+    loaded weights; the rest map it.
+
+    Only steady-state memory is shared: each worker still loads a private
+    copy first and compares it byte for byte with the file, so startup
+    peaks at one copy per worker starting at the same time.
+    """
+    import fcntl
+    import torch
+
+    store_dir = Path(directory)
+    store_dir.mkdir(parents=True, exist_ok=True)
+    path = store_dir / f"{re.sub(r'[^A-Za-z0-9_.-]+', '_', model_name)}.weights"
+    state = {name: tensor.detach().cpu().numpy() for name, tensor in model.state_dict().items()}
+
+    with open(store_dir / ".lock", "w") as lock:
+        # Workers compare in parallel under a shared lock; one that finds the
+        # store missing or stale takes the lock exclusively to write it
+        fcntl.flock(lock, fcntl.LOCK_SH)
+        try:
+            stored = _matching_store(path, state)
+            if stored is None:
+                # Not atomic: another worker may have written it in between
+                fcntl.flock(lock, fcntl.LOCK_EX)
+                stored = _matching_store(path, state)
+            if stored is None:
+                write_weight_store(state, path)
+                logger.info(f"Wrote shared weight store {path}")
+                stored = read_weight_store(path)
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+    # Tensors over read-only mappings: the model is only used for inference
+    with warnings.catch_warnings():
+        warnings.filterwarnings("ignore", message="The given NumPy array is not writable")
+        tensors = {name: torch.from_numpy(array) for name, array in stored.items()}
+    model.load_state_dict(tensors, assign=True)
+    model.requires_grad_(False)
+    logger.info(f"Mapped {len(tensors)} weight tensors from {path}")
+    return model
@@ -0,0 +1,349 @@
+#!/usr/bin/env python3
+"""
+Benchmarks for the SQLite access layer.
+
+Run from the backend directory:
+    python benchmarks/bench_database.py
+"""
+
+import asyncio
+import json
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+# Make the app package importable when run as a script
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from app import database
+from app.config import settings
+from app.database import ConnectionPool, build_fts_query, run_migrations
+
+# Roughly the statements issued by one GET /api/recommendations/{user_id}
+REQUEST_QUERIES = [
+    ("SELECT * FROM users WHERE username = ?", ("demo_user",)),
+    ("SELECT preferred_topics, difficulty_level, learning_style, time_commitment FROM user_preferences WHERE user_id = ?", (1,)),
+    ("SELECT course_id, rating FROM user_feedback WHERE user_id = ? ORDER BY created_at DESC LIMIT 10", (1,)),
+    ("SELECT course_id, interaction_type FROM course_interactions WHERE user_id = ? ORDER BY created_at DESC LIMIT 20", (1,)),
+    ("SELECT title, description, topics FROM courses WHERE id = ?", ("course-1",)),
+    ("SELECT title, description, topics FROM courses WHERE id = ?", ("course-2",)),
+    ("SELECT title, description, topics FROM courses WHERE id = ?", ("course-3",)),
+    ("SELECT DISTINCT course_id FROM course_interactions WHERE user_id = ? AND interaction_type IN ('completed', 'dropped')", (1,)),
+    ("SELECT course_id FROM user_feedback WHERE user_id = ? AND rating <= 2", (1,)),
+    ("SELECT topics FROM courses WHERE id = ?", ("course-1",)),
+    ("SELECT topics FROM courses WHERE id = ?", ("course-2",)),
+    ("SELECT id, title, description, topics FROM courses WHERE title LIKE ? OR description LIKE ?", ("%python%", "%python%")),
+]
+
+def create_fixture_db(path: Path, courses: int = 500):
+    """Create a small database shaped like data/app.db"""
+    conn = sqlite3.connect(path)
+    conn.executescript("""
+        CREATE TABLE users (id INTEGER PRIMARY KEY, username TEXT UNIQUE, email TEXT, created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP);
+        CREATE TABLE user_feedback (id INTEGER PRIMARY KEY, user_id INTEGER, course_id TEXT, rating INTEGER, feedback_text TEXT,
+            learning_style TEXT, difficulty_preference TEXT, pace_preference TEXT, created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP);
+        CREATE TABLE course_interactions (id INTEGER PRIMARY KEY, user_id INTEGER, course_id TEXT, interaction_type TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP);
+        CREATE TABLE user_preferences (user_id INTEGER PRIMARY KEY, preferred_topics TEXT, difficulty_level TEXT,
+            learning_style TEXT, time_commitment TEXT);
+        CREATE TABLE courses (id TEXT PRIMARY KEY, title TEXT, description TEXT, topics TEXT, difficulty TEXT,
+            duration TEXT, format TEXT, rating REAL);
+    """)
+    conn.execute("INSERT INTO users (id, username) VALUES (1, 'demo_user')")
+    conn.execute("INSERT INTO user_preferences VALUES (1, '[\"python\"]', 'beginner', 'hands-on', 'self-paced')")
+    conn.executemany(
+        "INSERT INTO courses VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+        [(f"course-{i}", f"Course {i}", "Description", '["python", "web"]', "beginner", "4 weeks", "video", 4.0)
+         for i in range(courses)]
+    )
+    conn.executemany(
+        "INSERT INTO user_feedback (user_id, course_id, rating) VALUES (1, ?, ?)",
+        [(f"course-{i}", i % 5 + 1) for i in range(20)]
+    )
+    conn.commit()
+    conn.close()
+
+def run_request_unpooled(db_path: Path):
+    """The previous execute_query behaviour: connect, run, commit, close per statement"""
+    for query, params in REQUEST_QUERIES:
+        db_path.parent.mkdir(exist_ok=True)
+        conn = sqlite3.connect(db_path)
+        conn.row_factory = sqlite3.Row
+        try:
+            conn.execute(query, params).fetchall()
+            conn.commit()
+        finally:
+            conn.close()
+
+def run_request_pooled(pool: ConnectionPool):
+    """Same statements through the connection pool"""
+    for query, params in REQUEST_QUERIES:
+        with pool.connection() as conn:
+            conn.execute(query, params).fetchall()
+            conn.commit()
+
+def time_requests(fn, iterations: int):
+    """Return per-request latencies in milliseconds"""
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+def report(label: str, samples):
+    samples = sorted(samples)
+    p99 = samples[max(int(len(samples) * 0.99) - 1, 0)]
+    print(
+        f"  {label:<12} mean {statistics.mean(samples):8.3f} ms   p50 {statistics.median(samples):8.3f} ms"
+        f"   p99 {p99:8.3f} ms   max {samples[-1]:8.3f} ms"
+    )
+
+def bench_connection_overhead(iterations: int = 500):
+    """Per-request connection overhead before and after pooling"""
+    print(f"\n📊 Connection overhead ({len(REQUEST_QUERIES)} queries per request, {iterations} requests)")
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(tmp) / "bench.db"
+        create_fixture_db(db_path)
+
+        unpooled = time_requests(lambda: run_request_unpooled(db_path), iterations)
+        pool = ConnectionPool(db_path, max_size=5)
+        pooled = time_requests(lambda: run_request_pooled(pool), iterations)
+        pool.close_all()
+
+        report("per-query", unpooled)
+        report("pooled", pooled)
+        print(f"  speedup      {statistics.mean(unpooled) / statistics.mean(pooled):.1f}x  (pool stats: {pool.stats()})")
+
+def run_mixed_workload(read_pool: ConnectionPool, write_pool: ConnectionPool, duration: float = 2.0):
+    """Readers load user context while a writer keeps inserting feedback"""
+    stop = threading.Event()
+    latencies = []
+    errors = []
+
+    def writer():
+        while not stop.is_set():
+            try:
+                with write_pool.connection() as conn:
+                    conn.execute("INSERT INTO user_feedback (user_id, course_id, rating) VALUES (1, 'course-1', 5)")
+                    time.sleep(0.002)  # Hold the write transaction like a slow request would
+                    conn.commit()
+            except sqlite3.OperationalError as e:
+                errors.append(str(e))
+
+    def reader():
+        while not stop.is_set():
+            start = time.perf_counter()
+            try:
+                with read_pool.connection() as conn:
+                    conn.execute(REQUEST_QUERIES[2][0], REQUEST_QUERIES[2][1]).fetchall()
+                    conn.execute(REQUEST_QUERIES[3][0], REQUEST_QUERIES[3][1]).fetchall()
+                latencies.append((time.perf_counter() - start) * 1000)
+            except sqlite3.OperationalError as e:
+                errors.append(str(e))
+
+    threads = [threading.Thread(target=writer)] + [threading.Thread(target=reader) for _ in range(4)]
+    for t in threads:
+        t.start()
+    time.sleep(duration)
+    stop.set()
+    for t in threads:
+        t.join()
+    return latencies, errors
+
+def bench_read_write_split():
+    """Reader latency under concurrent writes: rollback journal vs WAL profile"""
+    print("\n📊 Reads during concurrent feedback writes (4 readers, 1 writer)")
+    profiles = {
+        "rollback": ({"journal_mode": "DELETE", "synchronous": "FULL"}, False),
+        "wal+split": (settings.DB_PRAGMAS, True),
+    }
+    for label, (pragmas, split) in profiles.items():
+        with tempfile.TemporaryDirectory() as tmp:
+            db_path = Path(tmp) / "bench.db"
+            create_fixture_db(db_path)
+            write_pool = ConnectionPool(db_path, max_size=1, timeout=5.0, pragmas=pragmas)
+            read_pool = ConnectionPool(db_path, max_size=4, timeout=5.0, pragmas=pragmas, read_only=split)
+            with write_pool.connection():
+                pass  # Writer applies journal_mode before readers connect
+            latencies, errors = run_mixed_workload(read_pool, write_pool)
+            read_pool.close_all()
+            write_pool.close_all()
+            report(label, latencies)
+            print(f"  {'':<12} {len(latencies)} reads, {len(errors)} lock errors")
+
+async def run_clients(clients: int, use_async: bool):
+    """Fire `clients` concurrent requests plus a health probe; return (request, probe) latencies"""
+    async def request():
+        start = time.perf_counter()
+        for query, params in REQUEST_QUERIES:
+            if use_async:
+                await database.execute_query_async(query, params)
+            else:
+                database.execute_query(query, params)
+            await asyncio.sleep(0)  # Yield like a handler awaiting other work would
+        return (time.perf_counter() - start) * 1000
+
+    async def health_probe(stop: asyncio.Event):
+        # Stands in for GET /health: measures how long the loop takes to schedule it
+        samples = []
+        while not stop.is_set():
+            start = time.perf_counter()
+            await asyncio.sleep(0.001)
+            samples.append((time.perf_counter() - start - 0.001) * 1000)
+        return samples
+
+    stop = asyncio.Event()
+    probe = asyncio.create_task(health_probe(stop))
+    await asyncio.sleep(0.01)
+    request_latencies = await asyncio.gather(*(request() for _ in range(clients)))
+    stop.set()
+    return list(request_latencies), await probe
+
+def bench_async_concurrency(clients: int = 200, courses: int = 20000):
+    """Sync execute_query vs the async DB layer under many parallel clients"""
+    print(f"\n📊 {clients} parallel clients on one event loop ({len(REQUEST_QUERIES)} queries each, {courses} courses)")
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(tmp) / "bench.db"
+        create_fixture_db(db_path, courses=courses)
+        # Point the module-level pools at the fixture database
+        database.write_pool = ConnectionPool(db_path, max_size=1, pragmas=settings.DB_PRAGMAS)
+        database.read_pool = ConnectionPool(
+            db_path, max_size=settings.DB_POOL_SIZE, pragmas=settings.DB_PRAGMAS, read_only=True
+        )
+        with database.write_pool.connection():
+            pass
+        for label, use_async in (("sync", False), ("async", True)):
+            requests, probe = asyncio.run(run_clients(clients, use_async))
+            report(f"{label} req", requests)
+            report(f"{label} health", probe)
+        database.close_pools()
+
+VOCABULARY = [
+    "python", "javascript", "react", "data", "science", "machine", "learning", "web", "development",
+    "cloud", "security", "design", "database", "sql", "algorithms", "statistics", "devops", "mobile",
+    "swift", "kotlin", "networking", "linux", "testing", "architecture", "visualization", "analytics",
+    "deep", "neural", "networks", "frontend", "backend", "api", "microservices", "containers", "rust",
+    "golang", "blockchain", "ethics", "product", "management", "agile", "excel", "finance", "marketing",
+]
+
+def create_synthetic_catalog(path: Path, courses: int, seed: int = 7):
+    """Fill a fixture database with `courses` random courses and build the search index"""
+    create_fixture_db(path, courses=0)
+    rng = random.Random(seed)
+    # Pad the topic words with filler so real terms are as selective as in a real catalog
+    filler = ["".join(rng.choice("abcdefghijklmnopqrstuvwxyz") for _ in range(rng.randint(4, 9))) for _ in range(20000)]
+    conn = sqlite3.connect(path)
+    batch = []
+    for i in range(courses):
+        words = rng.sample(VOCABULARY, 2) + rng.sample(filler, 2)
+        description = " ".join(
+            rng.choice(VOCABULARY) if rng.random() < 0.02 else rng.choice(filler) for _ in range(25)
+        )
+        batch.append((
+            f"course-{i}", " ".join(words).title(), description, json.dumps(words[:3]),
+            rng.choice(["beginner", "intermediate", "advanced"]), "4 weeks", "video",
+            round(rng.uniform(3.0, 5.0), 1)
+        ))
+        if len(batch) == 10000:
+            conn.executemany("INSERT INTO courses VALUES (?, ?, ?, ?, ?, ?, ?, ?)", batch)
+            batch = []
+    conn.executemany("INSERT INTO courses VALUES (?, ?, ?, ?, ?, ?, ?, ?)", batch)
+    conn.commit()
+    start = time.perf_counter()
+    run_migrations(conn)
+    print(f"  migrations + index backfill took {time.perf_counter() - start:.1f}s")
+    conn.close()
+
+SEARCH_TERMS = ["python", "machine learning", "react web", "kubernetes", "cloud security", "data vis"]
+
+def bench_course_search(courses: int = 500000, iterations: int = 5):
+    """LIKE substring scan vs BM25-ranked FTS5 search on a large catalog"""
+    print(f"\n📊 Course search over a {courses:,}-course synthetic catalog")
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(tmp) / "bench.db"
+        create_synthetic_catalog(db_path, courses)
+        conn = sqlite3.connect(db_path)
+
+        def like_search(term):
+            return conn.execute(
+                "SELECT id, title, rating FROM courses WHERE title LIKE ? OR description LIKE ? LIMIT 10",
+                (f"%{term}%", f"%{term}%")
+            ).fetchall()
+
+        def fts_search(term):
+            return conn.execute("""
+                SELECT c.id, c.title, c.rating, bm25(courses_fts, 10.0, 2.0, 5.0) AS rank,
+                       snippet(courses_fts, 1, '<mark>', '</mark>', '...', 16)
+                FROM courses_fts JOIN courses c ON c.rowid = courses_fts.rowid
+                WHERE courses_fts MATCH ? ORDER BY rank LIMIT 10
+            """, (build_fts_query(term),)).fetchall()
+
+        for label, search in (("LIKE", like_search), ("FTS5+BM25", fts_search)):
+            samples = []
+            for _ in range(iterations):
+                for term in SEARCH_TERMS:
+                    start = time.perf_counter()
+                    search(term)
+                    samples.append((time.perf_counter() - start) * 1000)
+            report(label, samples)
+        conn.close()
+    print("  (LIKE stops at the first 10 hits in table order; FTS ranks every match)")
+
+def bench_keyset_pagination(courses: int = 1000000, limit: int = 20):
+    """OFFSET vs keyset pagination at increasing depth in a large catalog"""
+    print(f"\n📊 Deep pagination over a {courses:,}-course catalog ({limit} per page)")
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(tmp) / "bench.db"
+        create_fixture_db(db_path, courses=0)
+        conn = sqlite3.connect(db_path)
+        rng = random.Random(11)
+        conn.executemany(
+            "INSERT INTO courses VALUES (?, ?, 'Description', '[]', 'beginner', '4 weeks', 'video', ?)",
+            ((f"course-{i:07d}", f"Course {i}", round(rng.uniform(3.0, 5.0), 1)) for i in range(courses))
+        )
+        conn.execute("CREATE INDEX idx_courses_rating_id ON courses(rating, id)")
+        conn.commit()
+        columns = "id, title, description, topics, difficulty, duration, format, rating"
+
+        for depth in (0, courses // 10, courses // 2, courses - limit):
+            start = time.perf_counter()
+            conn.execute(
+                f"SELECT {columns} FROM courses ORDER BY rating DESC, id DESC LIMIT ? OFFSET ?", (limit, depth)
+            ).fetchall()
+            offset_ms = (time.perf_counter() - start) * 1000
+
+            # The cursor a client would hold after reading `depth` rows
+            key = conn.execute(
+                "SELECT rating, id FROM courses ORDER BY rating DESC, id DESC LIMIT 1 OFFSET ?", (max(depth - 1, 0),)
+            ).fetchone()
+            start = time.perf_counter()
+            conn.execute(
+                f"SELECT {columns} FROM courses WHERE (rating, id) < (?, ?) ORDER BY rating DESC, id DESC LIMIT ?",
+                (*key, limit)
+            ).fetchall()
+            keyset_ms = (time.perf_counter() - start) * 1000
+            print(f"  row {depth:>9,}   OFFSET {offset_ms:9.3f} ms   keyset {keyset_ms:7.3f} ms")
+
+        start = time.perf_counter()
+        conn.execute("SELECT COUNT(*) FROM courses").fetchone()
+        print(f"  COUNT(*) per page (skipped by count=cached/none): {(time.perf_counter() - start) * 1000:.3f} ms")
+        conn.close()
+
+def main():
+    print("🗄️  SQLite access layer benchmarks")
+    print("=" * 40)
+    bench_connection_overhead()
+    bench_read_write_split()
+    bench_async_concurrency()
+    bench_course_search()
+    bench_keyset_pagination()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
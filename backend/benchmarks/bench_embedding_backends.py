@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+CPU benchmarks for the embedding backends: PyTorch SentenceTransformer vs
+the int8 ONNX export (export_onnx_model.py), by single-query latency,
+batched throughput and agreement with the PyTorch embeddings.
+
+Run from the backend directory after exporting:
+    python benchmarks/bench_embedding_backends.py [onnx model directory]
+"""
+
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+# Make the app package importable when run as a script
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from app.config import settings
+from app.services.embedding_backends import ONNX_PREFIX, cosine_agreement, load_embedding_model, parse_model_spec
+
+sys.path.append(str(Path(__file__).resolve().parent))
+from bench_embeddings import make_queries, report
+
+DEFAULT_ONNX_DIR = "./data/models/all-MiniLM-L6-v2-int8"
+
+def bench_latency(label: str, model, texts, runs: int = 200):
+    """One query at a time, as an uncached request would embed it"""
+    latencies = []
+    for text in texts[:runs]:
+        start = time.perf_counter()
+        model.encode([text], batch_size=1)
+        latencies.append((time.perf_counter() - start) * 1000)
+    latencies.sort()
+    print(
+        f"  {label:<26} p50 {statistics.median(latencies):6.2f} ms   "
+        f"p95 {latencies[int(len(latencies) * 0.95)]:6.2f} ms"
+    )
+
+def bench_throughput(label: str, model, texts, batch_size: int = settings.EMBEDDING_BATCH_MAX_SIZE):
+    start = time.perf_counter()
+    model.encode(texts, batch_size=batch_size)
+    report(f"{label} (batch {batch_size})", len(texts), time.perf_counter() - start)
+
+def main():
+    print("⚡ Embedding backend benchmarks")
+    print("=" * 40)
+    onnx_dir = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_ONNX_DIR
+    reference_name = settings.EMBEDDING_MODEL
+    if parse_model_spec(reference_name)[0] == "onnx":
+        reference_name = "all-MiniLM-L6-v2"
+    try:
+        backends = [
+            ("pytorch", load_embedding_model(reference_name)),
+            ("onnx int8", load_embedding_model(ONNX_PREFIX + onnx_dir, settings.EMBEDDING_ONNX_THREADS))
+        ]
+    except ImportError as e:
+        print(f"Missing dependency: {e}")
+        return 1
+    except FileNotFoundError:
+        print(f"No ONNX export in {onnx_dir}; run export_onnx_model.py first")
+        return 1
+
+    queries = make_queries(512)
+    for _, model in backends:
+        model.encode(queries[:16], batch_size=16)  # Warm up
+
+    print("\n📊 Single-query latency")
+    for label, model in backends:
+        bench_latency(label, model, queries)
+
+    print("\n📊 Throughput")
+    for label, model in backends:
+        bench_throughput(label, model, queries)
+
+    print("\n📊 Agreement with pytorch")
+    embeddings = [np.asarray(model.encode(queries, batch_size=32)) for _, model in backends]
+    agreement = cosine_agreement(embeddings[0], embeddings[1])
+    print(f"  cosine mean {agreement['mean']:.4f}   p05 {agreement['p05']:.4f}   min {agreement['min']:.4f}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
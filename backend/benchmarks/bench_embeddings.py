@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Benchmarks for query/course embedding on CPU: one encode() per text vs
+batched encode() calls, and the async micro-batcher under concurrent load.
+
+Uses the backend named by EMBEDDING_MODEL. Run from the backend directory:
+    python benchmarks/bench_embeddings.py
+"""
+
+import asyncio
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+# Make the app package importable when run as a script
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from app.config import settings
+from app.services.embedding_batcher import EmbeddingBatcher
+from app.services.embedding_backends import load_embedding_model
+
+WORDS = [
+    "python", "javascript", "machine", "learning", "data", "science", "web", "development", "react",
+    "beginner", "advanced", "hands-on", "project", "databases", "cloud", "security", "statistics",
+    "courses", "about", "introduction", "practical", "visual", "deep", "networks", "design"
+]
+
+def make_queries(count: int, seed: int = 7):
+    """Distinct query-like strings of 6-16 words"""
+    rng = random.Random(seed)
+    return [f"{i} " + " ".join(rng.choices(WORDS, k=rng.randint(6, 16))) for i in range(count)]
+
+def report(label: str, count: int, seconds: float):
+    print(f"  {label:<26} {count / seconds:9.1f} texts/s   ({seconds * 1000:8.1f} ms total)")
+
+def bench_encode(model, count: int = 512):
+    """One encode() call per text vs batches of 8/32/64"""
+    print(f"\n📊 Encoding {count} texts")
+    texts = make_queries(count)
+    model.encode(texts[:8])  # Warm up
+
+    start = time.perf_counter()
+    for text in texts:
+        model.encode(text)
+    report("single", count, time.perf_counter() - start)
+
+    for batch_size in (8, 32, 64):
+        start = time.perf_counter()
+        for i in range(0, count, batch_size):
+            model.encode(texts[i:i + batch_size], batch_size=batch_size)
+        report(f"batched ({batch_size})", count, time.perf_counter() - start)
+
+def bench_concurrent_requests(model, clients: int = 64, requests_per_client: int = 8):
+    """Concurrent async callers, each awaiting one embedding at a time"""
+    print(f"\n📊 {clients} concurrent clients x {requests_per_client} requests")
+    texts = make_queries(clients * requests_per_client, seed=11)
+
+    def encode_batch(batch):
+        return [vector.tolist() for vector in model.encode(batch, batch_size=len(batch))]
+
+    async def run(embed):
+        latencies = []
+
+        async def client(offset: int):
+            for i in range(requests_per_client):
+                start = time.perf_counter()
+                await embed(texts[offset * requests_per_client + i])
+                latencies.append((time.perf_counter() - start) * 1000)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(client(c) for c in range(clients)))
+        return time.perf_counter() - start, latencies
+
+    async def unbatched(text):
+        # What each request did before: its own encode call on a worker thread
+        return await asyncio.get_running_loop().run_in_executor(None, lambda: model.encode(text).tolist())
+
+    runs = [("per-request encode", unbatched, None)]
+    for size, wait in ((16, 2.0), (settings.EMBEDDING_BATCH_MAX_SIZE, settings.EMBEDDING_BATCH_MAX_WAIT_MS)):
+        batcher = EmbeddingBatcher(encode_batch, max_batch_size=size, max_wait_ms=wait)
+        runs.append((f"micro-batched ({size}, {wait:g}ms)", batcher.embed, batcher))
+
+    for label, embed, batcher in runs:
+        seconds, latencies = asyncio.run(run(embed))
+        report(label, len(texts), seconds)
+        extra = f", mean batch {batcher.stats()['mean_batch_size']}" if batcher else ""
+        print(f"  {'':<26} p50 {statistics.median(latencies):7.1f} ms   max {max(latencies):7.1f} ms{extra}")
+
+def main():
+    print("🔢 Embedding benchmarks")
+    print("=" * 40)
+    try:
+        model = load_embedding_model(settings.EMBEDDING_MODEL, settings.EMBEDDING_ONNX_THREADS)
+    except ImportError as e:
+        print(f"Missing dependency: {e}")
+        return 1
+    bench_encode(model)
+    bench_concurrent_requests(model)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Benchmarks for negative-keyword exclusion in vector search: the old 3x
+over-fetch with Python filtering vs a server-side Weaviate filter, by
+latency, response payload and how often a query comes back short.
+
+Needs a running Weaviate (docker-compose up weaviate). Builds a throwaway
+collection of synthetic courses and deletes it afterwards. Run from the
+backend directory:
+    python benchmarks/bench_vector_filters.py
+"""
+
+import json
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import weaviate
+from weaviate.classes.config import Configure, DataType, Property, Tokenization
+from weaviate.classes.data import DataObject
+
+# Make the app package importable when run as a script
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from app.services.course_indexer import course_content_text, course_properties
+from app.services.vector_store import RESULT_PROPERTIES, exclusion_filter, exclusion_terms, matches_exclusions
+
+COLLECTION = "BenchCourseFilters"
+DIM = 384
+COURSES = 20_000
+TOPICS = [
+    "python", "javascript", "machine learning", "data science", "web development", "react",
+    "sql", "docker", "kubernetes", "statistics", "deep learning", "nlp", "cloud", "security",
+    "algorithms", "rust", "go", "devops", "testing", "design"
+]
+TITLE_WORDS = ["intro", "advanced", "practical", "modern", "complete", "applied", "hands-on", "guide"]
+
+# (label, negative keywords): a rare exclusion, and one covering a large share of the catalog
+SCENARIOS = [("narrow", ["rust"]), ("broad", ["python", "javascript", "machine learning", "data science"])]
+
+def make_courses(rng: random.Random):
+    courses = []
+    for i in range(COURSES):
+        # Popular topics show up far more often, as in a real catalog
+        topics = rng.sample(TOPICS[:6], rng.randint(1, 2)) + rng.sample(TOPICS[6:], rng.randint(0, 2))
+        title = f"{rng.choice(TITLE_WORDS).title()} {topics[0].title()} {i}"
+        courses.append({
+            "id": f"bench-{i}", "title": title, "description": f"A course about {', '.join(topics)} " * 8,
+            "topics": topics, "difficulty": rng.choice(["beginner", "intermediate", "advanced"]),
+            "duration": "6 weeks", "format": "video", "rating": round(rng.uniform(3, 5), 1)
+        })
+    return courses
+
+def create_collection(client):
+    client.collections.delete(COLLECTION)
+    text = lambda name: Property(name=name, data_type=DataType.TEXT)
+    exact = lambda name: Property(name=name, data_type=DataType.TEXT_ARRAY, tokenization=Tokenization.FIELD, index_searchable=False)
+    return client.collections.create(
+        name=COLLECTION,
+        vectorizer_config=Configure.Vectorizer.none(),
+        properties=[
+            text("courseId"), text("title"), text("description"),
+            Property(name="topics", data_type=DataType.TEXT_ARRAY),
+            text("difficulty"), text("duration"), text("format"),
+            Property(name="rating", data_type=DataType.NUMBER),
+            text("contentVector"), text("contentHash"), exact("topicTags"), exact("titleTokens")
+        ]
+    )
+
+def payload_bytes(objects) -> int:
+    return sum(len(json.dumps(obj.properties, default=str)) for obj in objects)
+
+def bench(collection, queries, terms, limit: int = 15):
+    over_fetch = {"ms": [], "bytes": [], "short": 0}
+    filtered = {"ms": [], "bytes": [], "short": 0}
+    for vector in queries:
+        start = time.perf_counter()
+        result = collection.query.near_vector(near_vector=vector, limit=limit * 3, return_metadata=["distance"])
+        kept = [obj for obj in result.objects if not matches_exclusions(obj.properties, terms)][:limit]
+        over_fetch["ms"].append((time.perf_counter() - start) * 1000)
+        over_fetch["bytes"].append(payload_bytes(result.objects))
+        over_fetch["short"] += len(kept) < limit
+
+        start = time.perf_counter()
+        result = collection.query.near_vector(
+            near_vector=vector, limit=limit, filters=exclusion_filter(terms),
+            return_properties=RESULT_PROPERTIES, return_metadata=["distance"]
+        )
+        filtered["ms"].append((time.perf_counter() - start) * 1000)
+        filtered["bytes"].append(payload_bytes(result.objects))
+        filtered["short"] += len(result.objects) < limit
+    for label, runs in (("3x over-fetch", over_fetch), ("server filter", filtered)):
+        print(
+            f"  {label:<14} median {statistics.median(runs['ms']):7.2f} ms   "
+            f"payload {statistics.mean(runs['bytes']) / 1024:7.1f} KiB   short results {runs['short']}/{len(queries)}"
+        )
+
+def main():
+    print("🚫 Exclusion filter benchmarks")
+    print("=" * 40)
+    try:
+        client = weaviate.connect_to_local(host="localhost", port=8080)
+    except Exception as e:
+        print(f"Weaviate is not reachable: {e}")
+        return 1
+    try:
+        rng = random.Random(5)
+        np_rng = np.random.default_rng(5)
+        collection = create_collection(client)
+        courses = make_courses(rng)
+        centres = np_rng.standard_normal((len(TOPICS), DIM))
+        print(f"\nIndexing {len(courses):,} synthetic courses...")
+        for i in range(0, len(courses), 1000):
+            objects = []
+            for course in courses[i:i + 1000]:
+                vector = centres[TOPICS.index(course["topics"][0])] + 0.8 * np_rng.standard_normal(DIM)
+                objects.append(DataObject(
+                    properties=course_properties(course, course_content_text(course)),
+                    vector=(vector / np.linalg.norm(vector)).tolist()
+                ))
+            collection.data.insert_many(objects)
+        # Queries aimed at the popular topics, where broad exclusions bite hardest
+        queries = [(centres[rng.randrange(6)] + 0.8 * np_rng.standard_normal(DIM)).tolist() for _ in range(200)]
+        for label, keywords in SCENARIOS:
+            print(f"\n📊 {label} exclusion {keywords}")
+            bench(collection, queries, exclusion_terms(keywords))
+    finally:
+        client.collections.delete(COLLECTION)
+        client.close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
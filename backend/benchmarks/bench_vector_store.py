@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Benchmarks for the local vector index's exact search (one NumPy matrix
+product per query, then a partial sort for the top 10) by catalog size, on
+clustered 384-d unit vectors, which behave more like sentence embeddings
+than uniform random ones.
+
+Run from the backend directory:
+    python benchmarks/bench_vector_store.py
+"""
+
+import statistics
+import sys
+import time
+
+import numpy as np
+
+DIM = 384  # all-MiniLM-L6-v2
+SIZES = (10_000, 50_000, 200_000, 500_000)
+
+def unit_vectors(count: int, seed: int, clusters: int = 100) -> np.ndarray:
+    """Points scattered around `clusters` shared centres"""
+    rng = np.random.default_rng(seed)
+    centres = np.random.default_rng(0).standard_normal((clusters, DIM)).astype(np.float32)
+    vectors = centres[rng.integers(0, clusters, count)]
+    vectors += 0.6 * rng.standard_normal((count, DIM), dtype=np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+def exact_top_k(vectors: np.ndarray, query: np.ndarray, k: int):
+    distances = 1.0 - vectors @ query
+    top = np.argpartition(distances, k - 1)[:k]
+    return top[np.argsort(distances[top])]
+
+def bench_exact(count: int, queries: int = 200, k: int = 10):
+    vectors = unit_vectors(count, seed=1)
+    probes = unit_vectors(queries, seed=2)
+    latencies = []
+    for query in probes:
+        start = time.perf_counter()
+        exact_top_k(vectors, query, k)
+        latencies.append((time.perf_counter() - start) * 1000)
+    latencies.sort()
+    print(
+        f"  {count:>9,} vectors ({vectors.nbytes / 2**20:6.0f} MiB)   "
+        f"p50 {statistics.median(latencies):7.2f} ms   p95 {latencies[int(len(latencies) * 0.95)]:7.2f} ms"
+    )
+
+def main():
+    print("🧭 Local vector index benchmarks")
+    print("=" * 40)
+    print(f"\n📊 Exact top-10 search, {DIM}-d float32")
+    for count in SIZES:
+        bench_exact(count)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
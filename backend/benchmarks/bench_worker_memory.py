@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Memory benchmarks for serving the embedding model from several worker
+processes: each worker loading its own copy of the weights vs mapping the
+shared weight store (EMBEDDING_SHARED_WEIGHTS_DIR), at 1, 4 and 8 workers.
+
+Workers are started with spawn, as `uvicorn --workers` does, and all stay
+alive until every one has been measured. RSS counts shared pages in full
+for every process; PSS splits them between the processes mapping them, so
+total PSS is what the workers really cost. Linux only (reads
+/proc/self/smaps_rollup). Run from the backend directory:
+    python benchmarks/bench_worker_memory.py
+"""
+
+import multiprocessing
+import statistics
+import sys
+import tempfile
+from pathlib import Path
+
+# Make the app package importable when run as a script
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from app.config import settings
+from app.services.embedding_backends import load_embedding_model
+
+WORKER_COUNTS = (1, 4, 8)
+
+def memory_kib():
+    """(RSS, PSS) of the current process in KiB"""
+    fields = {}
+    with open("/proc/self/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == "kB":
+                fields[parts[0].rstrip(":")] = int(parts[1])
+    return fields["Rss"], fields["Pss"]
+
+def worker(shared_dir, barrier, results):
+    import torch
+    torch.set_num_threads(1)
+    model = load_embedding_model(settings.EMBEDDING_MODEL, shared_weights_dir=shared_dir)
+    model.encode(["warm up the model with a query", "and a second one"], batch_size=2)
+    barrier.wait()  # Everyone has loaded: shared pages are now mapped by all workers
+    results.put(memory_kib())
+    barrier.wait()  # Stay alive until every worker has measured
+
+def bench(workers: int, shared_dir):
+    context = multiprocessing.get_context("spawn")
+    barrier = context.Barrier(workers)
+    results = context.Queue()
+    processes = [context.Process(target=worker, args=(shared_dir, barrier, results)) for _ in range(workers)]
+    for process in processes:
+        process.start()
+    measured = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+    rss = [r / 1024 for r, _ in measured]
+    pss = [p / 1024 for _, p in measured]
+    label = "shared weights" if shared_dir else "private copies"
+    print(
+        f"  {workers} worker(s), {label:<15} RSS/worker {statistics.mean(rss):7.1f} MiB   "
+        f"PSS/worker {statistics.mean(pss):7.1f} MiB   total PSS {sum(pss):8.1f} MiB"
+    )
+
+def main():
+    print("🧠 Worker memory benchmarks")
+    print("=" * 40)
+    if not Path("/proc/self/smaps_rollup").exists():
+        print("Needs Linux (/proc/self/smaps_rollup)")
+        return 1
+    try:
+        import torch  # noqa: F401
+        import sentence_transformers  # noqa: F401
+    except ImportError as e:
+        print(f"Missing dependency: {e}")
+        return 1
+    with tempfile.TemporaryDirectory() as shared_dir:
+        for workers in WORKER_COUNTS:
+            print(f"\n📊 {workers} worker(s)")
+            bench(workers, None)
+            bench(workers, shared_dir)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Export the SentenceTransformer embedding model to ONNX, quantize it to int8
+and check its embeddings agree with the original model.
+
+Needs torch, sentence-transformers, onnx and onnxruntime. Run from the
+backend directory:
+    python export_onnx_model.py                 # export + verify
+    python export_onnx_model.py --verify-only   # re-check an existing export
+Then set EMBEDDING_MODEL=onnx:<output directory> and reindex (vectors from
+the two backends are close but not identical).
+"""
+
+import argparse
+import json
+import logging
+import sys
+from pathlib import Path
+
+import numpy as np
+
+# Add the app directory to Python path
+sys.path.append(str(Path(__file__).parent / "app"))
+
+from app.database import init_db
+from app.services.course_indexer import course_content_text, sample_courses
+from app.services.embedding_backends import (
+    CONFIG_FILE, ONNX_MODEL_FILE, TOKENIZER_FILE, OnnxEmbeddingModel, cosine_agreement
+)
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# An export passes verification when every text's int8 embedding is at least
+# MIN_COSINE from the reference one and the mean is at least MIN_MEAN_COSINE
+MIN_COSINE = 0.97
+MIN_MEAN_COSINE = 0.99
+
+VERIFY_QUERIES = [
+    "I want to learn Python programming for beginners",
+    "Advanced machine learning and artificial intelligence",
+    "Web development with modern frameworks but not PHP",
+    "Data visualization and analytics",
+    "full stack engineer",
+    "courses about statistics, probability and data science",
+    "visual learning beginner level",
+    "cloud security"
+]
+
+def export(model_name: str, output: Path, opset: int = 14):
+    """Write the int8 ONNX model, tokenizer and pooling config to `output`"""
+    import torch
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+    from sentence_transformers import SentenceTransformer
+
+    model = SentenceTransformer(model_name, device="cpu")
+    transformer = model[0].auto_model.eval()
+    tokenizer = model.tokenizer
+    output.mkdir(parents=True, exist_ok=True)
+
+    class Encoder(torch.nn.Module):
+        """Token embeddings only; pooling runs in NumPy"""
+
+        def __init__(self, transformer):
+            super().__init__()
+            self.transformer = transformer
+
+        def forward(self, input_ids, attention_mask, token_type_ids):
+            return self.transformer(
+                input_ids=input_ids, attention_mask=attention_mask, token_type_ids=token_type_ids
+            )[0]
+
+    sample = tokenizer(["an example sentence to trace"], return_tensors="pt")
+    fp32_path = output / "model_fp32.onnx"
+    dynamic = {0: "batch", 1: "tokens"}
+    logger.info(f"Exporting {model_name} to ONNX...")
+    with torch.no_grad():
+        torch.onnx.export(
+            Encoder(transformer),
+            (sample["input_ids"], sample["attention_mask"], sample["token_type_ids"]),
+            str(fp32_path),
+            input_names=["input_ids", "attention_mask", "token_type_ids"],
+            output_names=["last_hidden_state"],
+            dynamic_axes={
+                "input_ids": dynamic, "attention_mask": dynamic, "token_type_ids": dynamic, "last_hidden_state": dynamic
+            },
+            opset_version=opset
+        )
+
+    logger.info("Quantizing weights to int8...")
+    quantize_dynamic(str(fp32_path), str(output / ONNX_MODEL_FILE), weight_type=QuantType.QInt8)
+    fp32_path.unlink()
+
+    tokenizer.backend_tokenizer.save(str(output / TOKENIZER_FILE))
+    config = {
+        "source_model": model_name,
+        "dimension": model.get_sentence_embedding_dimension(),
+        "max_seq_length": model.max_seq_length,
+        "pad_token": tokenizer.pad_token,
+        "pad_token_id": tokenizer.pad_token_id,
+        "pooling": "mean",
+        # all-MiniLM-L6-v2 ends in a Normalize module
+        "normalize": any(type(module).__name__ == "Normalize" for module in model)
+    }
+    (output / CONFIG_FILE).write_text(json.dumps(config, indent=2))
+    size = (output / ONNX_MODEL_FILE).stat().st_size / 1024 / 1024
+    logger.info(f"Wrote {output / ONNX_MODEL_FILE} ({size:.1f} MB)")
+
+def verification_texts(samples: int):
+    """Query-like strings plus course texts, as the app embeds them"""
+    try:
+        init_db()
+        courses = sample_courses(samples)
+    except Exception as e:
+        logger.warning(f"Could not read courses, verifying on queries only: {e}")
+        courses = []
+    return VERIFY_QUERIES + [course_content_text(course) for course in courses]
+
+def verify(model_name: str, output: Path, samples: int) -> bool:
+    """Compare the ONNX model's embeddings with the reference model's"""
+    from sentence_transformers import SentenceTransformer
+
+    texts = verification_texts(samples)
+    reference = SentenceTransformer(model_name, device="cpu").encode(texts, batch_size=32)
+    candidate = OnnxEmbeddingModel(str(output)).encode(texts, batch_size=32)
+    agreement = cosine_agreement(np.asarray(reference), candidate)
+    logger.info(
+        f"Cosine agreement over {agreement['texts']} texts: mean {agreement['mean']:.4f}, "
+        f"p05 {agreement['p05']:.4f}, min {agreement['min']:.4f}"
+    )
+    if agreement["min"] < MIN_COSINE or agreement["mean"] < MIN_MEAN_COSINE:
+        logger.error(f"ONNX embeddings disagree with {model_name} (need min >= {MIN_COSINE}, mean >= {MIN_MEAN_COSINE})")
+        return False
+    logger.info(f"ONNX model verified; set EMBEDDING_MODEL=onnx:{output}")
+    return True
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--model", default="all-MiniLM-L6-v2", help="SentenceTransformer model to export")
+    parser.add_argument("--output", default="./data/models/all-MiniLM-L6-v2-int8", help="Directory for the export")
+    parser.add_argument("--samples", type=int, default=200, help="Courses to include in verification")
+    parser.add_argument("--verify-only", action="store_true", help="Skip the export, verify an existing one")
+    args = parser.parse_args()
+
+    output = Path(args.output)
+    try:
+        if not args.verify_only:
+            export(args.model, output)
+        return 0 if verify(args.model, output, args.samples) else 1
+    except ImportError as e:
+        logger.error(f"Missing dependency ({e}); install torch, sentence-transformers, onnx and onnxruntime")
+        return 1
+
+if __name__ == "__main__":
+    sys.exit(main())
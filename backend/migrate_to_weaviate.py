@@ -1,84 +1,104 @@
 #!/usr/bin/env python3
 """
 Migration script to populate Weaviate vector database with existing course data
+
+    python migrate_to_weaviate.py                 # recreate the collections from SQLite
+    python migrate_to_weaviate.py --adopt-alias   # one-off: move a pre-alias Course collection behind the alias
 """
 
 import sys
 import json
+import time
+from functools import partial
 from pathlib import Path
 
 # Add the app directory to Python path
 sys.path.append(str(Path(__file__).parent / "app"))
 
 from app.services.weaviate_service import weaviate_service
-from app.database import execute_query
+from app.database import init_db, execute_query, get_course_topics
+from app.services.course_indexer import reindex_courses
+from app.services.jobs import job_runner, JobAlreadyRunning
 import logging
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+def wait_for_job(job_id, poll_interval=1.0):
+    """Log progress of a background job until it finishes; Ctrl+C cancels it"""
+    last_percent = None
+    try:
+        while True:
+            job = job_runner.get(job_id)
+            if job["status"] not in ("queued", "running"):
+                return job
+            percent = job["progress"]["percent"]
+            if percent is not None and percent != last_percent:
+                eta = f", ETA {job['eta_seconds']:.0f}s" if job["eta_seconds"] is not None else ""
+                logger.info(f"Job {job_id}: {percent:.1f}% ({job['progress']['done']}/{job['progress']['total']}){eta}")
+                last_percent = percent
+            time.sleep(poll_interval)
+    except KeyboardInterrupt:
+        logger.warning(f"Cancelling job {job_id}...")
+        job_runner.cancel(job_id)
+        job_runner.shutdown(wait=True)
+        return job_runner.get(job_id)
+
 def migrate_courses_to_weaviate():
     """Migrate all courses from SQLite to Weaviate"""
     try:
-        # First, create the Weaviate schema
-        logger.info("Creating Weaviate schema...")
-        if not weaviate_service.create_schema():
-            logger.error("Failed to create Weaviate schema")
-            return False
+        # Recreate the Weaviate schema and stream courses from SQLite in batches,
+        # as a tracked job so progress also shows up in GET /admin/jobs/{id}
+        logger.info("Migrating courses from SQLite...")
+        job_id = job_runner.submit("reindex", partial(reindex_courses, weaviate_service, "full"))
+        job = wait_for_job(job_id)
         
-        # Get all courses from SQLite
-        logger.info("Fetching courses from SQLite...")
-        courses = execute_query(
-            "SELECT id, title, description, topics, difficulty, duration, format, rating FROM courses"
-        )
+        if job["status"] != "completed":
+            logger.error(f"Course migration job {job_id} {job['status']}: {job['error'] or ''}")
+            return False
         
-        if not courses:
+        report = job["result"]
+        if not report["total"]:
             logger.warning("No courses found in SQLite database")
             return False
         
-        logger.info(f"Found {len(courses)} courses to migrate")
-        
-        # Migrate each course
-        successful_migrations = 0
-        failed_migrations = 0
+        for course_id, error in report["failures"].items():
+            logger.error(f"✗ Failed to migrate course {course_id}: {error}")
         
-        for course in courses:
-            try:
-                # Parse topics JSON
-                topics = json.loads(course[3]) if course[3] else []
-                
-                # Prepare course data
-                course_data = {
-                    'id': course[0],
-                    'title': course[1],
-                    'description': course[2],
-                    'topics': topics,
-                    'difficulty': course[4],
-                    'duration': course[5],
-                    'format': course[6],
-                    'rating': course[7]
-                }
-                
-                # Add to Weaviate
-                if weaviate_service.add_course(course_data):
-                    successful_migrations += 1
-                    logger.info(f"✓ Migrated course: {course[1]}")
-                else:
-                    failed_migrations += 1
-                    logger.error(f"✗ Failed to migrate course: {course[1]}")
-                    
-            except Exception as e:
-                failed_migrations += 1
-                logger.error(f"✗ Error migrating course {course[0]}: {e}")
-        
-        logger.info(f"Migration complete: {successful_migrations} successful, {failed_migrations} failed")
-        return successful_migrations > 0
+        logger.info(
+            f"Migration complete: {report['successful']} successful, {report['failed']} failed "
+            f"({report['courses_per_sec']} courses/s)"
+        )
+        return report["successful"] > 0
         
+    except JobAlreadyRunning as e:
+        logger.error(f"Migration failed: reindex job {e.job_id} is already running")
+        return False
     except Exception as e:
         logger.error(f"Migration failed: {e}")
         return False
 
+def adopt_course_alias():
+    """Rebuild Course into a versioned collection and serve it through the alias.
+
+    For collections created before aliases: the old Course collection has to
+    be deleted before the alias can take its name, so searches from other
+    processes fail for a moment. Run it once, in a maintenance window.
+    """
+    try:
+        logger.info("Rebuilding Course behind an alias...")
+        job_id = job_runner.submit("reindex", partial(reindex_courses, weaviate_service, "rebuild", adopt_legacy=True))
+        job = wait_for_job(job_id)
+        if job["status"] != "completed" or not job["result"]["switched"]:
+            logger.error(f"Alias migration job {job_id} {job['status']}: {job['error'] or job['result']}")
+            return False
+        logger.info(f"Course alias now serves {job['result']['collection']}")
+        return True
+    except JobAlreadyRunning as e:
+        logger.error(f"Alias migration failed: reindex job {e.job_id} is already running")
+        return False
+
 def migrate_user_preferences():
     """Migrate user preferences to Weaviate"""
     try:
@@ -98,6 +118,14 @@ def migrate_user_preferences():
         
         users = execute_query(users_query)
         
+        # Resolve topics for every rated course in one batched lookup
+        rated_course_ids = {
+            course_id.strip()
+            for user in users if user[5]
+            for course_id in user[5].split(',')
+        }
+        course_topics = get_course_topics(list(rated_course_ids))
+        
         for user in users:
             try:
                 user_id = str(user[0])
@@ -110,14 +138,7 @@ def migrate_user_preferences():
                 if user[5]:  # rated_courses
                     course_ids = user[5].split(',')
                     for course_id in course_ids:
-                        course = execute_query(
-                            "SELECT topics FROM courses WHERE id = ?", 
-                            (course_id.strip(),), 
-                            fetch_one=True
-                        )
-                        if course and course[0]:
-                            course_topics = json.loads(course[0])
-                            topics_liked.extend(course_topics)
+                        topics_liked.extend(course_topics.get(course_id.strip(), []))
                 
                 # Remove duplicates
                 topics_liked = list(set(topics_liked))
@@ -202,6 +223,9 @@ def check_weaviate_health():
 def main():
     """Run the migration"""
     logger.info("Starting Weaviate migration...")
+    init_db()
+    # Connect and load the embedding model before anything needs them
+    weaviate_service.wait_until_ready()
     
     # Check if Weaviate is available
     if not check_weaviate_health():
@@ -210,6 +234,9 @@ def main():
         logger.info("docker run -p 8080:8080 -p 50051:50051 weaviate/weaviate:1.26.1")
         return 1
     
+    if "--adopt-alias" in sys.argv[1:]:
+        return 0 if adopt_course_alias() else 1
+    
     # Migrate courses
     if not migrate_courses_to_weaviate():
         logger.error("Course migration failed")
@@ -57,7 +57,7 @@ install_dependencies() {
     cd backend
     
     # Install additional dependencies if not already installed
-    pip install weaviate-client sentence-transformers numpy > /dev/null 2>&1 || {
+    pip install "weaviate-client>=4.16" sentence-transformers numpy > /dev/null 2>&1 || {
         echo -e "${RED}❌ Failed to install dependencies${NC}"
         exit 1
     }